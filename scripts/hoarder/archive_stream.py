@@ -0,0 +1,380 @@
+"""
+Stream ZIP archive members straight into Supabase Storage.
+
+The archive can be a local file or a remote URL. Remote archives are read
+through HTTPRangeFile, a seekable file object backed by HTTP range
+requests, so zipfile can read the central directory from the end of the
+file and then walk each member's bytes without the archive ever being
+written to disk. Members are decompressed, hashed and uploaded one at a
+time; progress is checkpointed by member index so an interrupted run
+resumes at the next member.
+
+When published checksums are known, the whole archive is hashed on the
+way through (PrefixHasher) rather than in a second pass, and members with
+their own published digests are checked before their upload completes.
+Members of an archive being verified are uploaded under STAGING_PREFIX
+and only moved into place once the archive digest matches; on a
+mismatch (or an error mid-archive) the staged objects are deleted, so
+nothing from a corrupt archive lands at its final path. Objects a killed
+run left in staging are cleared by the next verified run of the archive
+(and by `hoarder.py refresh` for the whole source).
+"""
+
+import io
+import zipfile
+from fnmatch import fnmatch
+
+import httpx
+from rich.console import Console
+
+from checksums import lookup, new_hashers, verified_chunks
+from live import STAGING_PREFIX
+from uploader import stream_upload, list_objects, move_object, remove_objects
+
+console = Console()
+
+READ_CHUNK = 1024 * 1024
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a remote file over HTTP range requests.
+
+    Sequential reads share one open streaming response; a seek elsewhere
+    closes it and the next read opens `Range: bytes=<pos>-`. Reading the
+    members of a ZIP in header-offset order therefore costs one request
+    per member rather than one per read() call.
+    """
+
+    def __init__(self, url: str, client: httpx.Client | None = None, timeout: int = 120):
+        self.url = url
+        self._own_client = client is None
+        self._client = client or httpx.Client(timeout=timeout, follow_redirects=True)
+        self._pos = 0
+        self._resp = None
+        self._iter = None
+        self._buf = b""
+        self._stream_pos = -1
+        self.size = self._probe_size()
+
+    def _probe_size(self) -> int:
+        with self._client.stream("GET", self.url, headers={"Range": "bytes=0-0"}) as resp:
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                raise IOError(f"{self.url} does not support range requests")
+            return int(resp.headers["content-range"].rpartition("/")[2])
+
+    def _close_stream(self):
+        if self._resp is not None:
+            self._resp.close()
+        self._resp = self._iter = None
+        self._buf = b""
+        self._stream_pos = -1
+
+    def _open_stream(self):
+        self._close_stream()
+        req = self._client.build_request("GET", self.url, headers={"Range": f"bytes={self._pos}-"})
+        self._resp = self._client.send(req, stream=True)
+        self._resp.raise_for_status()
+        self._iter = self._resp.iter_raw(chunk_size=READ_CHUNK)
+        self._stream_pos = self._pos
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        return self._pos
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self._pos
+        n = min(n, self.size - self._pos)
+        if n <= 0:
+            return b""
+
+        # Short forward skips are cheaper to read through than to reconnect
+        gap = self._pos - self._stream_pos
+        if self._iter is not None and 0 < gap <= READ_CHUNK:
+            self._pos = self._stream_pos
+            self.read(gap)
+        if self._pos != self._stream_pos or self._iter is None:
+            self._open_stream()
+
+        out = bytearray()
+        while len(out) < n:
+            if not self._buf:
+                self._buf = next(self._iter, b"")
+                if not self._buf:
+                    break
+            take = self._buf[:n - len(out)]
+            self._buf = self._buf[len(take):]
+            out.extend(take)
+
+        self._pos += len(out)
+        self._stream_pos = self._pos
+        return bytes(out)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._close_stream()
+        if self._own_client:
+            self._client.close()
+        super().close()
+
+
+class PrefixHasher(io.RawIOBase):
+    """
+    Seekable wrapper that hashes the archive's bytes as zipfile reads them.
+
+    Only the contiguous prefix is hashed: bytes are fed to the hashers when
+    a read starts at (or within READ_CHUNK after) the hashed position, so
+    walking members in header-offset order covers the file in one pass.
+    finish() reads whatever is left (the central directory, normally) and
+    returns the hex digests.
+    """
+
+    def __init__(self, raw, size: int, hashers: dict):
+        self.raw = raw
+        self.size = size
+        self.hashers = hashers
+        self._hash_pos = 0
+
+    def _feed(self, start: int, data: bytes):
+        end = start + len(data)
+        if start <= self._hash_pos < end:
+            view = memoryview(data)[self._hash_pos - start:]
+            for h in self.hashers.values():
+                h.update(view)
+            self._hash_pos = end
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.raw.seek(offset, whence)
+
+    def read(self, n: int = -1) -> bytes:
+        pos = self.raw.tell()
+        # Fill small gaps (data descriptors, skipped headers) to keep the prefix whole
+        gap = pos - self._hash_pos
+        if 0 < gap <= READ_CHUNK:
+            self.raw.seek(self._hash_pos)
+            self._feed(self._hash_pos, self.raw.read(gap))
+            self.raw.seek(pos)
+        data = self.raw.read(n)
+        self._feed(pos, data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def finish(self) -> dict[str, str]:
+        self.raw.seek(self._hash_pos)
+        while self._hash_pos < self.size:
+            if not self.read(min(READ_CHUNK, self.size - self._hash_pos)):
+                raise IOError(f"Archive truncated at byte {self._hash_pos} of {self.size}")
+        return {algo: h.hexdigest() for algo, h in self.hashers.items()}
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def _open_raw(src: str):
+    if src.startswith(("http://", "https://")):
+        raw = HTTPRangeFile(src)
+        return raw, raw.size
+    raw = open(src, "rb")
+    return raw, raw.seek(0, io.SEEK_END)
+
+
+def open_archive(src: str, hashers: dict | None = None) -> zipfile.ZipFile:
+    """
+    Open a ZIP from a local path or an http(s) URL (via range requests).
+    With hashers, the archive bytes are hashed as they are read; call
+    zf.fp.finish() once the members have been consumed.
+    """
+    if not hashers and not src.startswith(("http://", "https://")):
+        return zipfile.ZipFile(src)
+    raw, size = _open_raw(src)
+    if hashers:
+        raw = PrefixHasher(raw, size, hashers)
+    return zipfile.ZipFile(raw)
+
+
+def iter_members(zf: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """File members in on-disk order, so remote reads stay sequential."""
+    return sorted((i for i in zf.infolist() if not i.is_dir()), key=lambda i: i.header_offset)
+
+
+def _member_chunks(zf: zipfile.ZipFile, info: zipfile.ZipInfo):
+    # ZipExtFile verifies the member's CRC-32 when it reaches EOF and raises
+    # before returning the final bytes, so a corrupt member never completes
+    # its upload.
+    with zf.open(info) as member:
+        for chunk in iter(lambda: member.read(READ_CHUNK), b""):
+            yield chunk
+
+
+def clear_staging(remote_prefix: str) -> int:
+    """Delete whatever a killed run left staged under remote_prefix. Returns the count."""
+    stale = list_objects(f"{STAGING_PREFIX}/{remote_prefix}")
+    if stale:
+        remove_objects(stale)
+        console.print(f"[yellow]Removed {len(stale)} stale staged objects under {remote_prefix}[/yellow]")
+    return len(stale)
+
+
+def stream_archive(src: str, remote_prefix: str, tracker, archive_key: str,
+                   manifest_prefix: str = "",
+                   skip_patterns: list[str] | None = None,
+                   expected: dict[str, str] | None = None,
+                   checksum_index: dict | None = None,
+                   upload=stream_upload) -> tuple[list[dict], dict]:
+    """
+    Upload every member of a ZIP archive to `<remote_prefix>/<member path>`.
+    Returns (manifest, stats) like upload_directory. The tracker cursor
+    `archive_key` holds the index of the last member before which nothing
+    failed, so a rerun starts at the following member; members uploaded
+    after a failure are skipped on rerun through the tracker's file set.
+
+    `expected` is the archive's published {algorithm: digest}; on a fresh
+    (non-resumed) run the archive is verified against it and
+    stats["integrity"] is set to "verified" or "mismatch". Members are
+    staged until then and the cursor only moves once they are promoted,
+    so an interrupted verified run starts over. Members found in
+    `checksum_index` (by relative path) are verified before their upload
+    is finalized. `upload` is stream_upload or a version of it bound to a
+    shared pool.
+    """
+    stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    manifest = []
+    skip_patterns = skip_patterns or []
+    checksum_index = checksum_index or {}
+    had_failure = False
+
+    def advance(idx: int):
+        if not had_failure:
+            tracker.set_cursor(archive_key, idx)
+
+    start = tracker.get_cursor(archive_key, -1) + 1
+    # Hashing a resumed run would mean re-reading everything already uploaded
+    hashers = new_hashers(expected) if expected and start == 0 else None
+    if expected and not hashers:
+        console.print("[yellow]Resumed run: archive checksum not verified "
+                      "(member CRCs still are)[/yellow]")
+    staged = []  # (staging path, final path, manifest entry) until the archive verifies
+    if hashers:
+        clear_staging(remote_prefix)
+
+    try:
+        with open_archive(src, hashers) as zf:
+            members = iter_members(zf)
+            total_mb = sum(i.file_size for i in members) / 1024 / 1024
+            console.print(f"[cyan]{len(members)} members ({total_mb:.1f}MB uncompressed)"
+                          f"{f', resuming at #{start}' if start else ''}"
+                          f"{', staged until the archive checksum matches' if hashers else ''}[/cyan]")
+
+            for idx, info in enumerate(members):
+                rel_path = f"{manifest_prefix}{info.filename}"
+                if idx < start:
+                    stats["skipped"] += 1
+                    manifest.append({"path": rel_path, "size": info.file_size})
+                    continue
+
+                remote_path = f"{remote_prefix}/{info.filename}"
+                if any(fnmatch(info.filename, pat) for pat in skip_patterns) or tracker.is_uploaded(remote_path):
+                    stats["skipped"] += 1
+                    manifest.append({"path": rel_path, "size": info.file_size})
+                    if not hashers:
+                        advance(idx)
+                    continue
+
+                target = f"{STAGING_PREFIX}/{remote_path}" if hashers else remote_path
+                try:
+                    chunks = verified_chunks(_member_chunks(zf, info),
+                                             lookup(checksum_index, info.filename), info.filename)
+                    entry = upload(target, chunks, info.file_size)
+                except Exception as e:
+                    stats["failed"] += 1
+                    console.print(f"[red]Failed: {remote_path}: {e}[/red]")
+                    had_failure = True
+                    continue
+
+                record = {"path": rel_path, "size": entry["size"], "sha256": entry["sha256"]}
+                if hashers:
+                    staged.append((target, remote_path, record))
+                else:
+                    manifest.append(record)
+                    stats["uploaded"] += 1
+                    stats["bytes"] += entry["size"]
+                    tracker.mark_uploaded(remote_path)
+                    advance(idx)
+
+                done = stats["uploaded"] + len(staged)
+                if done % 500 == 0:
+                    console.print(f"[dim]  {idx + 1}/{len(members)} members, {done} "
+                                  f"{'staged' if hashers else 'uploaded'}[/dim]")
+
+            if hashers:
+                digests = zf.fp.finish()
+                bad = [a for a in digests if digests[a] != expected[a]]
+                stats["integrity"] = "mismatch" if bad else "verified"
+                if bad:
+                    console.print(f"[red]Checksum mismatch for {src} ({', '.join(bad)}): "
+                                  f"archive differs from the published digest[/red]")
+                else:
+                    console.print(f"[green]Archive matches published {', '.join(digests)}[/green]")
+    except BaseException:
+        # Unverified members never outlive the run that staged them
+        if staged:
+            remove_objects([path for path, _, _ in staged])
+        raise
+
+    if stats.get("integrity") == "mismatch":
+        if staged:
+            remove_objects([path for path, _, _ in staged])
+            console.print(f"[red]Deleted {len(staged)} staged members; nothing from {src} was kept[/red]")
+    elif staged:
+        for path, remote_path, record in staged:
+            try:
+                move_object(path, remote_path)
+            except Exception as e:
+                stats["failed"] += 1
+                console.print(f"[red]Failed to promote {remote_path}: {e}[/red]")
+                had_failure = True
+                continue
+            manifest.append(record)
+            stats["uploaded"] += 1
+            stats["bytes"] += record["size"]
+            tracker.mark_uploaded(remote_path)
+        console.print(f"[green]Promoted {stats['uploaded']} verified members[/green]")
+    if hashers and stats["integrity"] == "verified":
+        advance(len(members) - 1)
+
+    tracker.flush()
+    return manifest, stats
@@ -0,0 +1,176 @@
+"""
+Published checksums for the DOJ datasets (from the yung-megafone repo).
+
+The repo's checksum files come in a few shapes -- `sha256sum` output,
+markdown tables, README lists -- so parsing is deliberately loose: any
+line holding a hex digest of a known length plus either a file name or a
+"Data Set N" mention becomes an index entry. The algorithm is inferred
+from the digest length.
+
+The index maps normalized relative paths to {algorithm: digest}; each
+entry is also filed under its bare file name while that name is unique
+(an ambiguous name maps to {} and matches nothing), and archive entries
+under "dataset-N" so they can be found by dataset number.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import httpx
+
+TIMEOUT = 30
+ALGO_BY_LENGTH = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+CANDIDATE_FILE = re.compile(r"(sha\d*|md5|checksum|hash|readme)", re.IGNORECASE)
+HEX_DIGEST = re.compile(r"\b([0-9a-fA-F]{128}|[0-9a-fA-F]{64}|[0-9a-fA-F]{40}|[0-9a-fA-F]{32})\b")
+FILE_NAME = re.compile(
+    r"([\w][\w .()\-/]*\.(?:zip|tar\.xz|tar\.gz|tgz|tar|7z|rar|pdf|txt|csv|json|dat|opt|jpg|png|tif|tiff))",
+    re.IGNORECASE,
+)
+DATASET = re.compile(r"data[\s_-]*set[\s_-]*(\d+)", re.IGNORECASE)
+ARCHIVE_EXT = (".zip", ".tar.xz", ".tar.gz", ".tgz", ".tar", ".7z", ".rar")
+
+
+def normalize_name(name: str) -> str:
+    """
+    'Data Set 9.zip', 'DataSet_9.zip' and 'data-set-9.ZIP' -> 'dataset9.zip'.
+    Directories are kept ('./VOL 1/a.pdf' -> 'vol1/a.pdf').
+    """
+    path = name.replace("\\", "/").replace("%20", " ").lower().strip()
+    parts = [re.sub(r"[\s_\-]+", "", p) for p in path.split("/") if p not in ("", ".")]
+    return "/".join(parts)
+
+
+def parse_checksums(text: str) -> list[tuple[str, str, str]]:
+    """Return (key, algorithm, digest) triples found in a checksum listing."""
+    found = []
+    for line in text.splitlines():
+        m = HEX_DIGEST.search(line)
+        if not m:
+            continue
+        digest = m.group(1).lower()
+        algo = ALGO_BY_LENGTH[len(digest)]
+        rest = line[:m.start()] + " " + line[m.end():]
+
+        fm = FILE_NAME.search(rest)
+        if fm:
+            name = fm.group(1).strip()
+            found.append((normalize_name(name), algo, digest))
+            dm = DATASET.search(name)
+            if dm and name.lower().endswith(ARCHIVE_EXT):
+                found.append((f"dataset-{int(dm.group(1))}", algo, digest))
+            continue
+
+        dm = DATASET.search(rest)
+        if dm:
+            found.append((f"dataset-{int(dm.group(1))}", algo, digest))
+    return found
+
+
+def build_index(texts: list[str]) -> dict[str, dict[str, str]]:
+    index: dict[str, dict[str, str]] = {}
+    for text in texts:
+        for key, algo, digest in parse_checksums(text):
+            index.setdefault(key, {})[algo] = digest
+
+    # Bare-name aliases, for listings and archives that disagree on the root
+    by_base: dict[str, list[str]] = {}
+    for key in index:
+        if "/" in key:
+            by_base.setdefault(key.rsplit("/", 1)[-1], []).append(key)
+    for base, keys in by_base.items():
+        entries = [index[k] for k in keys] + ([index[base]] if base in index else [])
+        unique = all(e == entries[0] for e in entries)
+        index[base] = dict(entries[0]) if unique else {}
+    return index
+
+
+def fetch_checksum_index(repo_url: str, cache_dir: str | None = None) -> dict[str, dict[str, str]]:
+    """
+    Build the checksum index from a GitHub repo's checksum/README files,
+    cached as JSON in cache_dir. Returns {} if the repo can't be read.
+    """
+    owner_repo = "/".join(repo_url.rstrip("/").split("/")[-2:])
+    cache_path = os.path.join(cache_dir, f"checksums-v2-{owner_repo.replace('/', '_')}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+
+    headers = {}
+    if os.environ.get("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+
+    try:
+        with httpx.Client(timeout=TIMEOUT, headers=headers, follow_redirects=True) as client:
+            repo = client.get(f"https://api.github.com/repos/{owner_repo}")
+            repo.raise_for_status()
+            branch = repo.json().get("default_branch", "main")
+            tree = client.get(f"https://api.github.com/repos/{owner_repo}/git/trees/{branch}",
+                              params={"recursive": 1})
+            tree.raise_for_status()
+            paths = [t["path"] for t in tree.json().get("tree", [])
+                     if t.get("type") == "blob" and CANDIDATE_FILE.search(t["path"].rsplit("/", 1)[-1])
+                     and t.get("size", 0) < 20 * 1024 * 1024]
+            texts = []
+            for path in paths:
+                r = client.get(f"https://raw.githubusercontent.com/{owner_repo}/{branch}/{path}")
+                if r.status_code == 200:
+                    texts.append(r.text)
+    except httpx.HTTPError:
+        return {}
+
+    index = build_index(texts)
+    if cache_path and index:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(index, f, indent=2)
+    return index
+
+
+def lookup(index: dict, *names: str) -> dict[str, str] | None:
+    """
+    First index entry matching any of the given names or relative paths
+    (normalized): the exact path first, then the bare file name if no
+    other file in the index shares it.
+    """
+    for name in names:
+        key = name if name.startswith("dataset-") else normalize_name(name)
+        for candidate in (key, key.rsplit("/", 1)[-1]):
+            if candidate in index:
+                return index[candidate] or None
+    return None
+
+
+def new_hashers(expected: dict[str, str]) -> dict:
+    """hashlib objects for every algorithm we have an expected digest for."""
+    return {algo: hashlib.new(algo) for algo in expected if algo in hashlib.algorithms_available}
+
+
+def mismatches(hashers: dict, expected: dict[str, str]) -> list[str]:
+    """Algorithms whose computed digest differs from the published one."""
+    return [algo for algo, h in hashers.items() if h.hexdigest() != expected[algo]]
+
+
+def verified_chunks(chunks, expected: dict[str, str] | None, label: str):
+    """
+    Pass chunks through, hashing them, and hold back the final chunk until
+    the digest is checked. On mismatch the generator raises instead of
+    yielding the last bytes, so a streamed upload never completes.
+    """
+    if not expected:
+        yield from chunks
+        return
+    hashers = new_hashers(expected)
+    held = None
+    for chunk in chunks:
+        for h in hashers.values():
+            h.update(chunk)
+        if held is not None:
+            yield held
+        held = chunk
+    bad = mismatches(hashers, expected)
+    if bad:
+        raise IOError(f"Checksum mismatch for {label} ({', '.join(bad)})")
+    if held is not None:
+        yield held
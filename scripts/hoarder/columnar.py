@@ -0,0 +1,149 @@
+"""
+Parquet copies of the scrapers' row-oriented JSON output.
+
+The scrapers write JSONL (or JSON arrays) as they go, which keeps them
+streaming and resumable. Once a dataset is complete, to_parquet() makes
+a zstd-compressed Parquet file next to it, so consumers can read just
+the columns they need:
+
+    import pyarrow.parquet as pq
+    pq.read_table("documents.parquet", columns=["id", "file_url"])
+
+The schema is inferred from the records in a first pass: the union of
+every key, with ints widened to float when a column mixes them, and
+mixed or nested (dict/list) values stored as JSON text.
+Rows are written in row groups of ROW_GROUP_ROWS, so readers can skip
+row groups with predicate pushdown and memory stays bounded on
+multi-million-row indexes.
+
+pyarrow is optional here: without it, to_parquet() logs and returns None.
+Set PARQUET_OUTPUT=0 to skip the Parquet copies entirely.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from scrape_http import log
+
+ROW_GROUP_ROWS = int(os.environ.get("PARQUET_ROW_GROUP_ROWS", "100000"))
+PARQUET_OUTPUT = os.environ.get("PARQUET_OUTPUT", "1") != "0"
+COMPRESSION = "zstd"
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+
+def iter_records(paths: list[Path]):
+    """Records from JSONL files, or JSON files holding an array (or {data: [...]})."""
+    for path in paths:
+        with open(path) as f:
+            if path.suffix == ".jsonl":
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from (data.get("data", []) if isinstance(data, dict) else data)
+
+
+def _kind(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "json"
+
+
+def infer_schema(records) -> "pa.Schema":
+    """Column types from the union of every record's keys (first-seen order)."""
+    kinds: dict[str, set] = {}
+    for record in records:
+        for key, value in record.items():
+            seen = kinds.setdefault(key, set())
+            kind = _kind(value)
+            if kind:
+                seen.add(kind)
+
+    fields = []
+    for key, seen in kinds.items():
+        if seen == {"bool"}:
+            type_ = pa.bool_()
+        elif seen == {"int"}:
+            type_ = pa.int64()
+        elif seen and seen <= {"int", "float"}:
+            type_ = pa.float64()
+        else:
+            type_ = pa.string()
+        fields.append(pa.field(key, type_))
+    return pa.schema(fields)
+
+
+def _column(values: list, type_) -> list:
+    if type_ == pa.string():
+        return [v if v is None or isinstance(v, str) else json.dumps(v) for v in values]
+    if type_ == pa.float64():
+        return [None if v is None else float(v) for v in values]
+    return values
+
+
+def _write_group(writer, schema, rows: list[dict]):
+    columns = {f.name: _column([r.get(f.name) for r in rows], f.type) for f in schema}
+    writer.write_table(pa.Table.from_pydict(columns, schema=schema), row_group_size=len(rows))
+
+
+def to_parquet(sources, dest: Path | None = None, row_group_rows: int = ROW_GROUP_ROWS) -> int | None:
+    """
+    Write the records of one JSONL file (or several JSON/JSONL files, in
+    order) to a Parquet file. dest defaults to the first source with a
+    .parquet suffix. Returns the row count, or None if skipped.
+    """
+    paths = [Path(p) for p in (sources if isinstance(sources, (list, tuple)) else [sources])]
+    dest = Path(dest) if dest else paths[0].with_suffix(".parquet")
+    if not PARQUET_OUTPUT:
+        return None
+    if not HAVE_PYARROW:
+        log(f"  pyarrow not installed — skipping {dest.name}")
+        return None
+
+    schema = infer_schema(iter_records(paths))
+    if not len(schema):
+        return 0
+
+    tmp = dest.with_suffix(".parquet.tmp")
+    rows = 0
+    batch: list[dict] = []
+    with pq.ParquetWriter(tmp, schema, compression=COMPRESSION) as writer:
+        for record in iter_records(paths):
+            batch.append(record)
+            if len(batch) >= row_group_rows:
+                _write_group(writer, schema, batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            _write_group(writer, schema, batch)
+            rows += len(batch)
+    tmp.replace(dest)
+
+    source_bytes = sum(p.stat().st_size for p in paths)
+    log(f"  Parquet: {rows:,} rows, {len(schema)} columns → {dest.name} "
+        f"({dest.stat().st_size / 1024 / 1024:.1f} MB from {source_bytes / 1024 / 1024:.1f} MB)")
+    return rows
+
+
+def read_columns(path: Path, columns: list[str]) -> list[dict]:
+    """Rows with only the given columns: from <path>.parquet if present, else the JSONL."""
+    parquet = Path(path).with_suffix(".parquet")
+    if HAVE_PYARROW and parquet.exists():
+        return pq.read_table(parquet, columns=columns).to_pylist()
+    return [{c: r.get(c) for c in columns} for r in iter_records([Path(path)])]
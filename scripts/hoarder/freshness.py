@@ -0,0 +1,127 @@
+"""
+Cheap "has this source changed?" probes, one metadata call per source.
+
+Each probe returns an opaque fingerprint string (or None if the source
+type can't be probed). The hoarder stores the fingerprint alongside the
+progress state when a source completes; `hoarder.py refresh` re-probes
+and only re-fetches sources whose fingerprint moved.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import httpx
+
+TIMEOUT = 30
+
+
+def probe_github(source: dict) -> str | None:
+    """Remote HEAD commit SHA."""
+    result = subprocess.run(
+        ["git", "ls-remote", source["url"], "HEAD"],
+        capture_output=True, text=True, timeout=TIMEOUT,
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+
+def probe_huggingface(source: dict) -> str | None:
+    """Dataset revision SHA on the Hub."""
+    from huggingface_hub import HfApi
+
+    info = HfApi(token=os.environ.get("HF_TOKEN")).dataset_info(source["url"])
+    return info.sha
+
+
+def probe_http(url: str, client: httpx.Client | None = None) -> str | None:
+    """ETag, else Last-Modified + Content-Length, from a HEAD request."""
+    if client is None:
+        with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as client:
+            return probe_http(url, client)
+    resp = client.head(url)
+    if resp.status_code >= 400:
+        return None
+    etag = resp.headers.get("etag")
+    if etag:
+        return f"etag:{etag}"
+    modified = resp.headers.get("last-modified")
+    if modified:
+        return f"lm:{modified}|{resp.headers.get('content-length', '')}"
+    return None
+
+
+def probe_direct(source: dict) -> str | None:
+    return probe_http(source["url"])
+
+
+def probe_zenodo(source: dict) -> str | None:
+    """Record revision + update time (the record API is the metadata call)."""
+    record_id = source["url"].split("/")[-1]
+    resp = httpx.get(f"https://zenodo.org/api/records/{record_id}", timeout=TIMEOUT)
+    resp.raise_for_status()
+    record = resp.json()
+    etag = resp.headers.get("etag")
+    if etag:
+        return f"etag:{etag}"
+    return f"rev:{record.get('revision')}|{record.get('updated')}"
+
+
+def _kaggle_auth() -> tuple[str, str] | None:
+    user, key = os.environ.get("KAGGLE_USERNAME"), os.environ.get("KAGGLE_KEY")
+    if user and key:
+        return user, key
+    cfg = Path.home() / ".kaggle" / "kaggle.json"
+    if cfg.exists():
+        data = json.loads(cfg.read_text())
+        return data["username"], data["key"]
+    return None
+
+
+def kaggle_dataset_view(ref: str) -> dict:
+    """Dataset metadata from Kaggle's public API (version, size, ...)."""
+    resp = httpx.get(f"https://www.kaggle.com/api/v1/datasets/view/{ref}",
+                     auth=_kaggle_auth(), timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def probe_kaggle(source: dict) -> str | None:
+    """Current dataset version number."""
+    view = kaggle_dataset_view(source["url"])
+    version = view.get("currentVersionNumber")
+    return f"v{version}" if version is not None else None
+
+
+def probe_doj(source: dict) -> str | None:
+    """Combined HTTP validators of every mirrored archive."""
+    with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as client:
+        parts = [f"{name}={probe_http(url, client)}"
+                 for name, url in sorted(source.get("archives", {}).items())]
+    if not parts:
+        return None
+    return "sha256:" + hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+PROBES = {
+    "github": probe_github,
+    "huggingface": probe_huggingface,
+    "direct_download": probe_direct,
+    "zenodo": probe_zenodo,
+    "kaggle": probe_kaggle,
+    "doj": probe_doj,
+}
+
+
+def fingerprint(source: dict) -> str | None:
+    """Probe a source. Returns None when unsupported or the probe fails."""
+    probe = PROBES.get(source["type"])
+    if not probe:
+        return None
+    try:
+        return probe(source)
+    except Exception:
+        return None
@@ -0,0 +1,189 @@
+"""
+Upload a git repository's HEAD tree straight from the object store.
+
+Instead of cloning a working tree and walking it, this does a bare,
+blobless, depth-1 clone (commits + trees only), lists the tree with blob
+SHA-1s and sizes, and pipes each blob out of `git cat-file --batch`
+directly into Storage. The previous run's manifest records each file's
+blob SHA-1, so an unchanged repo uploads nothing and a changed one only
+fetches and uploads the blobs that differ.
+"""
+
+import os
+import shutil
+import subprocess
+from fnmatch import fnmatch
+
+from rich.console import Console
+
+from uploader import get_client, stream_upload, download_manifest, copy_object
+
+console = Console()
+
+PREFETCH_BATCH = 500
+READ_CHUNK = 1024 * 1024
+SKIP_DIRS = {".git", "__pycache__", "node_modules", ".venv"}
+
+
+def _git(args: list[str], cwd: str | None = None, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, **kwargs)
+
+
+def blobless_clone(url: str, dest: str):
+    """Bare, depth-1, blobless clone: only the HEAD commit and its trees."""
+    if os.path.exists(dest):
+        shutil.rmtree(dest)
+    result = _git(["clone", "--bare", "--depth=1", "--filter=blob:none", url, dest])
+    if result.returncode != 0:
+        # Servers without partial-clone support still allow a shallow bare clone
+        console.print("[yellow]Blobless clone refused, falling back to shallow bare clone...[/yellow]")
+        _git(["clone", "--bare", "--depth=1", url, dest], check=True)
+
+
+def list_tree(repo: str) -> list[dict]:
+    """Every blob reachable from HEAD as {path, git_sha1, size}."""
+    out = subprocess.run(
+        ["git", "ls-tree", "-r", "-l", "-z", "HEAD"],
+        cwd=repo, capture_output=True, check=True,
+    ).stdout.decode("utf-8", errors="surrogateescape")
+
+    entries = []
+    for record in filter(None, out.split("\0")):
+        meta, path = record.split("\t", 1)
+        mode, obj_type, sha, size = meta.split()
+        # Skip submodules (commit) and symlinks (120000)
+        if obj_type != "blob" or mode == "120000":
+            continue
+        entries.append({"path": path, "git_sha1": sha, "size": int(size)})
+    return entries
+
+
+def prefetch_blobs(repo: str, shas: list[str]):
+    """
+    Fetch missing blobs in batches -- the same request git's lazy fetch
+    makes, but hundreds of objects per round trip instead of one.
+    """
+    for i in range(0, len(shas), PREFETCH_BATCH):
+        batch = shas[i:i + PREFETCH_BATCH]
+        result = _git([
+            "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin",
+            "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+            "--filter=blob:none", "--stdin",
+        ], cwd=repo, input="\n".join(batch) + "\n")
+        if result.returncode != 0:
+            # cat-file will still lazily fetch each blob, just more slowly
+            console.print(f"[yellow]Batch blob prefetch failed, falling back to lazy fetch: "
+                          f"{result.stderr.strip()[:200]}[/yellow]")
+            return
+        console.print(f"[dim]  Prefetched {min(i + PREFETCH_BATCH, len(shas))}/{len(shas)} blobs[/dim]")
+
+
+class BlobReader:
+    """Long-lived `git cat-file --batch` process that streams blob contents."""
+
+    def __init__(self, repo: str):
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=repo,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def stream(self, sha: str):
+        """Yield the blob's bytes in chunks. Must be fully consumed."""
+        self.proc.stdin.write(f"{sha}\n".encode())
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().decode().split()
+        if len(header) != 3:
+            raise IOError(f"git cat-file: {' '.join(header) or 'no output'}")
+        remaining = int(header[2])
+        while remaining:
+            chunk = self.proc.stdout.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                raise IOError(f"git cat-file: short read for {sha}")
+            remaining -= len(chunk)
+            yield chunk
+        self.proc.stdout.read(1)  # trailing newline
+
+    def close(self):
+        """
+        Stop the process. After a failed upload it may be blocked writing
+        the rest of a blob nobody will read, so it is killed, not waited on.
+        """
+        self.proc.kill()
+        self.proc.stdin.close()
+        self.proc.stdout.close()
+        self.proc.wait(timeout=30)
+
+
+def stream_git_repo(source: dict, tracker, source_key: str,
+                    temp_dir: str, upload=stream_upload) -> tuple[list[dict], dict]:
+    """
+    Upload the repo's HEAD tree to the source's bucket path, skipping any
+    file whose blob SHA-1 matches the previous manifest. Returns
+    (manifest, stats) like upload_directory. `upload` is stream_upload or
+    a version of it bound to a shared pool.
+    """
+    stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    skip_patterns = source.get("skip_patterns", [])
+    repo = os.path.join(temp_dir, source["bucket_path"].replace("/", "_") + ".git")
+
+    previous = download_manifest(get_client(), source_key) or {}
+    prev_files = {f["path"]: f for f in previous.get("files", []) if f.get("git_sha1")}
+
+    console.print(f"[cyan]Blobless clone of {source['url']}...[/cyan]")
+    blobless_clone(source["url"], repo)
+
+    entries = [
+        e for e in list_tree(repo)
+        if not any(part in SKIP_DIRS for part in e["path"].split("/"))
+        and not any(fnmatch(e["path"], pat) for pat in skip_patterns)
+    ]
+
+    manifest = []
+    changed = []
+    for e in entries:
+        prev = prev_files.get(e["path"])
+        if prev and prev["git_sha1"] == e["git_sha1"]:
+            manifest.append(prev)
+            stats["skipped"] += 1
+        else:
+            changed.append(e)
+
+    total_mb = sum(e["size"] for e in changed) / 1024 / 1024
+    console.print(f"[cyan]{len(entries)} files in tree, {len(changed)} new or changed "
+                  f"({total_mb:.1f}MB)[/cyan]")
+
+    # Same blob at several paths: upload once, server-side copy the rest
+    uploaded_blobs: dict[str, dict] = {}
+    prefetch_blobs(repo, sorted({e["git_sha1"] for e in changed}))
+
+    reader = BlobReader(repo)
+    try:
+        for e in changed:
+            remote_path = f"{source['bucket_path']}/{e['path']}"
+            try:
+                first = uploaded_blobs.get(e["git_sha1"])
+                if first:
+                    copy_object(first["remote_path"], remote_path)
+                    entry = {**first["entry"], "path": e["path"]}
+                else:
+                    up = upload(remote_path, reader.stream(e["git_sha1"]), e["size"])
+                    entry = {"path": e["path"], "size": up["size"], "sha256": up["sha256"],
+                             "git_sha1": e["git_sha1"]}
+                    uploaded_blobs[e["git_sha1"]] = {"remote_path": remote_path, "entry": entry}
+            except Exception as ex:
+                stats["failed"] += 1
+                console.print(f"[red]Failed: {remote_path}: {ex}[/red]")
+                # A half-consumed blob desyncs the batch protocol; restart it
+                reader.close()
+                reader = BlobReader(repo)
+                continue
+
+            manifest.append(entry)
+            stats["uploaded"] += 1
+            stats["bytes"] += entry["size"]
+            tracker.mark_uploaded(remote_path)
+    finally:
+        reader.close()
+        shutil.rmtree(repo, ignore_errors=True)
+
+    return manifest, stats
@@ -27,7 +27,10 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 import httpx
 from supabase import create_client
-from uploader import upload_directory
+from uploader import upload_directory, upload_manifest
+import segmented
+from archive_stream import stream_archive
+from progress import ProgressTracker
 
 BASE_DIR = "/mnt/temp/public-gaps"
 os.makedirs(BASE_DIR, exist_ok=True)
@@ -56,19 +59,15 @@ def download_file(url, dest_path, label=""):
     for attempt in range(3):
         try:
             log(f"  GET {label or os.path.basename(dest_path)}...")
-            with httpx.stream("GET", url, headers=headers, timeout=120, follow_redirects=True) as resp:
-                resp.raise_for_status()
-                with open(dest_path, "wb") as f:
-                    for chunk in resp.iter_bytes(chunk_size=65536):
-                        f.write(chunk)
+            # Partial progress is kept in <dest>.part + segment map, so a
+            # retry only refetches the byte ranges that didn't arrive
+            segmented.download_file(url, dest_path, headers=headers, timeout=120, log=log)
 
             size_mb = os.path.getsize(dest_path) / 1024 / 1024
             log(f"  OK: {os.path.basename(dest_path)} ({size_mb:.1f}MB)")
             return True
         except Exception as e:
             log(f"  Error (attempt {attempt+1}): {e}")
-            if os.path.exists(dest_path):
-                os.remove(dest_path)
             if attempt < 2:
                 time.sleep(5 * (attempt + 1))
 
@@ -411,6 +410,20 @@ for source_key, local_dir, remote_prefix in upload_sources:
         total_stats[k] += stats.get(k, 0)
     log(f"  {source_key}: {stats}")
 
+# The Giuffre v. Maxwell zip is also expanded member-by-member so the
+# individual exhibits are addressable, without extracting it to disk.
+gvm_zip = f"{BASE_DIR}/giuffre-v-maxwell/EpsteinDocs_full.zip"
+if os.path.exists(gvm_zip):
+    log("\n  Streaming EpsteinDocs_full.zip members...")
+    manifest, stats = stream_archive(
+        gvm_zip, "court-records/giuffre-v-maxwell/EpsteinDocs_full",
+        ProgressTracker(BASE_DIR), archive_key="giuffre-v-maxwell:EpsteinDocs_full",
+    )
+    upload_manifest(client, "giuffre-v-maxwell-members", manifest, stats)
+    for k in total_stats:
+        total_stats[k] += stats.get(k, 0)
+    log(f"  giuffre-v-maxwell members: {stats}")
+
 log(f"\n=== GRAND TOTAL ===")
 log(f"Uploaded: {total_stats['uploaded']}, Skipped: {total_stats['skipped']}, "
     f"Failed: {total_stats['failed']}, Bytes: {total_stats['bytes'] / 1024 / 1024:.1f}MB")
@@ -0,0 +1,193 @@
+"""
+Column-selective download of HuggingFace parquet datasets.
+
+snapshot_download pulls every byte of every file. For parquet we can do
+much better: open each file through HfFileSystem (HTTP range reads), read
+only the footer, then fetch just the column chunks we want, row group by
+row group. The selected columns are re-encoded with zstd into shards of
+ROW_GROUPS_PER_SHARD row groups each, so an interrupted run resumes at the
+first missing shard. Non-parquet files (README, CSVs, ...) still come down
+whole via snapshot_download.
+
+Opt-in: only runs with `hoarder.py download --prune-columns` (PRUNE), for
+sources with `drop_columns` (glob patterns), `columns` or `row_filter` set,
+e.g. dropping the 768-d embedding vectors from the svetfm datasets. Without
+the flag every source is mirrored byte for byte.
+
+`row_filter` is a list of (column, op, value) triples, ANDed. Row groups
+whose footer min/max statistics rule the filter out are never fetched; the
+rest are read and filtered row by row.
+"""
+
+import json
+import os
+from fnmatch import fnmatch
+
+from rich.console import Console
+
+console = Console()
+
+ROW_GROUPS_PER_SHARD = int(os.environ.get("HF_ROW_GROUPS_PER_SHARD", "8"))
+# Read-ahead per range request; column chunks are usually a few MB
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Set by `hoarder.py download --prune-columns`
+PRUNE = False
+
+
+def prunes(source: dict) -> bool:
+    """Whether this run re-encodes the source's parquet instead of mirroring it."""
+    return PRUNE and bool(source.get("drop_columns") or source.get("columns")
+                          or source.get("row_filter"))
+
+
+def pruned_variant(source_key: str, source: dict) -> tuple[str, dict]:
+    """
+    The key and source entry a pruned copy is hoarded under: its own
+    progress/manifest key and bucket path, so it never stands in for (or
+    mixes with) the full mirror.
+    """
+    return f"{source_key}-pruned", {**source, "bucket_path": f"{source['bucket_path']}-pruned"}
+
+
+def select_columns(names: list[str], source: dict) -> list[str]:
+    """Apply a source's `columns` allow-list and `drop_columns` globs."""
+    keep = source.get("columns") or names
+    drop = source.get("drop_columns", [])
+    return [c for c in names if c in keep and not any(fnmatch(c, pat) for pat in drop)]
+
+
+def _may_match(stats, op: str, value) -> bool:
+    """Whether a row group with these column statistics can satisfy `op value`."""
+    if stats is None or not stats.has_min_max:
+        return True
+    lo, hi = stats.min, stats.max
+    try:
+        if op == "==":
+            return lo <= value <= hi
+        if op == "in":
+            return any(lo <= v <= hi for v in value)
+        if op == "!=":
+            return not (lo == hi == value)
+        if op == "<":
+            return lo < value
+        if op == "<=":
+            return lo <= value
+        if op == ">":
+            return hi > value
+        if op == ">=":
+            return hi >= value
+    except TypeError:
+        pass  # statistics of another type (e.g. bytes vs str): can't rule it out
+    return True
+
+
+def select_row_groups(metadata, source: dict) -> list[int]:
+    """Row groups whose statistics don't exclude the source's `row_filter`."""
+    row_filter = source.get("row_filter") or []
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    keep = []
+    for rg in range(metadata.num_row_groups):
+        group = metadata.row_group(rg)
+        if all(col not in names or _may_match(group.column(names.index(col)).statistics, op, value)
+               for col, op, value in row_filter):
+            keep.append(rg)
+    return keep
+
+
+def _shard_path(dest: str, rel_path: str, shard: int) -> str:
+    stem = rel_path[:-len(".parquet")]
+    return os.path.join(dest, stem, f"part-{shard:05d}.parquet")
+
+
+def copy_parquet_file(fs, repo_path: str, rel_path: str, dest: str, source: dict) -> tuple[int, int]:
+    """
+    Copy the selected columns and rows of one remote parquet file into local
+    shards. Returns (rows_written, shards_skipped).
+    """
+    import pyarrow.parquet as pq
+
+    row_filter = source.get("row_filter")
+
+    with fs.open(repo_path, "rb", block_size=BLOCK_SIZE) as f:
+        # pre_buffer coalesces the selected column chunks into few range reads
+        pf = pq.ParquetFile(f, pre_buffer=True)
+        names = pf.schema_arrow.names
+        columns = select_columns(names, source)
+        dropped = [c for c in names if c not in columns]
+        selected = select_row_groups(pf.metadata, source)
+        n_groups = pf.metadata.num_row_groups
+        # Filter columns are read even when they aren't kept
+        read_columns = columns + [c for c, _, _ in row_filter or []
+                                  if c in names and c not in columns]
+        expression = pq.filters_to_expression(row_filter) if row_filter else None
+
+        if dropped or len(selected) < n_groups:
+            console.print(f"[dim]  {rel_path}: {len(selected)}/{n_groups} row groups, "
+                          f"dropping {', '.join(dropped) or 'no columns'}[/dim]")
+
+        rows = skipped = 0
+        for shard, start in enumerate(range(0, len(selected), ROW_GROUPS_PER_SHARD)):
+            out_path = _shard_path(dest, rel_path, shard)
+            if os.path.exists(out_path):
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+            groups = selected[start:start + ROW_GROUPS_PER_SHARD]
+            tmp_path = out_path + ".part"
+            writer = None
+            try:
+                for rg in groups:
+                    table = pf.read_row_group(rg, columns=read_columns)
+                    if expression is not None:
+                        table = table.filter(expression).select(columns)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+                    writer.write_table(table)
+                    rows += table.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+            os.replace(tmp_path, out_path)
+
+    return rows, skipped
+
+
+def download_hf_parquet(source: dict, dest: str, token: str | None = None) -> str:
+    """
+    Download a HF dataset into dest, column- and row-selecting every parquet file.
+    Returns dest.
+    """
+    from huggingface_hub import HfFileSystem, snapshot_download
+
+    repo_id = source["url"]
+    os.makedirs(dest, exist_ok=True)
+    # Uploaded with the data, so the manifest says what was left out
+    with open(os.path.join(dest, "_selection.json"), "w") as f:
+        json.dump({k: source.get(k) for k in ("columns", "drop_columns", "row_filter")}, f, indent=2)
+
+    # Everything that isn't parquet comes down as-is
+    snapshot_download(
+        repo_id=repo_id,
+        repo_type="dataset",
+        local_dir=dest,
+        token=token,
+        ignore_patterns=["*.parquet"],
+    )
+
+    fs = HfFileSystem(token=token)
+    root = f"datasets/{repo_id}"
+    parquet_files = sorted(p for p in fs.find(root) if p.endswith(".parquet"))
+    console.print(f"[cyan]{len(parquet_files)} parquet files, reading selected columns and row groups only...[/cyan]")
+
+    total_rows = 0
+    for repo_path in parquet_files:
+        rel_path = repo_path[len(root) + 1:]
+        rows, skipped = copy_parquet_file(fs, repo_path, rel_path, dest, source)
+        total_rows += rows
+        if skipped:
+            console.print(f"[dim]  {rel_path}: {skipped} shards already present[/dim]")
+
+    console.print(f"[green]Wrote {total_rows:,} selected rows[/green]")
+    return dest
@@ -11,23 +11,40 @@ Usage:
     python hoarder.py --source s0fskr1p        # Download one source
     python hoarder.py --tier 1                 # Download all Tier 1 sources
     python hoarder.py --status                 # Show progress
+    python hoarder.py refresh --all            # Re-fetch only changed sources
+    python hoarder.py plan --all               # Sizes, ETA and disk need, no downloads
 """
 
 import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 
 import click
 import httpx
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 
 from sources import SOURCES
-from uploader import get_client, ensure_bucket, upload_directory, verify_source
+from uploader import (get_client, ensure_bucket, upload_directory, upload_manifest,
+                      verify_source, stream_upload, FairUploadPool, CONCURRENT_UPLOADS)
 from progress import ProgressTracker
+import hf_parquet
+import segmented
+from archive_stream import clear_staging, stream_archive
+from checksums import fetch_checksum_index, lookup
+from git_stream import stream_git_repo
+from freshness import fingerprint
+import planner
+import live
 
 console = Console()
 load_dotenv()
@@ -36,6 +53,9 @@ load_dotenv()
 # On the cloud VM this should be the mounted SSD: /mnt/temp
 TEMP_DIR = os.environ.get("HOARDER_TEMP_DIR", "/mnt/temp")
 
+# Share of the global upload pool each tier gets when sources run in parallel
+TIER_WEIGHT = {1: 4, 2: 3, 3: 2, 4: 1}
+
 
 def download_github(source: dict, temp_dir: str) -> str:
     """Clone a GitHub repo to temp directory. Returns path to cloned repo."""
@@ -99,11 +119,6 @@ def download_huggingface(source: dict, temp_dir: str) -> str:
     from huggingface_hub import snapshot_download
 
     dest = os.path.join(temp_dir, source["bucket_path"].replace("/", "_"))
-    if os.path.exists(dest) and any(Path(dest).iterdir()):
-        console.print(f"[yellow]Already downloaded: {dest}[/yellow]")
-        return dest
-
-    console.print(f"[cyan]Downloading HuggingFace dataset {source['url']}...[/cyan]")
 
     # If source needs auth, HF_TOKEN env var must be set
     token = os.environ.get("HF_TOKEN")
@@ -111,6 +126,18 @@ def download_huggingface(source: dict, temp_dir: str) -> str:
         console.print(f"[red]Skipping {source['name']}: HF_TOKEN not set (gated dataset)[/red]")
         raise RuntimeError(f"HF_TOKEN required for {source['name']}")
 
+    # Column/row-selective path, only with --prune-columns; the default is a
+    # byte-for-byte mirror. hoard_source gives it its own key and bucket path.
+    if hf_parquet.prunes(source):
+        console.print(f"[cyan]Downloading HuggingFace dataset {source['url']} (selected columns)...[/cyan]")
+        return hf_parquet.download_hf_parquet(source, dest, token=token)
+
+    if os.path.exists(dest) and any(Path(dest).iterdir()):
+        console.print(f"[yellow]Already downloaded: {dest}[/yellow]")
+        return dest
+
+    console.print(f"[cyan]Downloading HuggingFace dataset {source['url']}...[/cyan]")
+
     snapshot_download(
         repo_id=source["url"],
         repo_type="dataset",
@@ -135,11 +162,7 @@ def download_direct(source: dict, temp_dir: str) -> str:
         return dest_dir
 
     console.print(f"[cyan]Downloading {url}...[/cyan]")
-    with httpx.stream("GET", url, follow_redirects=True, timeout=120) as resp:
-        resp.raise_for_status()
-        with open(dest_file, "wb") as f:
-            for chunk in resp.iter_bytes(chunk_size=8192):
-                f.write(chunk)
+    segmented.download_file(url, dest_file, timeout=120, log=console.print)
 
     return dest_dir
 
@@ -169,11 +192,7 @@ def download_zenodo(source: dict, temp_dir: str) -> str:
         size_mb = file_info.get("size", 0) / 1024 / 1024
         console.print(f"[cyan]Downloading {filename} ({size_mb:.1f}MB)...[/cyan]")
 
-        with httpx.stream("GET", download_url, follow_redirects=True, timeout=600) as r:
-            r.raise_for_status()
-            with open(dest_file, "wb") as f:
-                for chunk in r.iter_bytes(chunk_size=65536):
-                    f.write(chunk)
+        segmented.download_file(download_url, dest_file, timeout=600, log=console.print)
 
     return dest
 
@@ -207,29 +226,279 @@ DOWNLOADERS = {
 }
 
 
-def hoard_source(source_key: str, source: dict, client, tracker: ProgressTracker):
-    """Download a single source and upload to Supabase Storage."""
+# ---------------------------------------------------------------------------
+# Streaming mode: HTTP body -> hasher -> Storage, no temp files
+# ---------------------------------------------------------------------------
+
+def source_upload(source: dict, source_key: str, pool: FairUploadPool | None):
+    """stream_upload, queued under the source's tier weight when a shared pool is in use."""
+    if pool is None:
+        return stream_upload
+    return partial(stream_upload, pool=pool, queue_key=source_key,
+                   weight=TIER_WEIGHT.get(source["tier"], 1))
+
+
+def stream_url(url: str, remote_path: str, timeout: int = 600, upload=stream_upload) -> dict:
+    """Stream one HTTP resource straight into Storage. Returns a manifest entry."""
+    with httpx.stream("GET", url, follow_redirects=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        # httpx decompresses transparently, so Content-Length only matches the
+        # bytes we'll see when no Content-Encoding was applied
+        length = resp.headers.get("content-length")
+        size = int(length) if length and not resp.headers.get("content-encoding") else None
+        content_type = resp.headers.get("content-type", "").split(";")[0] or None
+        return upload(remote_path, resp.iter_bytes(chunk_size=65536), size, content_type)
+
+
+def stream_files(source: dict, files: list[dict], tracker: ProgressTracker,
+                 timeout: int = 600, upload=stream_upload) -> tuple[list[dict], dict]:
+    """
+    Stream a list of {url, path, size?} files into the source's bucket path.
+    Returns (manifest, stats) in the same shape upload_directory produces.
+    """
+    stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    manifest = []
+
+    for f in files:
+        remote_path = f"{source['bucket_path']}/{f['path']}"
+        if tracker.is_uploaded(remote_path):
+            stats["skipped"] += 1
+            # What was uploaded, not what the listing claimed (direct files have no size)
+            known = tracker.file_info(remote_path)
+            manifest.append({"path": f["path"], "size": known.get("size", f.get("size", 0)),
+                             **({"sha256": known["sha256"]} if "sha256" in known else {})})
+            continue
+
+        size_note = f" ({f['size'] / 1024 / 1024:.1f}MB)" if f.get("size") else ""
+        console.print(f"[cyan]Streaming {f['path']}{size_note} -> {remote_path}...[/cyan]")
+        try:
+            entry = stream_url(f["url"], remote_path, timeout=timeout, upload=upload)
+        except Exception as e:
+            stats["failed"] += 1
+            console.print(f"[red]Failed: {remote_path}: {e}[/red]")
+            continue
+
+        manifest.append({"path": f["path"], "size": entry["size"], "sha256": entry["sha256"]})
+        stats["uploaded"] += 1
+        stats["bytes"] += entry["size"]
+        tracker.mark_uploaded(remote_path, {"size": entry["size"], "sha256": entry["sha256"]})
+        tracker.flush()
+
+    return manifest, stats
+
+
+def stream_direct(source: dict, tracker: ProgressTracker, source_key: str,
+                  pool: FairUploadPool | None = None) -> tuple[list[dict], dict]:
+    """Streaming counterpart of download_direct."""
+    url = source["url"]
+    filename = url.split("/")[-1] or "download.txt"
+    return stream_files(source, [{"url": url, "path": filename}], tracker, timeout=120,
+                        upload=source_upload(source, source_key, pool))
+
+
+def stream_zenodo(source: dict, tracker: ProgressTracker, source_key: str,
+                  pool: FairUploadPool | None = None) -> tuple[list[dict], dict]:
+    """Streaming counterpart of download_zenodo."""
+    record_id = source["url"].split("/")[-1]
+    console.print(f"[cyan]Fetching Zenodo record {record_id}...[/cyan]")
+    resp = httpx.get(f"https://zenodo.org/api/records/{record_id}", timeout=30)
+    resp.raise_for_status()
+
+    files = [
+        {"url": fi["links"]["self"], "path": fi["key"], "size": fi.get("size", 0)}
+        for fi in resp.json().get("files", [])
+    ]
+    return stream_files(source, files, tracker, upload=source_upload(source, source_key, pool))
+
+
+def stream_doj(source: dict, tracker: ProgressTracker, source_key: str,
+               pool: FairUploadPool | None = None) -> tuple[list[dict], dict]:
+    """
+    Stream each DOJ dataset zip member-by-member into doj/dataset-N/ using
+    HTTP range reads -- the archives are never written to local disk.
+
+    Archives (and members) are checked against the checksums published in
+    the source's `checksums` repo while they stream. Members of a checked
+    archive are staged and only moved into place once it matches; one that
+    doesn't has its staged members deleted and its progress forgotten, and
+    fails the source, so it is neither marked complete nor skipped on the
+    next run. So does an archive that failed as a whole (couldn't be
+    opened, or the stream broke); the other archives are still streamed.
+    """
+    manifest = []
+    stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    index = fetch_checksum_index(source["checksums"], TEMP_DIR) if source.get("checksums") else {}
+    if source.get("checksums"):
+        console.print(f"[cyan]{len(index)} published checksums loaded[/cyan]" if index else
+                      "[yellow]No published checksums available, verifying CRCs only[/yellow]")
+
+    integrity = {}
+    broken = []
+    for name, url in source["archives"].items():
+        console.print(f"[cyan]Streaming archive {name} from {url}...[/cyan]")
+        remote_prefix = f"{source['bucket_path']}/{name}"
+        try:
+            m, st = stream_archive(
+                url, remote_prefix, tracker,
+                archive_key=f"{source_key}:{name}", manifest_prefix=f"{name}/",
+                skip_patterns=source.get("skip_patterns", []),
+                expected=lookup(index, url.rsplit("/", 1)[-1], name),
+                checksum_index=index,
+                upload=source_upload(source, source_key, pool),
+            )
+        except Exception as e:
+            stats["failed"] += 1
+            broken.append(f"{name} ({e})")
+            console.print(f"[red]Failed archive {name}: {e}[/red]")
+            continue
+        integrity[name] = st.pop("integrity", "unverified")
+        if integrity[name] == "mismatch":
+            tracker.reset_archive(f"{source_key}:{name}", remote_prefix)
+        manifest.extend(m)
+        for k in stats:
+            stats[k] += st[k]
+
+    bad = [name for name, status in integrity.items() if status == "mismatch"]
+    if bad:
+        raise IOError(f"Archives differ from published checksums: {', '.join(bad)}")
+    if broken:
+        raise IOError(f"Archives failed: {'; '.join(broken)}")
+    stats["integrity"] = integrity
+    return manifest, stats
+
+
+def stream_kaggle(source: dict, tracker: ProgressTracker, source_key: str,
+                  pool: FairUploadPool | None = None) -> tuple[list[dict], dict]:
+    """
+    Download the Kaggle zip without --unzip and stream its members into
+    Storage, so the extracted tree never exists on disk.
+    """
+    dest = os.path.join(TEMP_DIR, source["bucket_path"].replace("/", "_"))
+    os.makedirs(dest, exist_ok=True)
+
+    console.print(f"[cyan]Downloading Kaggle dataset {source['url']} (zipped)...[/cyan]")
+    result = subprocess.run(
+        ["kaggle", "datasets", "download", "-d", source["url"], "-p", dest],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Kaggle download failed: {result.stderr}")
+
+    manifest = []
+    stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    try:
+        for zip_path in sorted(Path(dest).glob("*.zip")):
+            m, st = stream_archive(
+                str(zip_path), source["bucket_path"], tracker,
+                archive_key=f"{source_key}:{zip_path.name}",
+                skip_patterns=source.get("skip_patterns", []),
+                upload=source_upload(source, source_key, pool),
+            )
+            manifest.extend(m)
+            for k in stats:
+                stats[k] += st[k]
+    finally:
+        shutil.rmtree(dest, ignore_errors=True)
+
+    return manifest, stats
+
+
+def stream_github(source: dict, tracker: ProgressTracker, source_key: str,
+                  pool: FairUploadPool | None = None) -> tuple[list[dict], dict]:
+    """
+    Streaming counterpart of download_github: blobless clone, then blobs go
+    from git's object store straight into Storage. Unchanged blobs (same
+    SHA-1 as the last manifest) are not fetched at all.
+    """
+    manifest, stats = stream_git_repo(source, tracker, source_key, TEMP_DIR,
+                                      upload=source_upload(source, source_key, pool))
+
+    # Release assets aren't in the tree; stage them as download_github does
+    if "lmsband" in source.get("bucket_path", "").lower():
+        rel_dir = os.path.join(TEMP_DIR, source["bucket_path"].replace("/", "_") + "_releases")
+        download_github_releases(source["url"], rel_dir)
+        assets = os.path.join(rel_dir, "_releases")
+        if os.path.isdir(assets):
+            rel_stats = upload_directory(get_client(), assets, f"{source['bucket_path']}/_releases",
+                                         progress_tracker=tracker, pool=pool,
+                                         weight=TIER_WEIGHT.get(source["tier"], 1))
+            for k in stats:
+                stats[k] += rel_stats[k]
+        shutil.rmtree(rel_dir, ignore_errors=True)
+
+    return manifest, stats
+
+
+STREAMERS = {
+    "github": stream_github,
+    "direct_download": stream_direct,
+    "zenodo": stream_zenodo,
+    "doj": stream_doj,
+    "kaggle": stream_kaggle,
+}
+
+
+def hoard_source(source_key: str, source: dict, client, tracker: ProgressTracker,
+                 stream: bool = False, upload_pool: FairUploadPool | None = None,
+                 download_slots: threading.Semaphore | None = None):
+    """
+    Download a single source and upload to Supabase Storage.
+    With stream=True, source types in STREAMERS go straight from HTTP to
+    Storage without staging in TEMP_DIR. Types that only have a streamer
+    (doj) always stream.
+
+    When several sources run at once, uploads go through the shared
+    upload_pool (weighted by tier) and the download/stream phase holds one
+    of the global download_slots. All errors stay inside this source.
+    """
+    if hf_parquet.prunes(source):
+        source_key, source = hf_parquet.pruned_variant(source_key, source)
+
     if tracker.is_source_complete(source_key):
         console.print(f"[dim]Skipping {source['name']} (already complete)[/dim]")
         return
 
     source_type = source["type"]
     downloader = DOWNLOADERS.get(source_type)
+    streamer = STREAMERS.get(source_type) if (stream or not downloader) else None
 
-    if not downloader:
+    if not downloader and not streamer:
         console.print(f"[yellow]Skipping {source['name']}: no downloader for type '{source_type}'[/yellow]")
-        console.print(f"[yellow]  (website scraping and DOJ/torrent downloads handled separately)[/yellow]")
+        console.print(f"[yellow]  (website scraping and DOJ torrent datasets handled separately)[/yellow]")
         return
 
+    # Probe before fetching: if the source changes mid-download, the stored
+    # fingerprint is the older one and the next refresh still picks it up
+    fresh = fingerprint(source)
+
     tracker.start_source(source_key)
+    live.start(source_key, source["bucket_path"],
+               temp_path=os.path.join(TEMP_DIR, source["bucket_path"].replace("/", "_")))
+    # Total size for the dashboard's remaining/ETA; not worth delaying the run for
+    threading.Thread(target=lambda: live.set_total(source_key, planner.estimate_source(source).get("bytes")),
+                     daemon=True).start()
     console.print(f"\n[bold green]{'=' * 60}[/bold green]")
     console.print(f"[bold green]Hoarding: {source['name']}[/bold green]")
     console.print(f"[bold green]{'=' * 60}[/bold green]")
     console.print(f"[dim]{source['description']}[/dim]\n")
 
     try:
+        if streamer:
+            with download_slots or nullcontext():
+                manifest, stats = streamer(source, tracker, source_key, pool=upload_pool)
+            upload_manifest(client, source_key, manifest, stats)
+            tracker.complete_source(source_key, stats)
+            if fresh:
+                tracker.set_fingerprint(source_key, fresh)
+            live.finish(source_key, "complete")
+            console.print(f"[green]Done: {stats['uploaded']} files streamed, "
+                           f"{stats['skipped']} skipped, {stats['failed']} failed "
+                           f"({stats['bytes'] / 1024 / 1024:.1f}MB)[/green]")
+            return
+
         # Download to temp
-        local_path = downloader(source, TEMP_DIR)
+        with download_slots or nullcontext():
+            local_path = downloader(source, TEMP_DIR)
 
         # Upload to Supabase
         console.print(f"[cyan]Uploading to bucket: raw-archive/{source['bucket_path']}...[/cyan]")
@@ -238,9 +507,14 @@ def hoard_source(source_key: str, source: dict, client, tracker: ProgressTracker
             skip_patterns=source.get("skip_patterns", []),
             progress_tracker=tracker,
             source_key=source_key,
+            pool=upload_pool,
+            weight=TIER_WEIGHT.get(source["tier"], 1),
         )
 
         tracker.complete_source(source_key, stats)
+        if fresh:
+            tracker.set_fingerprint(source_key, fresh)
+        live.finish(source_key, "complete")
         console.print(f"[green]Done: {stats['uploaded']} files uploaded, "
                        f"{stats['skipped']} skipped, {stats['failed']} failed "
                        f"({stats['bytes'] / 1024 / 1024:.1f}MB)[/green]")
@@ -252,6 +526,7 @@ def hoard_source(source_key: str, source: dict, client, tracker: ProgressTracker
 
     except Exception as e:
         tracker.fail_source(source_key, str(e))
+        live.finish(source_key, "failed")
         console.print(f"[red]Failed: {source['name']}: {e}[/red]")
 
 
@@ -261,41 +536,214 @@ def cli():
     pass
 
 
+def hoard_many(items: list[tuple[str, dict]], client, tracker: ProgressTracker,
+               stream: bool = False, parallel: int = 1, downloads: int | None = None):
+    """
+    Hoard several sources. With parallel > 1, up to `parallel` sources run
+    at once, sharing one FairUploadPool and `downloads` download slots.
+    """
+    if parallel <= 1:
+        for key, src in items:
+            hoard_source(key, src, client, tracker, stream=stream)
+        return
+
+    pool = FairUploadPool(CONCURRENT_UPLOADS)
+    slots = threading.BoundedSemaphore(downloads or parallel)
+    console.print(f"[bold]Running {parallel} sources at a time, {downloads or parallel} download "
+                  f"slots, {CONCURRENT_UPLOADS} shared upload workers[/bold]")
+    try:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            futures = [executor.submit(hoard_source, key, src, client, tracker, stream, pool, slots)
+                       for key, src in items]
+            # hoard_source contains its own errors; anything else is a bug to surface
+            for future in futures:
+                future.result()
+    finally:
+        pool.shutdown()
+
+
 @cli.command()
 @click.option("--source", "-s", help="Source key to download (e.g., 's0fskr1p')")
 @click.option("--tier", "-t", type=int, help="Download all sources in a tier (1-4)")
 @click.option("--all", "all_sources", is_flag=True, help="Download everything")
-def download(source, tier, all_sources):
+@click.option("--stream", is_flag=True,
+              help="Stream GitHub/direct/Zenodo/Kaggle sources straight into Storage (no checkout or extracted temp copy)")
+@click.option("--parallel", "-p", type=int, default=1, show_default=True,
+              help="Sources to hoard at once (shared upload pool)")
+@click.option("--downloads", type=int, help="Global concurrent download limit (default: --parallel)")
+@click.option("--prune-columns", is_flag=True,
+              help="Re-encode HF parquet without the source's drop_columns/row_filter (default: mirror as-is)")
+def download(source, tier, all_sources, stream, parallel, downloads, prune_columns):
     """Download sources and upload to Supabase Storage."""
+    hf_parquet.PRUNE = prune_columns
     client = get_client()
     ensure_bucket(client)
     tracker = ProgressTracker(TEMP_DIR)
 
     os.makedirs(TEMP_DIR, exist_ok=True)
+    live.configure(TEMP_DIR)
 
     if source:
         if source not in SOURCES:
             console.print(f"[red]Unknown source: {source}[/red]")
             console.print(f"Available: {', '.join(sorted(SOURCES.keys()))}")
             return
-        hoard_source(source, SOURCES[source], client, tracker)
+        hoard_source(source, SOURCES[source], client, tracker, stream=stream)
 
     elif tier:
         tier_sources = {k: v for k, v in SOURCES.items() if v["tier"] == tier}
         console.print(f"[bold]Downloading {len(tier_sources)} Tier {tier} sources...[/bold]")
-        for key, src in tier_sources.items():
-            hoard_source(key, src, client, tracker)
+        hoard_many(list(tier_sources.items()), client, tracker, stream, parallel, downloads)
 
     elif all_sources:
         console.print(f"[bold]Downloading all {len(SOURCES)} sources...[/bold]")
         # Process in tier order (highest value first)
         sorted_sources = sorted(SOURCES.items(), key=lambda x: x[1]["tier"])
-        for key, src in sorted_sources:
-            hoard_source(key, src, client, tracker)
+        hoard_many(sorted_sources, client, tracker, stream, parallel, downloads)
     else:
         console.print("[yellow]Specify --source, --tier, or --all[/yellow]")
 
 
+@cli.command()
+@click.option("--source", "-s", help="Source key to refresh")
+@click.option("--tier", "-t", type=int, help="Refresh all sources in a tier (1-4)")
+@click.option("--all", "all_sources", is_flag=True, help="Refresh everything")
+@click.option("--stream", is_flag=True, help="Use streaming mode for re-fetches")
+def refresh(source, tier, all_sources, stream):
+    """Re-hoard only sources whose remote fingerprint changed."""
+    if source:
+        selected = {source: SOURCES[source]} if source in SOURCES else {}
+    elif tier:
+        selected = {k: v for k, v in SOURCES.items() if v["tier"] == tier}
+    elif all_sources:
+        selected = SOURCES
+    else:
+        console.print("[yellow]Specify --source, --tier, or --all[/yellow]")
+        return
+
+    tracker = ProgressTracker(TEMP_DIR)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        current = dict(zip(selected, executor.map(fingerprint, selected.values())))
+
+    table = Table(title="Source Freshness")
+    table.add_column("Source", style="cyan")
+    table.add_column("Stored")
+    table.add_column("Remote")
+    table.add_column("Action", style="bold")
+
+    changed = []
+    for key, src in sorted(selected.items(), key=lambda x: x[1]["tier"]):
+        stored, remote = tracker.get_fingerprint(key), current[key]
+        if remote is None:
+            action = "[dim]no probe[/dim]"
+        elif remote == stored and tracker.is_source_complete(key):
+            action = "[green]unchanged[/green]"
+        else:
+            action = "[yellow]re-fetch[/yellow]"
+            changed.append(key)
+        table.add_row(key, (stored or "-")[:20], (remote or "-")[:20], action)
+    console.print(table)
+
+    client = get_client()
+    ensure_bucket(client)
+    live.configure(TEMP_DIR)
+    for key in changed:
+        tracker.reset_source(key, SOURCES[key]["bucket_path"])
+        clear_staging(SOURCES[key]["bucket_path"])
+        hoard_source(key, SOURCES[key], client, tracker, stream=stream)
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+
+def _fmt_duration(seconds: float) -> str:
+    h, rem = divmod(int(seconds), 3600)
+    return f"{h}h{rem // 60:02d}m" if h else f"{rem // 60}m{rem % 60:02d}s"
+
+
+@cli.command()
+@click.option("--source", "-s", help="Plan a single source")
+@click.option("--tier", "-t", type=int, help="Plan all sources in a tier (1-4)")
+@click.option("--all", "all_sources", is_flag=True, help="Plan everything (the default)")
+@click.option("--stream", is_flag=True, help="Assume streaming mode (less temp disk)")
+@click.option("--prune-columns", is_flag=True, help="Assume download --prune-columns")
+def plan(source, tier, all_sources, stream, prune_columns):
+    """Estimate sizes, request counts, duration and temp disk before downloading."""
+    hf_parquet.PRUNE = prune_columns
+    if source:
+        if source not in SOURCES:
+            raise click.BadParameter(
+                f"unknown source {source!r} (available: {', '.join(sorted(SOURCES))})",
+                param_hint="'--source'")
+        selected = {source: SOURCES[source]}
+    elif tier:
+        selected = {k: v for k, v in SOURCES.items() if v["tier"] == tier}
+    else:
+        selected = SOURCES
+
+    console.print(f"[cyan]Gathering metadata for {len(selected)} sources...[/cyan]")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        estimates = dict(zip(selected, executor.map(planner.estimate_source, selected.values())))
+
+    tracker = ProgressTracker(TEMP_DIR if os.path.exists(TEMP_DIR) else ".")
+    rates = planner.measured_throughput(tracker.data, SOURCES)
+
+    table = Table(title=f"Hoarding Plan{' (streaming)' if stream else ''}")
+    table.add_column("Source", style="cyan")
+    table.add_column("Tier", justify="center")
+    table.add_column("Size", justify="right")
+    table.add_column("Files", justify="right")
+    table.add_column("Requests", justify="right")
+    table.add_column("ETA", justify="right")
+    table.add_column("Temp peak", justify="right")
+
+    total_bytes = total_seconds = peak_disk = 0
+    ranked = []
+    for key, src in sorted(selected.items(), key=lambda x: (x[1]["tier"], x[0])):
+        est = estimates[key]
+        if "error" in est:
+            table.add_row(key, str(src["tier"]), "[red]?[/red]", "-", "-", "-",
+                          f"[dim]{est['error'][:40]}[/dim]")
+            continue
+
+        rate = rates.get(src["type"], rates["_overall"])
+        seconds = est["bytes"] / rate
+        disk = planner.temp_disk_need(src, est["bytes"], stream)
+        total_bytes += est["bytes"]
+        total_seconds += seconds
+        peak_disk = max(peak_disk, disk)  # sources run one at a time, temp is cleaned between
+        ranked.append((planner.value_per_gb(src, est["bytes"]), key))
+
+        table.add_row(
+            key, str(src["tier"]),
+            _fmt_bytes(est["bytes"]) + ("" if est["exact"] else "~"),
+            str(est["files"]) if est["files"] is not None else "?",
+            f"{est['requests']:,}",
+            _fmt_duration(seconds),
+            _fmt_bytes(disk) if disk else "-",
+        )
+
+    console.print(table)
+    measured = "measured" if len(rates) > 1 else "default"
+    console.print(f"Total: [bold]{_fmt_bytes(total_bytes)}[/bold], "
+                  f"ETA [bold]{_fmt_duration(total_seconds)}[/bold] "
+                  f"at {rates['_overall'] / 1024 / 1024:.1f}MB/s ({measured}), "
+                  f"peak temp disk [bold]{_fmt_bytes(peak_disk)}[/bold]")
+
+    free = shutil.disk_usage(TEMP_DIR if os.path.exists(TEMP_DIR) else ".").free
+    if peak_disk > free:
+        console.print(f"[red]Peak temp need exceeds free space on {TEMP_DIR} "
+                      f"({_fmt_bytes(free)}); consider --stream[/red]")
+
+    ranked.sort(reverse=True)
+    console.print("Suggested order (value per GB): " + " > ".join(k for _, k in ranked))
+
+
 @cli.command()
 def status():
     """Show download progress."""
@@ -325,6 +773,66 @@ def status():
     console.print(table)
 
 
+def _live_table() -> Table:
+    state_dir = TEMP_DIR if os.path.exists(TEMP_DIR) else "."
+    entries = live.read_state(state_dir)
+    now = time.time()
+
+    table = Table(title=f"Live Hoarder Jobs ({time.strftime('%H:%M:%S')})")
+    table.add_column("Source", style="cyan")
+    table.add_column("Status", style="bold")
+    table.add_column("Done", justify="right")
+    table.add_column("Remaining", justify="right")
+    table.add_column("MB/s", justify="right")
+    table.add_column("Files/s", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("ETA", justify="right")
+    table.add_column("Temp disk", justify="right")
+    table.add_column("Updated", justify="right", style="dim")
+
+    order = {"running": 0, "died": 1, "failed": 2, "complete": 3}
+    for key, e in sorted(entries.items(), key=lambda kv: (order.get(kv[1]["status"], 9), kv[0])):
+        color = {"running": "yellow", "complete": "green", "failed": "red", "died": "red"}.get(e["status"], "white")
+        running = e["status"] == "running"
+        err = f"{e['errors']}" + (f" ({e['error_rate']:.0%})" if running and e["error_rate"] else "")
+        table.add_row(
+            key,
+            f"[{color}]{e['status']}[/{color}]",
+            f"{_fmt_bytes(e['bytes'])} / {e['files']:,} files",
+            _fmt_bytes(e["remaining_bytes"]) if e.get("remaining_bytes") is not None else "?",
+            f"{e['bytes_per_sec'] / 1024 / 1024:.1f}" if running else "-",
+            f"{e['files_per_sec']:.1f}" if running else "-",
+            err,
+            _fmt_duration(e["eta_seconds"]) if running and e.get("eta_seconds") else "-",
+            _fmt_bytes(e["temp_bytes"]) if e.get("temp_bytes") else "-",
+            f"{now - e['updated_at']:.0f}s ago",
+        )
+
+    if os.path.exists(TEMP_DIR):
+        disk = shutil.disk_usage(TEMP_DIR)
+        table.caption = f"{TEMP_DIR}: {_fmt_bytes(disk.used)} used, {_fmt_bytes(disk.free)} free"
+    if not entries:
+        table.caption = (table.caption or "") + "  (no live jobs reporting)"
+    return table
+
+
+@cli.command()
+@click.option("--interval", "-n", type=float, default=2, show_default=True, help="Refresh interval (seconds)")
+@click.option("--once", is_flag=True, help="Print one snapshot and exit")
+def watch(interval, once):
+    """Live MB/s, files/s, errors, ETA and temp disk for running jobs."""
+    if once:
+        console.print(_live_table())
+        return
+    with Live(_live_table(), console=console, refresh_per_second=4) as view:
+        try:
+            while True:
+                time.sleep(interval)
+                view.update(_live_table())
+        except KeyboardInterrupt:
+            pass
+
+
 @cli.command()
 @click.option("--source", "-s", help="Verify a specific source")
 @click.option("--all", "all_sources", is_flag=True, help="Verify all sources")
@@ -0,0 +1,234 @@
+"""
+Pluggable HTML parsing for the scrapers' fallback paths.
+
+parse() builds a document with the fastest parser installed --
+selectolax (lexbor), then lxml, then BeautifulSoup -- behind the small
+BeautifulSoup-like API the fallbacks use: find_all(tag, attr, pattern),
+node.get(), node.find_parent() and node.get_text(). Set HTML_BACKEND to
+force one.
+
+json_ld_blocks() doesn't build a DOM at all: it scans the page for
+<script> start tags, checks their type attribute, and slices out the
+bodies of the application/ld+json ones.
+
+Benchmark on the saved debug pages:
+    python html_backend.py [scraped_html/debug]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_ATTR_RE = re.compile(r"""type\s*=\s*["']?application/ld\+json""", re.IGNORECASE)
+
+
+def json_ld_blocks(html: str) -> list[str]:
+    """Raw bodies of every <script type="application/ld+json"> on the page."""
+    blocks = []
+    lower = html.lower()
+    pos = 0
+    while True:
+        start = lower.find("<script", pos)
+        if start < 0:
+            break
+        tag_end = lower.find(">", start)
+        if tag_end < 0:
+            break
+        close = lower.find("</script", tag_end)
+        if close < 0:
+            break
+        if SCRIPT_ATTR_RE.search(html, start, tag_end):
+            blocks.append(html[tag_end + 1:close])
+        pos = close + 8
+    return blocks
+
+
+def json_ld(html: str) -> list:
+    """Decoded JSON-LD objects from the page's ld+json script tags."""
+    results = []
+    for block in json_ld_blocks(html):
+        try:
+            results.append(json.loads(block))
+        except json.JSONDecodeError:
+            pass
+    return results
+
+
+# ─── BACKENDS ─────────────────────────────────────────────────────────────────
+
+class _SelectolaxNode:
+    def __init__(self, node):
+        self.node = node
+
+    def get(self, attr, default=None):
+        value = self.node.attributes.get(attr)
+        return default if value is None else value
+
+    def find_parent(self, tag, attr=None):
+        node = self.node.parent
+        while node is not None:
+            if node.tag == tag and (attr is None or node.attributes.get(attr) is not None):
+                return _SelectolaxNode(node)
+            node = node.parent
+        return None
+
+    def get_text(self, separator="", strip=False):
+        return self.node.text(deep=True, separator=separator, strip=strip)
+
+
+class _SelectolaxDoc:
+    name = "selectolax"
+
+    def __init__(self, html):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as Parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as Parser
+        self.tree = Parser(html)
+
+    def find_all(self, tag, attr=None, pattern=None):
+        selector = f"{tag}[{attr}]" if attr else tag
+        rx = re.compile(pattern) if pattern else None
+        return [_SelectolaxNode(n) for n in self.tree.css(selector)
+                if rx is None or rx.search(n.attributes.get(attr) or "")]
+
+
+class _LxmlNode:
+    def __init__(self, el):
+        self.el = el
+
+    def get(self, attr, default=None):
+        return self.el.get(attr, default)
+
+    def find_parent(self, tag, attr=None):
+        el = self.el.getparent()
+        while el is not None:
+            if el.tag == tag and (attr is None or el.get(attr) is not None):
+                return _LxmlNode(el)
+            el = el.getparent()
+        return None
+
+    def get_text(self, separator="", strip=False):
+        parts = self.el.itertext()
+        if strip:
+            parts = (p.strip() for p in parts)
+            parts = [p for p in parts if p]
+        return separator.join(parts)
+
+
+class _LxmlDoc:
+    name = "lxml"
+
+    def __init__(self, html):
+        import lxml.html
+        self.root = lxml.html.fromstring(html)
+
+    def find_all(self, tag, attr=None, pattern=None):
+        rx = re.compile(pattern) if pattern else None
+        return [_LxmlNode(el) for el in self.root.iter(tag)
+                if attr is None or (el.get(attr) is not None
+                                    and (rx is None or rx.search(el.get(attr))))]
+
+
+class _SoupNode:
+    def __init__(self, tag):
+        self.tag = tag
+
+    def get(self, attr, default=None):
+        value = self.tag.get(attr, default)
+        # BeautifulSoup returns multi-valued attributes (class) as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+    def find_parent(self, tag, attr=None):
+        parent = self.tag.find_parent(tag, attrs={attr: True} if attr else {})
+        return _SoupNode(parent) if parent is not None else None
+
+    def get_text(self, separator="", strip=False):
+        return self.tag.get_text(separator=separator, strip=strip)
+
+
+class _SoupDoc:
+    name = "bs4"
+
+    def __init__(self, html):
+        from bs4 import BeautifulSoup
+        self.soup = BeautifulSoup(html, "lxml" if _available("lxml") else "html.parser")
+
+    def find_all(self, tag, attr=None, pattern=None):
+        attrs = {attr: re.compile(pattern) if pattern else True} if attr else {}
+        return [_SoupNode(t) for t in self.soup.find_all(tag, attrs=attrs)]
+
+
+BACKENDS = {"selectolax": _SelectolaxDoc, "lxml": _LxmlDoc, "bs4": _SoupDoc}
+
+
+def _available(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends() -> list[str]:
+    return [name for name, module in (("selectolax", "selectolax"), ("lxml", "lxml"), ("bs4", "bs4"))
+            if _available(module)]
+
+
+BACKEND = os.environ.get("HTML_BACKEND") or (available_backends() or ["bs4"])[0]
+
+
+def parse(html: str, backend: str | None = None):
+    """Parse a page with the chosen (default: fastest installed) backend."""
+    return BACKENDS[backend or BACKEND](html)
+
+
+# ─── BENCHMARK ────────────────────────────────────────────────────────────────
+
+def benchmark(debug_dir: Path, repeat: int = 5):
+    """Time JSON-LD extraction and the fallback queries on saved pages."""
+    pages = [(p.name, p.read_text()) for p in sorted(debug_dir.glob("*.html"))]
+    if not pages:
+        print(f"No *.html in {debug_dir} (run scrape_html.py once to save debug pages)")
+        return
+    total_kb = sum(len(h) for _, h in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:,.0f} KB, best of {repeat}\n")
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            for _, html in pages:
+                fn(html)
+            times.append(time.perf_counter() - t)
+        return min(times) * 1000
+
+    from bs4 import BeautifulSoup
+    baseline = best(lambda h: [s.string for s in BeautifulSoup(h, "html.parser")
+                               .find_all("script", type="application/ld+json")])
+    print(f"{'JSON-LD, BeautifulSoup html.parser':<40}{baseline:>10.1f} ms")
+    scan = best(json_ld_blocks)
+    print(f"{'JSON-LD, script-tag scan':<40}{scan:>10.1f} ms  ({baseline / scan:.0f}x)")
+    print()
+
+    def fallback_queries(backend):
+        def run(html):
+            doc = parse(html, backend)
+            for a in doc.find_all("a", "href", r"/(names|emails|photos)/"):
+                parent = a.find_parent("div", "class")
+                if parent:
+                    parent.get_text(separator="|", strip=True)
+            doc.find_all("img", "src", r"supabase\.co/storage")
+        return run
+
+    for backend in available_backends():
+        ms = best(fallback_queries(backend))
+        print(f"{'Fallback queries, ' + backend:<40}{ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    default = Path(os.environ.get("OUTPUT_DIR", "scraped_html")) / "debug"
+    benchmark(Path(sys.argv[1]) if len(sys.argv) > 1 else default)
@@ -0,0 +1,223 @@
+"""
+On-disk HTTP response cache shared by the scrapers, with offline replay.
+
+The cache is an httpx transport, so it slots under any client the
+scrapers already use. It sits in front of the rate limiter, which means
+cache hits cost no request slot and no sleep. GET responses with status
+200 are stored under a key derived from the method and the URL (query
+parameters sorted):
+
+    <SCRAPE_CACHE_DIR>/entries/ab/abcd....json   url, status, headers, fetched_at, body hash
+    <SCRAPE_CACHE_DIR>/blobs/12/1234....gz       gzip'd body, named by its SHA-256
+
+Bodies are content-addressed, so identical pages (an unchanged listing
+fetched under two URLs) are stored once. Entries older than their TTL
+are revalidated with If-None-Match when the server sent an ETag.
+
+The cache is off unless a scraper is run with --cache (fetch, store and
+serve fresh entries) or --replay, so a plain run never serves stale
+pages. --replay serves everything from the cache and never touches the
+network. A URL that was never cached comes back as a 404, which every
+scraper already treats as "no data here", so a replay run finishes
+instead of retrying.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+# Attribute access, not `from scrape_http import log`: scrape_http imports
+# this module, so either may be the one that is still loading
+import scrape_http
+
+CACHE_DIR = Path(os.environ.get("SCRAPE_CACHE_DIR", ".scrape-cache"))
+DEFAULT_TTL = int(os.environ.get("SCRAPE_CACHE_TTL", str(24 * 3600)))
+KEEP_HEADERS = ("content-type", "content-encoding", "etag", "last-modified")
+
+_local = threading.local()
+
+
+def canonical_url(url: httpx.URL) -> str:
+    query = sorted(httpx.QueryParams(url.query).multi_items())
+    base = str(url.copy_with(query=None, fragment=None))
+    return base + ("?" + str(httpx.QueryParams(query)) if query else "")
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+class ResponseCache:
+    """
+    Compressed, content-addressed store of GET responses.
+    `rules` is a list of (url regex, ttl seconds); the first match wins.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, ttl: int = DEFAULT_TTL,
+                 rules: list[tuple[str, int]] | None = None,
+                 replay: bool = False, enabled: bool = False):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.rules = [(re.compile(p), t) for p, t in (rules or [])]
+        self.replay = replay
+        self.enabled = enabled or replay
+        self.hits = self.misses = 0
+
+    def ttl_for(self, url: str) -> int:
+        for rx, ttl in self.rules:
+            if rx.search(url):
+                return ttl
+        return self.ttl
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / "entries" / key[:2] / f"{key}.json"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.gz"
+
+    def lookup(self, key: str) -> dict | None:
+        path = self._entry_path(key)
+        try:
+            entry = json.loads(path.read_text())
+            entry["body"] = gzip.decompress(self._blob_path(entry["sha256"]).read_bytes())
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry
+
+    def store(self, key: str, url: str, resp: httpx.Response, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            _atomic_write(blob, gzip.compress(body, compresslevel=6))
+        entry = {
+            "url": url,
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() in KEEP_HEADERS},
+            "fetched_at": time.time(),
+            "sha256": digest,
+        }
+        _atomic_write(self._entry_path(key), json.dumps(entry).encode())
+
+    def touch(self, key: str, entry: dict):
+        """Mark a revalidated (304) entry fresh again."""
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta["fetched_at"] = time.time()
+        _atomic_write(self._entry_path(key), json.dumps(meta).encode())
+
+
+class CachingTransport(httpx.BaseTransport):
+    """httpx transport that answers GETs from a ResponseCache when it can."""
+
+    def __init__(self, inner: httpx.BaseTransport, cache: ResponseCache):
+        self.inner = inner
+        self.cache = cache
+
+    @staticmethod
+    def _response(entry: dict, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(entry["status"], headers=entry["headers"],
+                              content=entry["body"], request=request,
+                              extensions={"from_cache": True})
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        cache = self.cache
+        if request.method != "GET" or not cache.enabled:
+            _local.from_cache = False
+            return self.inner.handle_request(request)
+
+        url = canonical_url(request.url)
+        key = hashlib.sha256(f"GET {url}".encode()).hexdigest()
+        entry = cache.lookup(key)
+        fresh = entry is not None and time.time() - entry["fetched_at"] < cache.ttl_for(url)
+
+        if entry is not None and (fresh or cache.replay):
+            cache.hits += 1
+            _local.from_cache = True
+            return self._response(entry, request)
+        if cache.replay:
+            cache.misses += 1
+            _local.from_cache = True
+            scrape_http.log(f"  [replay] not cached: {url}")
+            return httpx.Response(404, request=request, extensions={"from_cache": True})
+
+        cache.misses += 1
+        _local.from_cache = False
+        etag = entry and entry["headers"].get("etag")
+        if etag:
+            request.headers["If-None-Match"] = etag
+
+        resp = self.inner.handle_request(request)
+        if resp.status_code == 304 and entry is not None:
+            resp.close()
+            cache.touch(key, entry)
+            return self._response(entry, request)
+        if resp.status_code != 200:
+            return resp
+
+        # Raw (still content-encoded) bytes; the client decodes them as usual
+        body = b"".join(resp.stream)
+        resp.close()
+        cache.store(key, url, resp, body)
+        return httpx.Response(resp.status_code, headers=resp.headers, content=body,
+                              request=request, extensions=resp.extensions)
+
+    def close(self):
+        self.inner.close()
+
+
+# ─── SHARED CONFIGURATION ─────────────────────────────────────────────────────
+
+_cache = ResponseCache()
+
+
+def configure(replay: bool = False, enabled: bool = False,
+              rules: list[tuple[str, int]] | None = None) -> ResponseCache:
+    """Set up the process-wide cache (call before creating clients)."""
+    global _cache
+    _cache = ResponseCache(replay=replay, enabled=enabled, rules=rules)
+    if replay:
+        scrape_http.log(f"Replay mode: serving from {_cache.root}, no network requests")
+    return _cache
+
+
+def cache() -> ResponseCache:
+    return _cache
+
+
+def parse_flags(argv: list[str]) -> list[str]:
+    """Strip --replay / --cache from argv, configure, return the rest."""
+    configure(replay="--replay" in argv, enabled="--cache" in argv)
+    return [a for a in argv if a not in ("--replay", "--cache")]
+
+
+def transport(inner: httpx.BaseTransport | None = None) -> CachingTransport:
+    return CachingTransport(inner or httpx.HTTPTransport(), _cache)
+
+
+def client(**kwargs) -> httpx.Client:
+    """An httpx.Client that goes through the shared cache."""
+    return httpx.Client(transport=transport(), **kwargs)
+
+
+def from_cache() -> bool:
+    """Whether this thread's last request was answered by the cache."""
+    return getattr(_local, "from_cache", False)
+
+
+def pace(delay: float):
+    """Rate-limit sleep that is skipped when the last response was cached."""
+    if not from_cache():
+        time.sleep(delay)
+
+
+def summary() -> str:
+    return f"cache: {_cache.hits} hits, {_cache.misses} misses ({_cache.root})"
@@ -0,0 +1,159 @@
+"""
+Change detection for re-scraping paginated listings and API endpoints.
+
+Every crawl (full or incremental) keeps a per-endpoint index beside its
+output, <name>.seen.json, mapping each record's id (order UUID, photo
+URL, email detail URL, API id) to a short hash of its content.
+
+With --incremental a scraper compares each page against that index,
+writes only new or changed records to <name>.delta.jsonl (tagged with
+"_change": "new" | "changed"), merges them into <name>.jsonl as it goes
+(merge_into_store), and stops paginating after STOP_AFTER_UNCHANGED
+pages in a row with nothing new. The delta is this run's changes; the
+main file stays the complete copy, so nothing is lost when the next
+run replaces the delta. The listings are
+newest-first, so a nightly refresh reads a handful of pages instead of
+the whole crawl. Without an index yet, an incremental run is a full one.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from scrape_http import log
+
+STOP_AFTER_UNCHANGED = int(os.environ.get("STOP_AFTER_UNCHANGED", "3"))
+
+ENABLED = False
+
+
+def parse_flags(argv: list[str]) -> list[str]:
+    """Strip --incremental from argv, enable it if present, return the rest."""
+    global ENABLED
+    ENABLED = "--incremental" in argv
+    if ENABLED:
+        log(f"Incremental mode: stop after {STOP_AFTER_UNCHANGED} unchanged pages, write deltas only")
+    return [a for a in argv if a != "--incremental"]
+
+
+def content_hash(record: dict) -> str:
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def index_path(output_path: Path) -> Path:
+    return output_path.with_suffix(".seen.json")
+
+
+def delta_path(output_path: Path) -> Path:
+    return output_path.with_suffix(".delta.jsonl")
+
+
+class SeenIndex:
+    """
+    id → content hash for one endpoint. `key_fields` are tried in order
+    for a record's id; a record with none of them is keyed by its hash.
+    """
+
+    def __init__(self, output_path: Path, key_fields: tuple[str, ...] = ("id",)):
+        self.path = index_path(output_path)
+        self.key_fields = key_fields
+        self.hashes: dict[str, str] = {}
+        if self.path.exists():
+            self.hashes = json.loads(self.path.read_text())
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def key(self, record: dict) -> str:
+        for field in self.key_fields:
+            value = record.get(field)
+            if value:
+                return str(value)
+        return content_hash(record)
+
+    def classify(self, record: dict) -> str | None:
+        """'new', 'changed' or None (unchanged), recording the current hash."""
+        key, digest = self.key(record), content_hash(record)
+        previous = self.hashes.get(key)
+        if previous == digest:
+            return None
+        self.hashes[key] = digest
+        self.dirty = True
+        return "new" if previous is None else "changed"
+
+    def changes(self, records: list[dict]) -> list[dict]:
+        """The new/changed records of one page, tagged with _change."""
+        out = []
+        for record in records:
+            change = self.classify(record)
+            if change:
+                out.append({**record, "_change": change})
+        return out
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.hashes, separators=(",", ":")))
+        tmp.replace(self.path)
+        self.dirty = False
+
+
+class UnchangedRun:
+    """Counts consecutive pages without changes; says when to stop."""
+
+    def __init__(self, limit: int = STOP_AFTER_UNCHANGED):
+        self.limit = limit
+        self.count = 0
+
+    def page(self, changed: int) -> bool:
+        """Record one page; True once `limit` pages in a row had no changes."""
+        self.count = 0 if changed else self.count + 1
+        return self.count >= self.limit
+
+
+def strip_change(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k != "_change"}
+
+
+def replay(output_path: Path, store_path: Path | None, seen: SeenIndex) -> int:
+    """
+    Catch the index (and, for a delta, the store) up with records already
+    written to an interrupted crawl's output. Scrapers merge a page only
+    after its checkpoint is saved, so the last page may be missing from
+    both. Records the index already has are skipped and the rest replace
+    their line by id, so replaying twice is harmless. Returns the count.
+    """
+    with open(output_path) as f:
+        records = [strip_change(json.loads(line)) for line in f if line.strip()]
+    pending = seen.changes(records)
+    if store_path is not None and pending:
+        merge_into_store(store_path, [{**r, "_change": "changed"} for r in pending], seen)
+    seen.save()
+    return len(pending)
+
+
+def merge_into_store(store_path: Path, changes: list[dict], seen: SeenIndex):
+    """
+    Merge records tagged by SeenIndex.changes() into a JSONL store that
+    holds one line per id: changed records replace their old line, new
+    ones are appended. The file is only rewritten when a record changed.
+    """
+    changed = {seen.key(r): r for r in changes if r["_change"] == "changed"}
+    new = [r for r in changes if r["_change"] != "changed"]
+    if not changed or not store_path.exists():
+        new += changed.values()
+        with open(store_path, "a") as out:
+            out.writelines(json.dumps(strip_change(r)) + "\n" for r in new)
+        return
+
+    tmp = store_path.with_suffix(".tmp")
+    with open(store_path) as src, open(tmp, "w") as out:
+        for line in src:
+            replacement = changed.pop(seen.key(json.loads(line)), None)
+            out.write(json.dumps(strip_change(replacement)) + "\n" if replacement else line)
+        # Anything left wasn't in the store after all
+        out.writelines(json.dumps(strip_change(r)) + "\n" for r in [*changed.values(), *new])
+    tmp.replace(store_path)
@@ -0,0 +1,218 @@
+"""
+Live per-source throughput for running hoarder jobs.
+
+Workers count bytes, files and errors here as they upload (the hooks sit
+in uploader.py, so every download path is covered). A background thread
+folds the counters into rolling rates and merges them into a small JSON
+state file next to the progress file every LIVE_INTERVAL seconds, under
+an fcntl lock so several hoarder processes can share it. `hoarder.py
+watch` renders that file, so it works from any shell on the box without
+attaching to the workers.
+
+Uploads are attributed to a source by the longest registered bucket_path
+prefix of the remote path; members staged under STAGING_PREFIX (see
+archive_stream.py) count for the path they will be promoted to. Until
+configure() is called everything here
+is a no-op, so scripts that reuse the uploader don't write state files.
+"""
+
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+LIVE_FILE = "hoarder-live.json"
+# Bucket folder for uploads held back until their archive verifies
+STAGING_PREFIX = "_staging"
+LIVE_INTERVAL = float(os.environ.get("HOARDER_LIVE_INTERVAL", "2"))
+# Rolling-rate window
+LIVE_WINDOW = 60
+# Walking a temp tree is slow for big checkouts, so measure it less often
+DISK_INTERVAL = 30
+# Finished sources stay on the dashboard this long
+KEEP_FINISHED = 3600
+
+_lock = threading.Lock()
+_path: Path | None = None
+_sources: dict[str, dict] = {}
+_writer: threading.Thread | None = None
+
+
+def configure(state_dir: str):
+    """Start publishing live state to <state_dir>/hoarder-live.json."""
+    global _path, _writer
+    _path = Path(state_dir) / LIVE_FILE
+    if _writer is None:
+        _writer = threading.Thread(target=_write_loop, daemon=True, name="hoarder-live")
+        _writer.start()
+
+
+def start(source_key: str, bucket_path: str, temp_path: str | None = None,
+          total_bytes: int | None = None):
+    if _path is None:
+        return
+    with _lock:
+        _sources[source_key] = {
+            "bucket_path": bucket_path.rstrip("/") + "/",
+            "temp_path": temp_path,
+            "status": "running",
+            "started_at": time.time(),
+            "total_bytes": total_bytes,
+            "bytes": 0,
+            "files": 0,
+            "errors": 0,
+            "temp_bytes": 0,
+            "_samples": deque(),
+            "_disk_at": 0.0,
+        }
+
+
+def set_total(source_key: str, total_bytes: int | None):
+    with _lock:
+        if source_key in _sources and total_bytes:
+            _sources[source_key]["total_bytes"] = total_bytes
+
+
+def finish(source_key: str, status: str):
+    if _path is None:
+        return
+    with _lock:
+        if source_key in _sources:
+            _sources[source_key]["status"] = status
+            _sources[source_key]["finished_at"] = time.time()
+    try:
+        _flush()
+    except OSError:
+        pass
+
+
+def _match(remote_path: str) -> dict | None:
+    remote_path = remote_path.removeprefix(f"{STAGING_PREFIX}/")
+    best = None
+    for info in _sources.values():
+        if info["status"] == "running" and remote_path.startswith(info["bucket_path"]):
+            if best is None or len(info["bucket_path"]) > len(best["bucket_path"]):
+                best = info
+    return best
+
+
+def add_bytes(remote_path: str, n: int):
+    """Count bytes as they go out (called per chunk for streamed uploads)."""
+    if _path is None:
+        return
+    with _lock:
+        info = _match(remote_path)
+        if info:
+            info["bytes"] += n
+
+
+def file_done(remote_path: str, ok: bool, nbytes: int = 0):
+    """Count a finished file; nbytes for uploads that weren't counted per chunk."""
+    if _path is None:
+        return
+    with _lock:
+        info = _match(remote_path)
+        if info:
+            info["files" if ok else "errors"] += 1
+            if ok:
+                info["bytes"] += nbytes
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _snapshot(info: dict, now: float) -> dict:
+    """Public view of one source with rolling rates and ETA."""
+    samples = info["_samples"]
+    samples.append((now, info["bytes"], info["files"], info["errors"]))
+    while samples and now - samples[0][0] > LIVE_WINDOW:
+        samples.popleft()
+    t0, b0, f0, e0 = samples[0]
+    span = now - t0
+
+    if info["temp_path"] and now - info["_disk_at"] >= DISK_INTERVAL:
+        info["temp_bytes"] = _dir_size(info["temp_path"]) if os.path.exists(info["temp_path"]) else 0
+        info["_disk_at"] = now
+
+    bps = (info["bytes"] - b0) / span if span else 0.0
+    done = info["files"] - f0
+    errs = info["errors"] - e0
+    remaining = max(info["total_bytes"] - info["bytes"], 0) if info["total_bytes"] else None
+    return {
+        **{k: v for k, v in info.items() if not k.startswith("_")},
+        "pid": os.getpid(),
+        "host": socket.gethostname(),
+        "updated_at": now,
+        "bytes_per_sec": bps,
+        "files_per_sec": done / span if span else 0.0,
+        "error_rate": errs / (done + errs) if done + errs else 0.0,
+        "remaining_bytes": remaining,
+        "eta_seconds": remaining / bps if remaining is not None and bps > 0 else None,
+    }
+
+
+def _alive(entry: dict) -> bool:
+    if entry.get("host") != socket.gethostname():
+        return True
+    try:
+        os.kill(entry["pid"], 0)
+    except (OSError, KeyError):
+        return False
+    return True
+
+
+def _flush():
+    now = time.time()
+    with _lock:
+        mine = {key: _snapshot(info, now) for key, info in _sources.items()
+                if now - info.get("finished_at", now) <= KEEP_FINISHED}
+
+    lock_path = _path.with_suffix(".lock")
+    with open(lock_path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state = read_state(_path.parent)
+        for key, entry in list(state.items()):
+            mine_before = entry.get("pid") == os.getpid() and entry.get("host") == socket.gethostname()
+            if entry.get("status") == "running" and not _alive(entry):
+                # Worker died mid-run: keep it visible rather than silently dropping it
+                entry["status"] = "died"
+                entry["finished_at"] = entry.get("updated_at", now)
+            finished = entry.get("finished_at")
+            if mine_before or (finished and now - finished > KEEP_FINISHED):
+                del state[key]
+        state.update(mine)
+        tmp = _path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"sources": state, "updated_at": now}, indent=2))
+        tmp.replace(_path)
+
+
+def _write_loop():
+    while True:
+        time.sleep(LIVE_INTERVAL)
+        try:
+            _flush()
+        except OSError:
+            pass  # dashboard state is best-effort; never break a run over it
+
+
+def read_state(state_dir: str) -> dict:
+    """Every source any live hoarder process is reporting, keyed by source."""
+    path = Path(state_dir) / LIVE_FILE
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text()).get("sources", {})
+    except (OSError, json.JSONDecodeError):
+        return {}
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Mirror the photos listed in scrape_html's photos_metadata.jsonl into raw-archive.
+
+Images are downloaded by a pool of threads (at most PER_HOST_CONNECTIONS
+at a time to any one host), hashed while they stream in, and uploaded
+through uploader.stream_upload under a content-addressed path:
+
+    scraped/epsteininvestigation.org/photos/<sha256[:2]>/<sha256>.<ext>
+
+so the same image behind several URLs is stored once. Every finished URL
+is appended to photos_mirror.tsv (url, sha256, size, object path). That
+file is both the URL → object index and the resume point: a rerun skips
+URLs already in it and reuses their hashes for dedup.
+
+Usage:
+    python photo_mirror.py [photos_metadata.jsonl]
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+from scrape_http import log
+from uploader import stream_upload
+
+OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", "scraped_html"))
+DEST_PREFIX = "scraped/epsteininvestigation.org/photos"
+MIRROR_WORKERS = int(os.environ.get("MIRROR_WORKERS", "16"))
+PER_HOST_CONNECTIONS = int(os.environ.get("PER_HOST_CONNECTIONS", "8"))
+MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "3"))
+CHUNK_SIZE = 256 * 1024
+# Images larger than this spill from memory to HOARDER_TEMP_DIR
+SPOOL_MEMORY = 8 * 1024 * 1024
+
+
+class MirrorIndex:
+    """Append-only url → (sha256, size, path) index, also used for dedup."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.urls: set[str] = set()
+        self.by_hash: dict[str, str] = {}
+        if path.exists():
+            for line in path.read_text().splitlines():
+                parts = line.split("\t")
+                if len(parts) == 4:
+                    url, digest, _, obj = parts
+                    self.urls.add(url)
+                    self.by_hash[digest] = obj
+        # digest -> Event set when the thread uploading it finishes
+        self._pending: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def claim(self, digest: str) -> str | None:
+        """
+        Return the path digest is stored at, or None if the caller should
+        upload it (and then release() it). While another thread uploads the
+        same digest this waits; if that upload fails, the caller takes over.
+        """
+        while True:
+            with self._lock:
+                existing = self.by_hash.get(digest)
+                if existing is not None:
+                    return existing
+                pending = self._pending.get(digest)
+                if pending is None:
+                    self._pending[digest] = threading.Event()
+                    return None
+            pending.wait()
+
+    def release(self, digest: str, obj: str | None = None):
+        """End a claim: obj is where the digest is now stored, None if the upload failed."""
+        with self._lock:
+            if obj is not None:
+                self.by_hash[digest] = obj
+            self._pending.pop(digest).set()
+
+    def add(self, url: str, digest: str, size: int, obj: str):
+        with self._lock:
+            self.urls.add(url)
+            self._file.write(f"{url}\t{digest}\t{size}\t{obj}\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class HostLimiter:
+    """A semaphore per host, created on first use."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._sems: dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._sems:
+                self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sems[host]
+
+
+def fetch_hashed(client: httpx.Client, url: str):
+    """Download url into a spool while hashing it. Returns (spool, sha256, size, content type)."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY,
+                                          dir=os.environ.get("HOARDER_TEMP_DIR") or None)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with client.stream("GET", url) as resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get("content-type", "").split(";")[0] or None
+            for chunk in resp.iter_bytes(CHUNK_SIZE):
+                h.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, h.hexdigest(), size, content_type
+
+
+def object_path(url: str, digest: str, content_type: str | None) -> str:
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if not ext and content_type:
+        ext = mimetypes.guess_extension(content_type) or ""
+    return f"{DEST_PREFIX}/{digest[:2]}/{digest}{ext}"
+
+
+def mirror_one(client, host_slot, index: MirrorIndex, url: str) -> str:
+    """Mirror one image; returns 'uploaded', 'duplicate' or 'failed'."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            with host_slot(url):
+                spool, digest, size, content_type = fetch_hashed(client, url)
+            with spool:
+                existing = index.claim(digest)
+                if existing is not None:
+                    index.add(url, digest, size, existing)
+                    return "duplicate"
+                obj = object_path(url, digest, content_type)
+                try:
+                    stream_upload(obj, iter(lambda: spool.read(CHUNK_SIZE), b""),
+                                  size=size, content_type=content_type)
+                    # The owner's row goes in before any duplicate can point at obj
+                    index.add(url, digest, size, obj)
+                except BaseException:
+                    index.release(digest)
+                    raise
+            index.release(digest, obj)
+            return "uploaded"
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (403, 404):
+                log(f"  {e.response.status_code} for {url}")
+                return "failed"
+            error = e
+        except Exception as e:
+            error = e
+        time.sleep((2 ** attempt) + (time.monotonic() % 1))
+    log(f"  FAILED {url}: {error}")
+    return "failed"
+
+
+def mirror_photos(metadata_path: Path, workers: int = MIRROR_WORKERS) -> dict:
+    index = MirrorIndex(metadata_path.with_name("photos_mirror.tsv"))
+    urls = []
+    with open(metadata_path) as f:
+        for line in f:
+            url = json.loads(line).get("image_url")
+            if url and url not in index.urls:
+                urls.append(url)
+    urls = list(dict.fromkeys(urls))
+    log(f"{len(urls)} images to mirror ({len(index.urls)} already done, "
+        f"{len(index.by_hash)} unique stored)")
+
+    counts = {"uploaded": 0, "duplicate": 0, "failed": 0}
+    host_slot = HostLimiter(PER_HOST_CONNECTIONS)
+    limits = httpx.Limits(max_connections=workers, max_keepalive_connections=workers)
+    start = time.monotonic()
+
+    with httpx.Client(timeout=60, follow_redirects=True, limits=limits) as client, \
+            ThreadPoolExecutor(workers) as pool:
+        results = pool.map(lambda u: mirror_one(client, host_slot, index, u), urls)
+        for i, result in enumerate(results, 1):
+            counts[result] += 1
+            if i % 100 == 0:
+                rate = i / (time.monotonic() - start)
+                log(f"  {i}/{len(urls)} ({rate:.1f}/s) — {counts}")
+
+    index.close()
+    log(f"DONE: {counts} → {index.path}")
+    return counts
+
+
+def main():
+    default = OUTPUT_DIR / "photos_metadata.jsonl"
+    metadata_path = Path(sys.argv[1]) if len(sys.argv) > 1 else default
+    if not metadata_path.exists():
+        log(f"No photo metadata at {metadata_path} (run scrape_html.py photos first)")
+        sys.exit(1)
+    counts = mirror_photos(metadata_path)
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Pre-flight size / time / disk estimates for hoarding runs.
+
+Every estimate comes from cheap metadata (GitHub repo API, HF file
+listing, Zenodo record, Kaggle dataset view, HTTP HEAD) so `hoarder.py
+plan` can size a full run in a few seconds without downloading anything.
+"""
+
+import os
+from datetime import datetime
+
+import httpx
+
+import hf_parquet
+from freshness import kaggle_dataset_view
+from uploader import RESUMABLE_CHUNK_SIZE
+
+TIMEOUT = 30
+# Used when there's no measured throughput from earlier runs yet
+DEFAULT_MBPS = float(os.environ.get("PLAN_DEFAULT_MBPS", "20"))
+# Relative value of a source by tier, for the value-per-byte ordering
+TIER_VALUE = {1: 8, 2: 4, 3: 2, 4: 1}
+
+
+def _github_headers() -> dict:
+    token = os.environ.get("GITHUB_TOKEN")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def size_github(source: dict) -> dict:
+    """Repo size from the REST API plus a blob count from the recursive tree."""
+    owner_repo = "/".join(source["url"].rstrip("/").split("/")[-2:])
+    with httpx.Client(timeout=TIMEOUT, headers=_github_headers()) as client:
+        repo = client.get(f"https://api.github.com/repos/{owner_repo}")
+        repo.raise_for_status()
+        info = repo.json()
+        tree = client.get(f"https://api.github.com/repos/{owner_repo}/git/trees/"
+                          f"{info.get('default_branch', 'HEAD')}", params={"recursive": 1})
+        tree.raise_for_status()
+        blobs = [t for t in tree.json().get("tree", []) if t.get("type") == "blob"]
+
+    # The API's size (KB) includes history; blob sizes are what we upload
+    blob_bytes = sum(t.get("size", 0) for t in blobs)
+    return {
+        "bytes": blob_bytes or info.get("size", 0) * 1024,
+        "files": len(blobs),
+        "fetch_requests": 1,
+        "exact": not tree.json().get("truncated", False),
+    }
+
+
+def size_huggingface(source: dict) -> dict:
+    """File listing with sizes from the Hub (upper bound if columns are dropped)."""
+    from huggingface_hub import HfApi
+
+    info = HfApi(token=os.environ.get("HF_TOKEN")).dataset_info(source["url"], files_metadata=True)
+    siblings = info.siblings or []
+    return {
+        "bytes": sum(s.size or 0 for s in siblings),
+        "files": len(siblings),
+        "fetch_requests": len(siblings),
+        "exact": not hf_parquet.prunes(source),
+    }
+
+
+def size_zenodo(source: dict) -> dict:
+    record_id = source["url"].split("/")[-1]
+    resp = httpx.get(f"https://zenodo.org/api/records/{record_id}", timeout=TIMEOUT)
+    resp.raise_for_status()
+    files = resp.json().get("files", [])
+    return {
+        "bytes": sum(f.get("size", 0) for f in files),
+        "files": len(files),
+        "fetch_requests": len(files) + 1,
+        "exact": True,
+    }
+
+
+def _head_length(client: httpx.Client, url: str) -> int | None:
+    resp = client.head(url)
+    length = resp.headers.get("content-length")
+    return int(length) if resp.status_code < 400 and length else None
+
+
+def size_direct(source: dict) -> dict:
+    with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as client:
+        length = _head_length(client, source["url"])
+    return {"bytes": length or 0, "files": 1, "fetch_requests": 1, "exact": length is not None}
+
+
+def size_kaggle(source: dict) -> dict:
+    view = kaggle_dataset_view(source["url"])
+    return {
+        "bytes": view.get("totalBytes") or 0,
+        "files": view.get("fileCount") or 1,
+        "fetch_requests": 1,
+        "exact": bool(view.get("totalBytes")),
+    }
+
+
+def size_doj(source: dict) -> dict:
+    """Compressed archive sizes; member counts aren't known without the zip index."""
+    with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as client:
+        lengths = [_head_length(client, url) for url in source.get("archives", {}).values()]
+    return {
+        "bytes": sum(n or 0 for n in lengths),
+        "files": None,
+        "fetch_requests": len(lengths),
+        "exact": all(lengths),
+    }
+
+
+SIZERS = {
+    "github": size_github,
+    "huggingface": size_huggingface,
+    "zenodo": size_zenodo,
+    "direct_download": size_direct,
+    "kaggle": size_kaggle,
+    "doj": size_doj,
+}
+
+
+def estimate_source(source: dict) -> dict:
+    """Size a source, returning {'error': ...} instead of raising."""
+    sizer = SIZERS.get(source["type"])
+    if not sizer:
+        return {"error": f"no sizer for type '{source['type']}'"}
+    try:
+        est = sizer(source)
+    except Exception as e:
+        return {"error": str(e)}
+
+    files = est["files"] or 0
+    # One standard upload per small file, one request per 6MB block for large ones
+    est["requests"] = est["fetch_requests"] + files + est["bytes"] // RESUMABLE_CHUNK_SIZE
+    return est
+
+
+def temp_disk_need(source: dict, est_bytes: int, stream: bool) -> int:
+    """Peak bytes this source stages in TEMP_DIR while being hoarded."""
+    source_type = source["type"]
+    if source_type == "doj":
+        return 0  # always streamed member-by-member
+    if stream and source_type in ("github", "direct_download", "zenodo"):
+        return 0
+    if source_type == "kaggle":
+        # Zip alone when streaming members; zip + extracted tree otherwise
+        return est_bytes if stream else est_bytes * 2
+    if source_type == "github":
+        return est_bytes * 2  # checkout + .git
+    return est_bytes
+
+
+def measured_throughput(progress_data: dict, sources: dict) -> dict:
+    """
+    Bytes/second per source type from completed runs in the progress file
+    (sources completed with both timestamps recorded).
+    """
+    totals: dict[str, list[float]] = {}
+    for key, info in progress_data.get("sources", {}).items():
+        if info.get("status") != "complete" or key not in sources:
+            continue
+        started, completed = info.get("started_at"), info.get("completed_at")
+        if not started or not completed or not info.get("bytes"):
+            continue
+        elapsed = (datetime.fromisoformat(completed) - datetime.fromisoformat(started)).total_seconds()
+        if elapsed <= 0:
+            continue
+        agg = totals.setdefault(sources[key]["type"], [0.0, 0.0])
+        agg[0] += info["bytes"]
+        agg[1] += elapsed
+
+    rates = {t: b / s for t, (b, s) in totals.items()}
+    all_b = sum(b for b, _ in totals.values())
+    all_s = sum(s for _, s in totals.values())
+    rates["_overall"] = all_b / all_s if all_s else DEFAULT_MBPS * 1024 * 1024
+    return rates
+
+
+def value_per_gb(source: dict, est_bytes: int) -> float:
+    return TIER_VALUE.get(source["tier"], 1) / max(est_bytes / 1024 ** 3, 0.01)
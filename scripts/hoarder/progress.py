@@ -4,6 +4,7 @@ Saves state to a JSON file so interrupted runs can pick up where they left off.
 """
 
 import json
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -14,45 +15,95 @@ class ProgressTracker:
     def __init__(self, progress_dir: str = "."):
         self.path = Path(progress_dir) / PROGRESS_FILE
         self.data = self._load()
+        # Shared by concurrently hoarded sources (hoarder.py download --parallel)
+        self._lock = threading.RLock()
 
     def _load(self) -> dict:
         if self.path.exists():
             with open(self.path) as f:
-                return json.load(f)
+                data = json.load(f)
+            # Rebuild the lookup set so resumed runs skip files from earlier runs
+            data["_uploaded_set"] = set(data.get("uploaded_files", []))
+            return data
         return {"sources": {}, "uploaded_files": set()}
 
     def _save(self):
-        # Convert set to list for JSON serialization
-        save_data = {
-            "sources": self.data["sources"],
-            "uploaded_files": list(self.data.get("_uploaded_files_list", [])),
-            "last_updated": datetime.now(timezone.utc).isoformat(),
-        }
-        with open(self.path, "w") as f:
-            json.dump(save_data, f, indent=2)
+        with self._lock:
+            # Convert set to list for JSON serialization
+            save_data = {
+                "sources": self.data["sources"],
+                "cursors": self.data.get("cursors", {}),
+                "fingerprints": self.data.get("fingerprints", {}),
+                "file_info": self.data.get("file_info", {}),
+                "uploaded_files": list(self.data.get("_uploaded_set", self.data.get("uploaded_files", []))),
+                "last_updated": datetime.now(timezone.utc).isoformat(),
+            }
+            # Write-then-rename so a crash mid-save can't truncate the file
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(save_data, f, indent=2)
+            tmp.replace(self.path)
 
     def start_source(self, source_key: str):
-        self.data["sources"][source_key] = {
-            "status": "in_progress",
-            "started_at": datetime.now(timezone.utc).isoformat(),
-            "uploaded": 0,
-            "failed": 0,
-        }
-        self._save()
+        with self._lock:
+            self.data["sources"][source_key] = {
+                "status": "in_progress",
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "uploaded": 0,
+                "failed": 0,
+            }
+            self._save()
 
     def complete_source(self, source_key: str, stats: dict):
-        self.data["sources"][source_key] = {
-            "status": "complete",
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-            **stats,
-        }
-        self._save()
+        with self._lock:
+            # Keep started_at so throughput can be measured (see planner.py)
+            started_at = self.data["sources"].get(source_key, {}).get("started_at")
+            self.data["sources"][source_key] = {
+                "status": "complete",
+                "started_at": started_at,
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+                **stats,
+            }
+            self._save()
 
     def fail_source(self, source_key: str, error: str):
-        if source_key in self.data["sources"]:
-            self.data["sources"][source_key]["status"] = "failed"
-            self.data["sources"][source_key]["error"] = error
-        self._save()
+        with self._lock:
+            if source_key in self.data["sources"]:
+                self.data["sources"][source_key]["status"] = "failed"
+                self.data["sources"][source_key]["error"] = error
+            self._save()
+
+    def reset_source(self, source_key: str, bucket_path: str):
+        """Forget a source's progress so it is fetched again from scratch."""
+        prefix = f"{bucket_path}/"
+        with self._lock:
+            self.data["sources"].pop(source_key, None)
+            cursors = self.data.get("cursors", {})
+            for key in [k for k in cursors if k.startswith(f"{source_key}:")]:
+                del cursors[key]
+            uploaded = self.data.get("_uploaded_set", set(self.data.get("uploaded_files", [])))
+            self.data["_uploaded_set"] = {p for p in uploaded if not p.startswith(prefix)}
+            self._save()
+
+    def reset_archive(self, archive_key: str, remote_prefix: str):
+        """Forget one archive's member cursor and uploaded files so it is re-streamed."""
+        prefix = f"{remote_prefix}/"
+        with self._lock:
+            self.data.get("cursors", {}).pop(archive_key, None)
+            uploaded = self.data.get("_uploaded_set", set(self.data.get("uploaded_files", [])))
+            self.data["_uploaded_set"] = {p for p in uploaded if not p.startswith(prefix)}
+            self._save()
+
+    def get_fingerprint(self, source_key: str) -> str | None:
+        return self.data.get("fingerprints", {}).get(source_key, {}).get("value")
+
+    def set_fingerprint(self, source_key: str, value: str):
+        with self._lock:
+            self.data.setdefault("fingerprints", {})[source_key] = {
+                "value": value,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._save()
 
     def is_source_complete(self, source_key: str) -> bool:
         return self.data["sources"].get(source_key, {}).get("status") == "complete"
@@ -60,15 +111,36 @@ class ProgressTracker:
     def is_uploaded(self, remote_path: str) -> bool:
         return remote_path in self.data.get("_uploaded_set", set())
 
-    def mark_uploaded(self, remote_path: str):
-        if "_uploaded_set" not in self.data:
-            self.data["_uploaded_set"] = set(self.data.get("uploaded_files", []))
-            self.data["_uploaded_files_list"] = list(self.data["_uploaded_set"])
-        self.data["_uploaded_set"].add(remote_path)
-        self.data["_uploaded_files_list"] = list(self.data["_uploaded_set"])
-        # Save periodically (every 100 files)
-        if len(self.data["_uploaded_set"]) % 100 == 0:
-            self._save()
+    def mark_uploaded(self, remote_path: str, info: dict | None = None):
+        """Record an uploaded file, with its {size, sha256} when the caller has them."""
+        with self._lock:
+            if "_uploaded_set" not in self.data:
+                self.data["_uploaded_set"] = set(self.data.get("uploaded_files", []))
+            self.data["_uploaded_set"].add(remote_path)
+            if info:
+                self.data.setdefault("file_info", {})[remote_path] = info
+            # Save periodically (every 100 files)
+            if len(self.data["_uploaded_set"]) % 100 == 0:
+                self._save()
+
+    def file_info(self, remote_path: str) -> dict:
+        """{size, sha256} recorded by mark_uploaded, or {}."""
+        return self.data.get("file_info", {}).get(remote_path, {})
+
+    def get_cursor(self, key: str, default=None):
+        """Resume position for a long-running stream (e.g. archive member index)."""
+        return self.data.get("cursors", {}).get(key, default)
+
+    def set_cursor(self, key: str, value):
+        with self._lock:
+            self.data.setdefault("cursors", {})[key] = value
+            # Same cadence as mark_uploaded; flush() at the end of a stream
+            if isinstance(value, int) and value % 100 == 0:
+                self._save()
+
+    def flush(self):
+        """Persist immediately (for callers that upload few, large files)."""
+        self._save()
 
     def get_summary(self) -> dict:
         return {
@@ -0,0 +1,226 @@
+"""
+Retry budgets, circuit breakers and missing-page tracking for the
+paginated API scrapers.
+
+Every endpoint gets an EndpointHealth:
+
+  - a retry budget (RETRY_BUDGET retries per run), so one bad endpoint
+    can't burn the whole run on retries;
+  - exponential backoff with full jitter between attempts (at least the
+    server's Retry-After when it sent one);
+  - a circuit breaker: BREAKER_THRESHOLD failures in a row open it, and
+    calls then fail immediately for BREAKER_COOLDOWN seconds. After that
+    one trial call is let through (half-open); success closes the
+    breaker, failure opens it again.
+
+A page that can't be fetched is recorded in a MissingPages file instead
+of stalling or silently shortening the crawl, and refetched later, with
+its own REFETCH_BUDGET of retries per endpoint.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from scrape_http import log
+
+RETRY_BUDGET = int(os.environ.get("RETRY_BUDGET", "50"))
+# Separate allowance for refetching missing pages at the end of a run
+REFETCH_BUDGET = int(os.environ.get("REFETCH_BUDGET", "20"))
+MAX_ATTEMPTS = int(os.environ.get("MAX_ATTEMPTS", "4"))
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "60"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class Retry(Exception):
+    """A failed attempt worth retrying; `after` is the server's Retry-After."""
+
+    def __init__(self, message: str, after: float = 0.0):
+        super().__init__(message)
+        self.after = after
+
+
+class CircuitOpen(Exception):
+    """The endpoint's breaker is open; don't call it for now."""
+
+
+class GiveUp(Exception):
+    """Attempts or retry budget exhausted."""
+
+
+def backoff(attempt: int, after: float = 0.0) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After."""
+    return max(after, random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+
+class EndpointHealth:
+    """Retry budget and circuit breaker for one endpoint. Thread-safe."""
+
+    def __init__(self, name: str, budget: int = RETRY_BUDGET):
+        self.name = name
+        self.budget = budget
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+        self.stats = {"ok": 0, "failed": 0, "retries": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= BREAKER_COOLDOWN else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial:
+                self.trial = True  # one caller probes; the rest keep waiting
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self.stats["ok"] += 1
+            self.failures = 0
+            if self.opened_at is not None:
+                log(f"  /{self.name}: circuit closed")
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self._lock:
+            self.stats["failed"] += 1
+            self.failures += 1
+            if self.trial or (self.opened_at is None and self.failures >= BREAKER_THRESHOLD):
+                log(f"  /{self.name}: {self.failures} failures in a row — "
+                    f"pausing for {BREAKER_COOLDOWN:.0f}s")
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+    def take_retry(self) -> bool:
+        with self._lock:
+            if self.budget <= 0:
+                return False
+            self.budget -= 1
+            self.stats["retries"] += 1
+            return True
+
+    def refill(self, budget: int):
+        """Start a new retry allowance (e.g. for the refetch phase)."""
+        with self._lock:
+            self.budget = budget
+
+    def wait_until_allowed(self):
+        """Sleep out an open breaker's cooldown."""
+        if self.opened_at is not None:
+            time.sleep(max(BREAKER_COOLDOWN - (time.monotonic() - self.opened_at), 0))
+
+
+_endpoints: dict[str, EndpointHealth] = {}
+_endpoints_lock = threading.Lock()
+
+
+def endpoint(name: str) -> EndpointHealth:
+    with _endpoints_lock:
+        if name not in _endpoints:
+            _endpoints[name] = EndpointHealth(name)
+        return _endpoints[name]
+
+
+def call(health: EndpointHealth, fn):
+    """
+    Run fn() under health's breaker and retry budget. fn raises Retry (or
+    any exception) for a failed attempt. Raises CircuitOpen or GiveUp when
+    the call can't be made or keeps failing.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        if not health.allow():
+            raise CircuitOpen(f"/{health.name}: circuit open")
+        try:
+            result = fn()
+        except Exception as e:
+            health.failure()
+            if attempt + 1 >= MAX_ATTEMPTS:
+                raise GiveUp(f"/{health.name}: {e}") from e
+            if not health.take_retry():
+                raise GiveUp(f"/{health.name}: retry budget spent ({e})") from e
+            time.sleep(backoff(attempt, getattr(e, "after", 0.0)))
+            continue
+        health.success()
+        return result
+    raise GiveUp(health.name)
+
+
+def report() -> list[str]:
+    """One line per endpoint that had trouble."""
+    return [f"/{h.name}: {h.state}, {h.stats}" for h in _endpoints.values()
+            if h.stats["failed"] or h.stats["rejected"]]
+
+
+class MissingPages:
+    """
+    Pages that couldn't be fetched, persisted as
+    {endpoint: {"params": {...}, "pages": [...], "output": "..."}}.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, pages, params: dict | None = None):
+        """Record one page number (or an iterable of them) as missing."""
+        pages = [pages] if isinstance(pages, int) else list(pages)
+        with self._lock:
+            entry = self.entries.setdefault(endpoint, {"pages": []})
+            if params is not None:
+                entry["params"] = {k: v for k, v in params.items() if k != "page"}
+            entry["pages"] = sorted(set(entry["pages"]) | set(pages))
+            self._save()
+
+    def clear(self, endpoint: str):
+        """Forget an endpoint's missing pages (it is being fetched from scratch)."""
+        with self._lock:
+            if self.entries.pop(endpoint, None) is not None:
+                self._save()
+
+    def set_output(self, endpoint: str, output: Path):
+        with self._lock:
+            if endpoint in self.entries:
+                self.entries[endpoint]["output"] = str(output)
+                self._save()
+
+    def done(self, endpoint: str, page: int):
+        with self._lock:
+            entry = self.entries.get(endpoint)
+            if entry and page in entry["pages"]:
+                entry["pages"].remove(page)
+                if not entry["pages"]:
+                    del self.entries[endpoint]
+                self._save()
+
+    def pages(self, endpoint: str) -> list[int]:
+        return list(self.entries.get(endpoint, {}).get("pages", []))
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.entries:
+            self.path.unlink(missing_ok=True)
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2))
+        tmp.replace(self.path)
@@ -0,0 +1,361 @@
+"""
+Decoder for React Server Components "flight" payloads in Next.js pages.
+
+A Next.js app-router page carries its RSC payload as a series of inline
+`self.__next_f.push([1, "<string>"])` scripts. Concatenated, the strings
+form the flight stream: newline-separated rows `<hex id>:<payload>`,
+where the payload is JSON (an element tree), a tagged row (`I` module
+import, `HL` resource hint, `E` error, ...) or a length-prefixed text row
+`T<hex byte length>,<text>` that contains raw newlines.
+
+Elements are encoded as `["$", type, key, props]` and may point at other
+rows with `"$L<id>"` / `"$<id>"` strings; a literal leading `$` is
+escaped as `$$`. decode_page() parses all of that once per page into
+Python objects, and the walking helpers below let callers find data by
+structure and content (element keys, hrefs, text) instead of by the
+Tailwind class strings around it.
+
+Requested with an `RSC: 1` header, a Next.js route returns the flight
+stream itself (content type text/x-component) without the HTML shell;
+decode() accepts either form.
+"""
+
+import json
+import re
+
+PUSH_RE = re.compile(r'self\.__next_f\.push\(\[1,("(?:[^"\\]|\\.)*")\]\)', re.DOTALL)
+REF_RE = re.compile(r"^\$[L@]?([0-9a-f]+)((?::[^:]+)*)$")
+UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+class Element:
+    """One React element: ["$", type, key, props]."""
+
+    __slots__ = ("type", "key", "props")
+
+    def __init__(self, type_, key, props):
+        self.type = type_
+        self.key = key
+        self.props = props if isinstance(props, dict) else {}
+
+    @property
+    def children(self):
+        return self.props.get("children")
+
+    def __repr__(self):
+        return f"<{self.type} key={self.key!r}>"
+
+
+class Ref:
+    """Unresolved pointer to another row (optionally a path inside it)."""
+
+    __slots__ = ("row", "path")
+
+    def __init__(self, row: str, path: tuple):
+        self.row = row
+        self.path = path
+
+
+def extract_flight(html: str) -> str:
+    """Concatenate the page's `self.__next_f.push([1, ...])` strings."""
+    parts = []
+    for literal in PUSH_RE.findall(html):
+        try:
+            parts.append(json.loads(literal))
+        except json.JSONDecodeError:
+            continue
+    return "".join(parts)
+
+
+def _convert(value):
+    """Turn decoded row JSON into Elements, Refs and plain values."""
+    if isinstance(value, str):
+        if not value.startswith("$"):
+            return value
+        if value.startswith("$$"):
+            return value[1:]
+        if value == "$undefined":
+            return None
+        m = REF_RE.match(value)
+        if m:
+            path = tuple(p for p in m.group(2).split(":") if p)
+            return Ref(m.group(1), path)
+        if value.startswith(("$S", "$D")):
+            return value[2:]
+        return value
+    if isinstance(value, list):
+        if len(value) >= 4 and value[0] == "$" and isinstance(value[1], str):
+            return Element(value[1], value[2], _convert(value[3]))
+        return [_convert(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _convert(v) for k, v in value.items()}
+    return value
+
+
+def parse_rows(flight: str) -> dict[str, object]:
+    """Split a flight stream into {row id: converted value}."""
+    data = flight.encode("utf-8")
+    rows: dict[str, object] = {}
+    pos, end = 0, len(data)
+
+    while pos < end:
+        colon = data.find(b":", pos)
+        if colon < 0:
+            break
+        row_id = data[pos:colon].decode("ascii", "replace").strip()
+        pos = colon + 1
+        tag = data[pos:pos + 1]
+
+        if tag == b"T":
+            # Text rows carry their byte length instead of a newline terminator
+            comma = data.find(b",", pos)
+            length = int(data[pos + 1:comma], 16)
+            rows[row_id] = data[comma + 1:comma + 1 + length].decode("utf-8", "replace")
+            pos = comma + 1 + length
+            continue
+
+        newline = data.find(b"\n", pos)
+        if newline < 0:
+            newline = end
+        payload = data[pos:newline].decode("utf-8", "replace")
+        pos = newline + 1
+
+        if payload[:1] in ("I", "E", "D", "W"):
+            kind, payload = payload[0], payload[1:]
+        elif payload[:1] == "H":
+            continue  # preload hints
+        else:
+            kind = ""
+        try:
+            value = json.loads(payload)
+        except json.JSONDecodeError:
+            continue
+        if kind == "I":
+            rows[row_id] = {"$module": value}
+        elif kind == "E":
+            rows[row_id] = {"$error": value}
+        elif kind == "":
+            rows[row_id] = _convert(value)
+    return rows
+
+
+class Flight:
+    """A page's decoded RSC rows, with tree-walking helpers."""
+
+    def __init__(self, rows: dict[str, object]):
+        self.rows = rows
+
+    def deref(self, value, seen: set | None = None):
+        """Follow Refs to the value they point at (None if unknown or cyclic)."""
+        seen = seen if seen is not None else set()
+        while isinstance(value, Ref):
+            if value.row in seen:
+                return None
+            seen.add(value.row)
+            target = self.rows.get(value.row)
+            for part in value.path:
+                if isinstance(target, Element):
+                    target = target.props if part == "props" else target.props.get(part)
+                elif isinstance(target, dict):
+                    target = target.get(part)
+                elif isinstance(target, list) and part.isdigit() and int(part) < len(target):
+                    target = target[int(part)]
+                else:
+                    target = None
+            value = target
+        return value
+
+    def elements(self, node=None):
+        """
+        Yield (element, ancestors) depth-first. Without a node, walks the
+        whole page from the root row; rows only reachable by id are walked
+        afterwards. Each row is entered once.
+        """
+        seen: set[str] = set()
+        if node is not None:
+            yield from self._walk(node, (), seen)
+            return
+        order = sorted(self.rows, key=lambda k: (k != "0",))
+        for row_id in order:
+            if row_id not in seen:
+                seen.add(row_id)
+                yield from self._walk(self.rows[row_id], (), seen)
+
+    def _walk(self, node, ancestors: tuple, seen: set):
+        stack = [(node, ancestors)]
+        while stack:
+            value, ancestors = stack.pop()
+            if isinstance(value, Ref):
+                if not value.path:
+                    if value.row in seen:
+                        continue
+                    seen.add(value.row)
+                value = self.deref(value, set())
+            if isinstance(value, Element):
+                yield value, ancestors
+                stack.append((value.props, ancestors + (value,)))
+            elif isinstance(value, list):
+                stack.extend((v, ancestors) for v in reversed(value))
+            elif isinstance(value, dict):
+                stack.extend((v, ancestors) for v in reversed(list(value.values()))
+                             if isinstance(v, (Element, Ref, list, dict)))
+
+    def texts(self, node) -> list:
+        """String and number leaves among `children`, in document order."""
+        out = []
+        seen: set = set()
+        stack = [node]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, Ref):
+                if value.row in seen:
+                    continue
+                seen.add(value.row)
+                value = self.deref(value, set())
+            if isinstance(value, Element):
+                stack.append(value.children)
+            elif isinstance(value, list):
+                stack.extend(reversed(value))
+            elif isinstance(value, bool) or value is None:
+                continue
+            elif isinstance(value, (str, int, float)):
+                out.append(value)
+        return out
+
+    def text(self, node) -> str:
+        return "".join(str(t) for t in self.texts(node))
+
+    def own_texts(self, element: Element) -> list:
+        """String and number leaves that are direct children of element."""
+        children = self.deref(element.children, set())
+        items = children if isinstance(children, list) else [children]
+        out = []
+        for item in items:
+            item = self.deref(item, set())
+            if isinstance(item, (str, int, float)) and not isinstance(item, bool):
+                out.append(item)
+        return out
+
+    def page_texts(self) -> list:
+        """Every text leaf on the page, in document order."""
+        out = []
+        for el, _ in self.elements():
+            out.extend(self.own_texts(el))
+        return out
+
+    def child_elements(self, element: Element) -> list[Element]:
+        """Element children, looking through fragments, lists and refs."""
+        out = []
+        stack = [element.children]
+        while stack:
+            value = self.deref(stack.pop(), set())
+            if isinstance(value, list):
+                stack.extend(reversed(value))
+            elif isinstance(value, Element):
+                if value.type == "$Sreact.fragment" or value.type == "react.fragment":
+                    stack.append(value.children)
+                else:
+                    out.append(value)
+        return out
+
+    def hrefs(self, node, prefix: str = "/") -> list[str]:
+        """href props under node that start with prefix."""
+        return [el.props["href"] for el, _ in self.elements(node)
+                if isinstance(el.props.get("href"), str) and el.props["href"].startswith(prefix)]
+
+
+def decode_page(html: str) -> Flight:
+    """Parse every RSC row on a page once."""
+    return Flight(parse_rows(extract_flight(html)))
+
+
+def is_flight(body: str) -> bool:
+    """Whether a response body is a bare flight stream rather than HTML."""
+    return body.lstrip()[:1] != "<"
+
+
+def decode(body: str) -> Flight:
+    """Decode a full HTML page or a bare flight stream (an `RSC: 1` response)."""
+    return Flight(parse_rows(body)) if is_flight(body) else decode_page(body)
+
+
+def is_uuid(value) -> bool:
+    return isinstance(value, str) and bool(UUID_RE.match(value))
+
+
+def nearest(ancestors: tuple, predicate) -> Element | None:
+    """Innermost ancestor matching predicate."""
+    for el in reversed(ancestors):
+        if predicate(el):
+            return el
+    return None
+
+
+def label_value(texts: list, label: str):
+    """The leaf following a leaf that equals `label` (with or without a colon)."""
+    want = label.lower().rstrip(":")
+    for i, t in enumerate(texts[:-1]):
+        if isinstance(t, str) and t.strip().lower().rstrip(":") == want:
+            return texts[i + 1]
+    return None
+
+
+def record_root(flight: Flight, chain: tuple, prefix: str) -> Element:
+    """
+    The element holding one record, given the chain of elements down to
+    something inside it: the nearest ancestor keyed by a UUID (the site keys
+    list items by record id), else the largest ancestor whose links under
+    `prefix` all point at the same record.
+    """
+    keyed = nearest(chain, lambda el: is_uuid(el.key))
+    if keyed is not None:
+        return keyed
+    root = chain[-1]
+    for el in reversed(chain[:-1]):
+        if len(set(flight.hrefs(el, prefix))) > 1:
+            break
+        root = el
+    return root
+
+
+def find_pagination(flight: Flight) -> tuple[int | None, int | None]:
+    """(current page, total pages) from a 'Page N of M' element."""
+    for el, _ in flight.elements():
+        children = el.children
+        if isinstance(children, list) and "Page " in children:
+            m = re.match(r"Page\s+(\d+)\s+of\s+(\d+)", flight.text(el).strip())
+            if m:
+                return int(m.group(1)), int(m.group(2))
+    return None, None
+
+
+def find_showing(flight: Flight) -> tuple[int, int, int] | None:
+    """(first, last, total) from a 'Showing X-Y of Z' element."""
+    for el, _ in flight.elements():
+        children = el.children
+        if isinstance(children, list) and "Showing " in children:
+            m = re.match(r"Showing\s+(\d+)\s*-\s*(\d+)\s+of\s+([\d,]+)", flight.text(el).strip())
+            if m:
+                return int(m.group(1)), int(m.group(2)), int(m.group(3).replace(",", ""))
+    return None
+
+
+def find_values(flight: Flight, key: str) -> list:
+    """Every value stored under a dict/prop key anywhere in the payload."""
+    out = []
+    stack = list(flight.rows.values())
+    seen_ids: set[int] = set()
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Element):
+            value = value.props
+        if isinstance(value, dict):
+            if id(value) in seen_ids:
+                continue
+            seen_ids.add(id(value))
+            if key in value and value[key] is not None:
+                out.append(value[key])
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return out
@@ -12,32 +12,60 @@ What we're grabbing:
   7. Document index (207K+ document metadata — slug, type, source, file_url)
   8. Photo index (16,407 photo metadata)
 
-Rate limit: 100 req/min → we sleep 0.7s between requests to stay safe.
+Rate limit: 100 req/min, shared by every page fetch through one token
+bucket (scrape_http.py). Once page 1 gives an endpoint's total, the other
+pages are fetched concurrently at the largest page size it accepts.
+
+Which endpoints exist (status, total, record fields, accepted page size)
+is probed once, concurrently, and cached in api_capabilities.json for
+CAPABILITY_TTL seconds; every scrape function reads it from there.
+
+Each endpoint has a retry budget and circuit breaker (resilience.py): a
+failing endpoint is paused while the others keep going, and pages that
+still can't be fetched are listed in missing_pages.json and refetched at
+the end of the run (or the next one).
+
+--incremental re-checks the API endpoints against the seen-index from the
+last run and writes only new/changed records (see incremental.py).
 """
 
 import httpx
 import json
 import csv
-import time
+import itertools
 import os
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+import columnar
+import http_cache
+import incremental
+import resilience
+import scrape_http
+from scrape_http import REQUESTS_PER_MINUTE, log
 
 BASE_URL = "https://www.epsteininvestigation.org"
 API_URL = f"{BASE_URL}/api/v1"
 OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", "/mnt/temp/epsteininvestigation"))
-RATE_LIMIT_DELAY = 0.7  # seconds between API calls
-
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+# Page fetches in flight at once; the shared limiter sets the pace
+API_WORKERS = int(os.environ.get("API_WORKERS", "4"))
+# Largest page size to ask for; first_page() finds what the API accepts
+MAX_PAGE_LIMIT = int(os.environ.get("MAX_PAGE_LIMIT", "1000"))
+# How long api_capabilities.json is trusted before endpoints are re-probed
+CAPABILITY_TTL = int(os.environ.get("CAPABILITY_TTL", str(24 * 3600)))
 
+_api = None
+_api_lock = threading.Lock()
 
 def download_csv(name, url, output_path):
     """Download a CSV file directly."""
     log(f"Downloading CSV: {name}")
     try:
-        with httpx.Client(timeout=60, follow_redirects=True) as client:
+        with http_cache.client(timeout=60, follow_redirects=True) as client:
             r = client.get(url)
             r.raise_for_status()
             output_path.write_bytes(r.content)
@@ -49,116 +77,460 @@ def download_csv(name, url, output_path):
         return 0
 
 
-def paginate_api(endpoint, params=None, max_pages=None):
-    """Paginate through an API endpoint, yielding all records."""
-    if params is None:
-        params = {}
+def api_client():
+    """The API's one pooled client, shared by every worker under one rate limiter."""
+    global _api
+    with _api_lock:
+        if _api is None:
+            _api = scrape_http.ScrapeClient(per_minute=REQUESTS_PER_MINUTE, timeout=60,
+                                            max_connections=API_WORKERS * 2)
+    return _api
+
+
+_missing = None
+
+
+def missing_pages():
+    """Pages that couldn't be fetched this run or earlier ones (missing_pages.json)."""
+    global _missing
+    with _api_lock:
+        if _missing is None:
+            _missing = resilience.MissingPages(OUTPUT_DIR / "missing_pages.json")
+    return _missing
+
+
+def fetch_api_page(endpoint, params, page, record_missing=True):
+    """
+    One page of an endpoint as decoded JSON, or None if it doesn't exist
+    or couldn't be fetched. Attempts go through the endpoint's retry
+    budget and circuit breaker (resilience.py), so a failing endpoint
+    costs little time; a page that still fails is recorded in
+    missing_pages.json for refetch_missing().
+    """
+    client = api_client()
+
+    def get():
+        r = client.client.get(f"{API_URL}/{endpoint}", params={**params, "page": page})
+        if r.status_code in scrape_http.RETRY_STATUSES:
+            after = scrape_http.retry_after(r, 0.0)
+            client.limiter.pause(after)
+            raise resilience.Retry(f"HTTP {r.status_code}", after)
+        if r.is_client_error:
+            log(f"  /{endpoint} page {page}: HTTP {r.status_code}")
+            return None
+        r.raise_for_status()
+        return r.json()
+
+    try:
+        data = resilience.call(resilience.endpoint(endpoint), get)
+    except (resilience.CircuitOpen, resilience.GiveUp) as e:
+        if isinstance(e, resilience.GiveUp):
+            log(f"  Page {page} failed: {e}")
+        if record_missing:
+            missing_pages().add(endpoint, page, params)
+        return None
+    if record_missing and data is None:
+        missing_pages().done(endpoint, page)  # doesn't exist, so not missing
+    return data
+
+
+def first_page(endpoint, params):
+    """
+    Page 1 at the largest page size the endpoint accepts. Tries
+    MAX_PAGE_LIMIT and smaller sizes down to the requested limit; an
+    endpoint that silently caps the size is detected by a short page.
+    Returns (decoded page, limit to use) or (None, None).
+    """
+    requested = params.get("limit", 100)
+    known = capabilities().get(endpoint, {}).get("limit")
+    if known:
+        candidates = [known, requested] if known != requested else [requested]
+    elif incremental.ENABLED:
+        candidates = [requested]  # a sync is a few pages; not worth probing for
+    else:
+        candidates = [c for c in (MAX_PAGE_LIMIT, MAX_PAGE_LIMIT // 2, MAX_PAGE_LIMIT // 4)
+                      if c > requested] + [requested]
+    for limit in candidates:
+        try:
+            r = api_client().client.get(f"{API_URL}/{endpoint}",
+                                        params={**params, "limit": limit, "page": 1})
+        except httpx.HTTPError as e:
+            log(f"  /{endpoint} limit={limit}: {e}")
+            continue
+        if r.status_code in (404, 403):
+            log(f"  /{endpoint} returned {r.status_code} — skipping")
+            return None, None
+        if r.status_code != 200:
+            continue
+        try:
+            data = r.json()
+        except ValueError:
+            continue
+        records = data.get("data", [])
+        total = data.get("total", 0)
+        if 0 < len(records) < min(limit, total):
+            limit = len(records)  # capped below what we asked for
+        if limit != requested and limit != known:
+            log(f"  /{endpoint} accepts limit={limit}")
+        # Only a full page proves the size; a short last page doesn't
+        if len(records) == limit:
+            record_limit(endpoint, limit)
+        return data, limit
+    # Fall back to a retrying fetch at the requested size. Without page 1
+    # there's no total, so there are no page numbers to record as missing.
+    data = fetch_api_page(endpoint, params, 1, record_missing=False)
+    return (data, requested) if data is not None else (None, None)
+
+
+def paginate_pages(endpoint, params=None, max_pages=None):
+    """
+    Paginate through an API endpoint, yielding one page of records at a
+    time, in page order. Page 1 gives the total; the remaining pages are
+    fetched by API_WORKERS threads under the shared rate limiter. A
+    prefetch thread keeps them coming while the caller writes, except in
+    --incremental mode, where the caller usually stops after a few pages.
+    """
+    if incremental.ENABLED:
+        yield from _fetch_pages(endpoint, params, max_pages)
+    else:
+        yield from scrape_http.prefetch(_fetch_pages(endpoint, params, max_pages), depth=4)
+
+
+def _fetch_pages(endpoint, params=None, max_pages=None):
+    params = dict(params or {})
     params.setdefault("limit", 100)
-    page = 1
-    total_fetched = 0
+    data, limit = first_page(endpoint, params)
+    if data is None:
+        return
+    params["limit"] = limit
+
+    records = data.get("data", [])
+    total = data.get("total", 0)
+    if not records:
+        return
+    yield records
+    total_fetched = len(records)
+
+    pages = -(-total // limit)
+    if max_pages:
+        pages = min(pages, max_pages)
+    if pages > 1:
+        log(f"  /{endpoint}: {total} records in {pages} pages of {limit}")
+
+    for _, records in fetch_pages(endpoint, params, range(2, pages + 1)):
+        if records:
+            yield records
+            total_fetched += len(records)
+
+    log(f"  Fetched {total_fetched}/{total} records from /{endpoint}")
 
-    with httpx.Client(timeout=60, follow_redirects=True) as client:
+
+def fetch_pages(endpoint, params, pages, ahead=None):
+    """
+    Fetch the given page numbers with API_WORKERS threads, at most `ahead`
+    pages in flight, yielding (page, records) in order; records is None
+    for a page that failed. Closing the generator cancels the pages not
+    yet started. By default API_WORKERS * 2 pages are in flight, or one
+    at a time in --incremental mode so a stop wastes no requests.
+    """
+    if ahead is None:
+        ahead = 1 if incremental.ENABLED else API_WORKERS * 2
+    pages = iter(pages)
+    pool = ThreadPoolExecutor(API_WORKERS)
+    inflight = deque()
+    try:
         while True:
-            params["page"] = page
-            try:
-                r = client.get(f"{API_URL}/{endpoint}", params=params)
-                r.raise_for_status()
-                data = r.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code in (404, 403):
-                    log(f"  /{endpoint} returned {e.response.status_code} — skipping")
-                    return
-                log(f"  Error on page {page}: {e}")
-                time.sleep(2)
-                continue
-            except Exception as e:
-                log(f"  Error on page {page}: {e}")
-                time.sleep(2)
-                continue
+            while len(inflight) < ahead:
+                page = next(pages, None)
+                if page is None:
+                    break
+                inflight.append((page, pool.submit(fetch_api_page, endpoint, params, page)))
+            if not inflight:
+                return
+            page, future = inflight.popleft()
+            data = future.result()
+            yield page, (data.get("data", []) if data is not None else None)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 
-            records = data.get("data", [])
-            total = data.get("total", 0)
+def paginate_api(endpoint, params=None, max_pages=None):
+    """Paginate through an API endpoint, yielding all records."""
+    for records in paginate_pages(endpoint, params, max_pages):
+        yield from records
+
+
+def save_endpoint(endpoint, output_path, label, log_every=None, key_fields=("id",)):
+    """
+    Write every record from an endpoint to a JSONL file, keeping its
+    seen-index current. In --incremental mode only new or changed records
+    are written to the .delta.jsonl, and merged into the main file, and
+    paging stops after a run of unchanged pages.
+    """
+    store = output_path
+    seen = incremental.SeenIndex(store, key_fields)
+    unchanged = incremental.UnchangedRun()
+    if incremental.ENABLED:
+        if not len(seen):
+            log(f"  No index of seen {label} yet — fetching everything")
+        output_path = incremental.delta_path(store)
+    count = fetched = 0
+    missing_pages().clear(endpoint)
 
-            if not records:
+    with open(output_path, "w") as f:
+        for records in paginate_pages(endpoint, {"limit": 100}):
+            changes = seen.changes(records)
+            if incremental.ENABLED:
+                incremental.merge_into_store(store, changes, seen)
+            for record in changes if incremental.ENABLED else records:
+                f.write(json.dumps(record) + "\n")
+                count += 1
+            fetched += len(records)
+            if log_every and fetched // log_every > (fetched - len(records)) // log_every:
+                log(f"  {fetched} {label}...")
+            if incremental.ENABLED and unchanged.page(len(changes)):
+                log(f"  {unchanged.count} pages with no changes — stopping")
                 break
 
-            yield from records
-            total_fetched += len(records)
+    seen.save()
+    note_missing(endpoint, store)
+    log(f"  DONE: {count} {label} → {output_path.name}")
+    return count
+
 
-            if total_fetched >= total:
+def note_missing(endpoint, output_path):
+    """Tie an endpoint's missing pages to the file they belong in."""
+    pages = missing_pages().pages(endpoint)
+    if pages:
+        missing_pages().set_output(endpoint, output_path)
+        log(f"  {len(pages)} pages of /{endpoint} missing — will refetch")
+
+
+def refetch_missing():
+    """
+    Retry every page in missing_pages.json and merge the records into the
+    main file they were missing from, and into this run's delta in
+    --incremental mode. Each endpoint gets a fresh REFETCH_BUDGET of
+    retries; its pages are fetched one at a time once the breaker allows
+    (the first is the half-open trial), stopping if it opens again.
+    """
+    missing = missing_pages()
+    total = 0
+    for endpoint, entry in list(missing.entries.items()):
+        output = entry.get("output")
+        if not output:
+            continue
+        output = Path(output)
+        health = resilience.endpoint(endpoint)
+        health.refill(resilience.REFETCH_BUDGET)
+        health.wait_until_allowed()
+        seen = incremental.SeenIndex(output, ("id",))
+        changes = []
+        pages = missing.pages(endpoint)
+        for page in pages:
+            data = fetch_api_page(endpoint, entry.get("params", {}), page)
+            if data is not None:
+                missing.done(endpoint, page)
+                changes.extend(seen.changes(data.get("data", [])))
+            elif health.state == "open":
+                log(f"  /{endpoint} still failing — leaving the rest for the next run")
                 break
-            if max_pages and page >= max_pages:
+        incremental.merge_into_store(output, changes, seen)
+        seen.save()
+        if incremental.ENABLED:
+            with open(incremental.delta_path(output), "a") as f:
+                f.writelines(json.dumps(r) + "\n" for r in changes)
+        left = len(missing.pages(endpoint))
+        log(f"  /{endpoint}: {len(pages) - left}/{len(pages)} pages recovered, "
+            f"{len(changes)} records → {output.name}")
+        total += len(changes)
+    return total
+
+
+# Query parameters that might make the API list newest ids first
+SORT_CANDIDATES = [
+    {"sort": "-id"},
+    {"sort": "id", "order": "desc"},
+    {"order_by": "id", "order": "desc"},
+    {"sort_by": "id", "sort_order": "desc"},
+]
+
+
+def page_hash(records):
+    return incremental.content_hash({"data": records})
+
+
+def numeric_id(record):
+    value = record.get("id")
+    return value if isinstance(value, int) else None
+
+
+def probe_sort(endpoint, params):
+    """The first SORT_CANDIDATES entry that returns ids in descending order, or None."""
+    for sort in SORT_CANDIDATES:
+        data = fetch_api_page(endpoint, {**params, **sort, "limit": 20}, 1, record_missing=False)
+        ids = [numeric_id(r) for r in (data or {}).get("data", [])]
+        if len(ids) > 1 and None not in ids and all(a > b for a, b in zip(ids, ids[1:])):
+            log(f"  /{endpoint} sorts newest first with {sort}")
+            return sort
+    return None
+
+
+def sync_new_by_id(endpoint, params, sort, max_id):
+    """Records with id > max_id, paging newest-first until we reach known ids."""
+    new = []
+    # Usually only a page or two is new, so don't fetch far ahead
+    pages = fetch_pages(endpoint, {**params, **sort}, itertools.count(1), ahead=2)
+    try:
+        for _, records in pages:
+            if records is None:
+                return None  # can't tell where the new records end
+            new.extend(r for r in records if (numeric_id(r) or 0) > max_id)
+            if not records or any((numeric_id(r) or 0) <= max_id for r in records):
                 break
-
-            page += 1
-            time.sleep(RATE_LIMIT_DELAY)
-
-    log(f"  Fetched {total_fetched}/{total} records from /{endpoint}")
+    finally:
+        pages.close()
+    return new
 
 
 def scrape_documents():
-    """Pull full document index via API."""
-    log("=== Scraping Document Index ===")
-    output_path = OUTPUT_DIR / "documents.jsonl"
-    count = 0
-
-    with open(output_path, "w") as f:
-        for doc in paginate_api("documents", {"limit": 100}):
-            f.write(json.dumps(doc) + "\n")
-            count += 1
-            if count % 1000 == 0:
-                log(f"  {count} documents...")
-
-    log(f"  DONE: {count} documents → {output_path.name}")
+    """
+    Sync the document index into documents.jsonl, a store with one line
+    per document id. The first run pulls everything. Later runs fetch only
+    what changed, using the high-water marks in documents.sync.json:
+
+      - if the API can list newest ids first, pages down to the stored max id
+        (new documents only; edits to old ones wait for a full comparison);
+      - otherwise, if page 1 and the page the last run ended on still hash
+        the same (the index only grew), just the pages past the stored count;
+      - otherwise, every page, merging only pages whose content hash changed.
+
+    A run that couldn't fetch some page marks the state incomplete, and the
+    next sync compares every page, which fetches the pages without a hash.
+    Delete documents.sync.json to force a full pull.
+    """
+    log("=== Syncing Document Index ===")
+    store = OUTPUT_DIR / "documents.jsonl"
+    state_path = OUTPUT_DIR / "documents.sync.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() and store.exists() else {}
+    params = {"limit": 100}
+
+    first, limit = first_page("documents", params)
+    if first is None:
+        return 0
+    params["limit"] = limit
+    total = first.get("total", 0)
+    pages = max(-(-total // limit), 1)
+    if state.get("limit") != limit:
+        state = {}  # page hashes are only comparable at the same page size
+    page_hashes = state.get("page_hashes", {})
+    seen = incremental.SeenIndex(store, ("id",))
+
+    if not state:
+        log(f"  No sync state — pulling all {total} documents in {pages} pages of {limit}")
+        seen.hashes.clear()
+        missing_pages().clear("documents")
+        page_hashes, max_id, gaps = {}, 0, False
+        moved = []  # ids met again on a later page with new content
+        all_pages = itertools.chain([(1, first.get("data", []))],
+                                    fetch_pages("documents", params, range(2, pages + 1),
+                                                ahead=API_WORKERS * 2))
+        with open(store, "w") as f:
+            for page, records in all_pages:
+                if records is None:
+                    gaps = True  # no hash; recorded in missing_pages.json
+                    continue
+                page_hashes[str(page)] = page_hash(records)
+                # The index can shift mid-crawl; keep one line per id
+                for r in records:
+                    change = seen.classify(r)
+                    if change == "new":
+                        f.write(json.dumps(r) + "\n")
+                    elif change == "changed":
+                        moved.append({**r, "_change": change})
+                max_id = max([max_id, *(numeric_id(r) or 0 for r in records)])
+                if page % 100 == 0:
+                    log(f"  {len(seen)} documents...")
+        incremental.merge_into_store(store, moved, seen)
+        seen.save()
+        note_missing("documents", store)
+        count = len(seen)
+        state = {"limit": limit, "count": count, "max_id": max_id, "page_hashes": page_hashes,
+                 "sort": probe_sort("documents", params) if max_id else None, "incomplete": gaps}
+        state_path.write_text(json.dumps(state))
+        log(f"  DONE: {count} documents → {store.name}")
+        return count
+
+    old_count, max_id = state["count"], state.get("max_id", 0)
+    changes = None
+    gaps = False
+    if state.get("sort") and max_id and not state.get("incomplete"):
+        new = sync_new_by_id("documents", params, state["sort"], max_id)
+        if new is not None:
+            log(f"  {len(new)} documents newer than id {max_id}")
+            changes = seen.changes(new)
+
+    if changes is None:
+        boundary = max(-(-old_count // limit), 1)
+        records = fetch_api_page("documents", params, boundary, record_missing=False)
+        records = records.get("data", []) if records else None
+        kept = old_count - (boundary - 1) * limit
+        # Page 1 came with first_page(), so checking it for edits is free
+        first_same = boundary == 1 or page_hash(first.get("data", [])) == page_hashes.get("1")
+        if (first_same and records is not None and not state.get("incomplete")
+                and page_hash(records[:kept]) == page_hashes.get(str(boundary))):
+            # Append-only: only the boundary page and the pages after it changed
+            log(f"  {total} documents (was {old_count}), earlier pages unchanged: "
+                f"fetching pages {boundary}-{pages}")
+            changes = seen.changes(records)
+            page_hashes[str(boundary)] = page_hash(records)
+            wanted = range(boundary + 1, pages + 1)
+        else:
+            log(f"  {'Last sync had gaps' if state.get('incomplete') else 'Earlier pages changed'}"
+                f" — comparing all {pages} pages by hash")
+            changes = []
+            wanted = range(1, pages + 1)
+        # Every wanted page is read, so full read-ahead even when incremental
+        for page, records in fetch_pages("documents", params, wanted, ahead=API_WORKERS * 2):
+            if records is None:
+                gaps = True
+                continue
+            if page_hashes.get(str(page)) == page_hash(records):
+                continue
+            page_hashes[str(page)] = page_hash(records)
+            changes.extend(seen.changes(records))
+
+    incremental.merge_into_store(store, changes, seen)
+    seen.save()
+    note_missing("documents", store)
+    if incremental.ENABLED:
+        with open(incremental.delta_path(store), "w") as f:
+            f.writelines(json.dumps(r) + "\n" for r in changes)
+
+    count = len(seen)
+    max_id = max([max_id, *(numeric_id(r) or 0 for r in changes)])
+    state.update(count=count, max_id=max_id, page_hashes=page_hashes, incomplete=gaps)
+    state_path.write_text(json.dumps(state))
+    log(f"  DONE: {len(changes)} new/changed documents merged, {count} in {store.name}")
     return count
 
 
 def scrape_emails():
     """Pull full email corpus via API — these have body text."""
     log("=== Scraping Email Corpus ===")
-    output_path = OUTPUT_DIR / "emails_full.jsonl"
-    count = 0
-
-    # First try the emails endpoint
-    with open(output_path, "w") as f:
-        for email in paginate_api("emails", {"limit": 100}):
-            f.write(json.dumps(email) + "\n")
-            count += 1
-            if count % 100 == 0:
-                log(f"  {count} emails...")
-
-    log(f"  DONE: {count} emails → {output_path.name}")
-    return count
+    return save_endpoint("emails", OUTPUT_DIR / "emails_full.jsonl", "emails", log_every=100)
 
 
 def scrape_flights():
     """Pull full flight data via API."""
     log("=== Scraping Flight Data ===")
-    output_path = OUTPUT_DIR / "flights_full.jsonl"
-    count = 0
-
-    with open(output_path, "w") as f:
-        for flight in paginate_api("flights", {"limit": 100}):
-            f.write(json.dumps(flight) + "\n")
-            count += 1
-
-    log(f"  DONE: {count} flights → {output_path.name}")
-    return count
+    return save_endpoint("flights", OUTPUT_DIR / "flights_full.jsonl", "flights")
 
 
 def scrape_entities():
     """Pull full entity data via API."""
     log("=== Scraping Entity Data ===")
-    output_path = OUTPUT_DIR / "entities_full.jsonl"
-    count = 0
-
-    with open(output_path, "w") as f:
-        for entity in paginate_api("entities", {"limit": 100}):
-            f.write(json.dumps(entity) + "\n")
-            count += 1
-
-    log(f"  DONE: {count} entities → {output_path.name}")
-    return count
+    return save_endpoint("entities", OUTPUT_DIR / "entities_full.jsonl", "entities")
 
 
 def scrape_amazon_orders():
@@ -168,30 +540,15 @@ def scrape_amazon_orders():
     count = 0
 
     # Try common API patterns
-    endpoints_to_try = ["orders", "amazon-orders", "purchases"]
-    for ep in endpoints_to_try:
-        try:
-            with httpx.Client(timeout=30, follow_redirects=True) as client:
-                r = client.get(f"{API_URL}/{ep}", params={"limit": 1})
-                if r.status_code == 200:
-                    data = r.json()
-                    if data.get("data"):
-                        log(f"  Found orders at /{ep}")
-                        with open(output_path, "w") as f:
-                            for order in paginate_api(ep, {"limit": 100}):
-                                f.write(json.dumps(order) + "\n")
-                                count += 1
-                                if count % 100 == 0:
-                                    log(f"  {count} orders...")
-                        log(f"  DONE: {count} orders → {output_path.name}")
-                        return count
-        except Exception:
-            continue
+    ep, _ = find_endpoint(["orders", "amazon-orders", "purchases"])
+    if ep:
+        log(f"  Found orders at /{ep}")
+        return save_endpoint(ep, output_path, "orders", log_every=100)
 
     # If no API endpoint, try scraping the HTML pages
     log("  No API endpoint found for orders, trying HTML scrape...")
     try:
-        with httpx.Client(timeout=30, follow_redirects=True) as client:
+        with http_cache.client(timeout=30, follow_redirects=True) as client:
             # Try fetching the orders page to see if there's embedded JSON
             r = client.get(f"{BASE_URL}/orders")
             if r.status_code == 200:
@@ -227,28 +584,12 @@ def scrape_search_names():
     """Pull the full names directory — 23,540 names."""
     log("=== Scraping Names Directory ===")
     output_path = OUTPUT_DIR / "all_names.jsonl"
-    count = 0
 
     # Try the names/people endpoint
-    endpoints_to_try = ["names", "people", "all-names"]
-    for ep in endpoints_to_try:
-        try:
-            with httpx.Client(timeout=30, follow_redirects=True) as client:
-                r = client.get(f"{API_URL}/{ep}", params={"limit": 1})
-                if r.status_code == 200:
-                    data = r.json()
-                    if data.get("data") or data.get("total", 0) > 0:
-                        log(f"  Found names at /{ep} (total: {data.get('total', '?')})")
-                        with open(output_path, "w") as f:
-                            for name in paginate_api(ep, {"limit": 100}):
-                                f.write(json.dumps(name) + "\n")
-                                count += 1
-                                if count % 1000 == 0:
-                                    log(f"  {count} names...")
-                        log(f"  DONE: {count} names → {output_path.name}")
-                        return count
-        except Exception:
-            continue
+    ep, info = find_endpoint(["names", "people", "all-names"])
+    if ep:
+        log(f"  Found names at /{ep} (total: {info.get('total', '?')})")
+        return save_endpoint(ep, output_path, "names", log_every=1000)
 
     log(f"  No names API endpoint found")
     return 0
@@ -258,67 +599,171 @@ def scrape_photos_index():
     """Pull photo metadata index."""
     log("=== Scraping Photo Index ===")
     output_path = OUTPUT_DIR / "photos_index.jsonl"
-    count = 0
 
-    endpoints_to_try = ["photos", "images"]
-    for ep in endpoints_to_try:
-        try:
-            with httpx.Client(timeout=30, follow_redirects=True) as client:
-                r = client.get(f"{API_URL}/{ep}", params={"limit": 1})
-                if r.status_code == 200:
-                    data = r.json()
-                    if data.get("data") or data.get("total", 0) > 0:
-                        log(f"  Found photos at /{ep} (total: {data.get('total', '?')})")
-                        with open(output_path, "w") as f:
-                            for photo in paginate_api(ep, {"limit": 100}):
-                                f.write(json.dumps(photo) + "\n")
-                                count += 1
-                                if count % 1000 == 0:
-                                    log(f"  {count} photos...")
-                        log(f"  DONE: {count} photos → {output_path.name}")
-                        return count
-        except Exception:
-            continue
+    ep, info = find_endpoint(["photos", "images"])
+    if ep:
+        log(f"  Found photos at /{ep} (total: {info.get('total', '?')})")
+        return save_endpoint(ep, output_path, "photos", log_every=1000)
 
     log(f"  No photos API endpoint found")
     return 0
 
 
-def probe_endpoints():
-    """Discover which API endpoints actually exist."""
-    log("=== Probing API Endpoints ===")
-    candidates = [
-        "documents", "entities", "flights", "search",
-        "emails", "orders", "amazon-orders", "purchases",
-        "names", "people", "all-names", "persons",
-        "photos", "images", "media",
-        "relationships", "connections", "network",
-    ]
-    available = {}
-    with httpx.Client(timeout=15, follow_redirects=True) as client:
-        for ep in candidates:
-            try:
-                r = client.get(f"{API_URL}/{ep}", params={"limit": 1})
-                if r.status_code == 200:
-                    data = r.json()
-                    total = data.get("total", len(data.get("data", [])))
-                    available[ep] = total
-                    log(f"  /{ep}: {r.status_code} OK ({total} records)")
+# ─── ENDPOINT CAPABILITIES ────────────────────────────────────────────────────
+
+CANDIDATE_ENDPOINTS = [
+    "documents", "entities", "flights", "search",
+    "emails", "orders", "amazon-orders", "purchases",
+    "names", "people", "all-names", "persons",
+    "photos", "images", "media",
+    "relationships", "connections", "network",
+]
+
+# Answers worth caching; anything else (timeouts, 429, 5xx) is re-probed next run
+DEFINITIVE_STATUSES = {200, 403, 404}
+
+_capabilities = None
+_capabilities_lock = threading.Lock()
+
+
+def capabilities_path():
+    return OUTPUT_DIR / "api_capabilities.json"
+
+
+def probe_endpoint(ep):
+    """
+    status, total and record fields of one endpoint, from a limit=1
+    request, and for an endpoint with more than one default page of
+    records, the page size it accepts (probe_limit).
+    """
+    try:
+        r = api_client().client.get(f"{API_URL}/{ep}", params={"limit": 1})
+    except httpx.HTTPError as e:
+        return {"status": None, "error": str(e)}
+    info = {"status": r.status_code}
+    if r.status_code == 200:
+        try:
+            data = r.json()
+        except ValueError:
+            return {**info, "error": "not JSON"}
+        records = data.get("data", [])
+        info["total"] = data.get("total", len(records))
+        info["fields"] = sorted(records[0]) if records and isinstance(records[0], dict) else []
+        if info["total"] > 100:
+            limit = probe_limit(ep, info["total"])
+            if limit:
+                info["limit"] = limit
+    return info
+
+
+def probe_limit(ep, total):
+    """
+    Largest page size the endpoint honours: MAX_PAGE_LIMIT or a smaller
+    candidate, or the size of a page it silently capped. None if unknown.
+    """
+    for limit in (MAX_PAGE_LIMIT, MAX_PAGE_LIMIT // 2, MAX_PAGE_LIMIT // 4):
+        try:
+            r = api_client().client.get(f"{API_URL}/{ep}", params={"limit": limit, "page": 1})
+            records = r.json().get("data", []) if r.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            continue
+        if records is None:
+            continue
+        if len(records) >= min(limit, total):
+            return limit
+        if records:
+            return len(records)
+    return None
+
+
+def capabilities():
+    """
+    endpoint → {status, total, fields, limit, probed_at} for every
+    candidate endpoint. Definitive answers (200, 403, 404) are read from
+    api_capabilities.json while younger than CAPABILITY_TTL; the rest,
+    and any candidate whose probe timed out or got a 429/5xx, are probed
+    again (all at once, under the shared limiter) and saved. first_page()
+    corrects `limit` if the endpoint turns out to cap it.
+    """
+    global _capabilities
+    with _capabilities_lock:
+        if _capabilities is not None:
+            return _capabilities["endpoints"]
+        now = datetime.now(timezone.utc).timestamp()
+        path = capabilities_path()
+        saved = json.loads(path.read_text()) if path.exists() else {}
+        fresh = {
+            ep: info for ep, info in saved.get("endpoints", {}).items()
+            if info.get("status") in DEFINITIVE_STATUSES and not info.get("error")
+            and now - info.get("probed_at", saved.get("probed_at", 0)) < CAPABILITY_TTL
+        }
+        stale = [ep for ep in CANDIDATE_ENDPOINTS if ep not in fresh]
+        if fresh:
+            log(f"Endpoint capabilities from {path.name} ({len(fresh)} cached)")
+        if stale:
+            log(f"=== Probing {len(stale)} API Endpoints ===")
+            with ThreadPoolExecutor(API_WORKERS) as pool:
+                results = dict(zip(stale, pool.map(probe_endpoint, stale)))
+            for ep, info in results.items():
+                info["probed_at"] = now
+                if info["status"] == 200:
+                    limit = f", limit={info['limit']}" if "limit" in info else ""
+                    log(f"  /{ep}: 200 OK ({info.get('total')} records{limit})")
                 else:
-                    log(f"  /{ep}: {r.status_code}")
-            except Exception as e:
-                log(f"  /{ep}: error ({e})")
-            time.sleep(0.3)
-    return available
+                    log(f"  /{ep}: {info.get('error') or info['status']}")
+            fresh.update(results)
+        _capabilities = {"probed_at": now, "endpoints": fresh}
+        if stale:
+            _save_capabilities()
+        return fresh
+
+
+def _save_capabilities():
+    path = capabilities_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(_capabilities, indent=2))
+    tmp.replace(path)
+
+
+def record_limit(endpoint, limit):
+    """Remember the page size an endpoint accepts."""
+    with _capabilities_lock:
+        if _capabilities is None:
+            return
+        info = _capabilities["endpoints"].setdefault(endpoint, {"status": 200})
+        if info.get("limit") != limit:
+            info["limit"] = limit
+            _save_capabilities()
+
+
+def find_endpoint(candidates):
+    """The first candidate that answered 200 with records."""
+    caps = capabilities()
+    for ep in candidates:
+        info = caps.get(ep, {})
+        if info.get("status") == 200 and (info.get("total") or info.get("fields")):
+            return ep, info
+    return None, None
+
+
+def probe_endpoints():
+    """Which API endpoints exist, as {endpoint: total}."""
+    return {ep: info.get("total", 0) for ep, info in capabilities().items()
+            if info.get("status") == 200}
 
 
 def main():
+    # --cache uses the response cache, --replay runs entirely from it; default is live
+    http_cache.parse_flags(sys.argv[1:])
+    # --incremental writes only new/changed records (see incremental.py)
+    incremental.parse_flags(sys.argv[1:])
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     log(f"Output directory: {OUTPUT_DIR}")
-    log(f"Rate limit delay: {RATE_LIMIT_DELAY}s between requests")
+    log(f"Rate limit: {REQUESTS_PER_MINUTE} requests/min, {API_WORKERS} page workers")
     log("")
 
-    # 0. Probe endpoints
+    # 0. Probe endpoints (or read the cached capability map)
     available = probe_endpoints()
     log(f"\nAvailable endpoints: {list(available.keys())}")
     log("")
@@ -386,6 +831,17 @@ def main():
     else:
         log("=== Documents: no API endpoint found ===")
 
+    if missing_pages():
+        log("")
+        log("=" * 60)
+        log("PHASE 4: Refetching Missing Pages")
+        log("=" * 60)
+        refetch_missing()
+
+    # After refetch_missing, which merges recovered pages into documents.jsonl
+    if "documents" in available:
+        columnar.to_parquet(OUTPUT_DIR / "documents.jsonl")
+
     # Summary
     log("")
     log("=" * 60)
@@ -393,6 +849,10 @@ def main():
     log("=" * 60)
     for key, count in results.items():
         log(f"  {key}: {count} records")
+    for line in resilience.report():
+        log(f"  {line}")
+    for endpoint, entry in missing_pages().entries.items():
+        log(f"  /{endpoint}: {len(entry['pages'])} pages still missing (see missing_pages.json)")
 
     total_files = sum(1 for f in OUTPUT_DIR.rglob("*") if f.is_file())
     total_size = sum(f.stat().st_size for f in OUTPUT_DIR.rglob("*") if f.is_file())
@@ -409,6 +869,7 @@ def main():
     manifest_path = OUTPUT_DIR / "manifest.json"
     manifest_path.write_text(json.dumps(manifest, indent=2))
     log(f"Manifest saved: {manifest_path}")
+    log(http_cache.summary())
 
 
 if __name__ == "__main__":
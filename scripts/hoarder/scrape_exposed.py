@@ -2,42 +2,92 @@
 """
 Scrape epsteinexposed.com via their public REST API.
 No auth required. Rate limit: 60 req/min.
+
+--cache keeps responses in the on-disk cache (http_cache.py) and serves
+fresh ones from it; --replay re-runs the scrape from that cache without
+touching the network. Without either, every page is fetched live.
+
+Paginated endpoints go through resilience.py: retries come out of a
+per-endpoint budget with jittered backoff, and an endpoint whose circuit
+breaker opens is set aside while the rest of the scrape carries on.
+Pages that couldn't be fetched are kept in missing_pages.json and
+refetched into their output files at the end of this run or the next.
 """
-import os, sys, json, time, math
+import os, sys, json, math
+from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(__file__))
-import httpx
 from supabase import create_client
 from uploader import upload_directory
+import columnar
+import http_cache
+import resilience
+import scrape_http
 
 DEST = '/mnt/temp/epstein-exposed'
 BASE = 'https://epsteinexposed.com/api/v1'
 DELAY = 1.1  # stay under 60 req/min
+DOC_PER_PAGE = 100
+DOC_BATCH_PAGES = 100  # pages per file (10K records per file)
 
+http_cache.parse_flags(sys.argv[1:])
+http = http_cache.client(timeout=30, follow_redirects=True)
 os.makedirs(DEST, exist_ok=True)
+missing = resilience.MissingPages(f'{DEST}/missing_pages.json')
+
+
+def get_page(endpoint, params):
+    """
+    One page's JSON body, fetched under the endpoint's retry budget and
+    circuit breaker. Returns None, and records the page as missing, when
+    it can't be fetched.
+    """
+    def get():
+        resp = http.get(f'{BASE}/{endpoint}', params=params, timeout=30)
+        if resp.status_code in scrape_http.RETRY_STATUSES:
+            raise resilience.Retry(f'HTTP {resp.status_code}', scrape_http.retry_after(resp, 0.0))
+        if resp.is_client_error:
+            print(f'  {endpoint} page {params["page"]}: HTTP {resp.status_code}')
+            return {}
+        resp.raise_for_status()
+        return resp.json()
+
+    try:
+        return resilience.call(resilience.endpoint(endpoint), get)
+    except (resilience.CircuitOpen, resilience.GiveUp) as e:
+        print(f'  Page {params["page"]} of {endpoint} missing: {e}')
+        missing.add(endpoint, params['page'], params)
+        return None
 
 
 def fetch_paginated(endpoint, params=None, per_page=100):
-    """Fetch all pages from a paginated API endpoint."""
-    params = params or {}
-    params['per_page'] = per_page
+    """
+    Fetch all pages from a paginated API endpoint. A page that fails is
+    recorded as missing and skipped; once the endpoint's breaker opens,
+    the remaining pages are recorded without being requested.
+    """
+    params = {**(params or {}), 'per_page': per_page}
+    health = resilience.endpoint(endpoint)
+    missing.clear(endpoint)
     all_data = []
     page = 1
+    total_pages = None
 
     while True:
-        params['page'] = page
-        for attempt in range(3):
-            try:
-                resp = httpx.get(f'{BASE}/{endpoint}', params=params, timeout=30)
-                resp.raise_for_status()
-                body = resp.json()
+        body = get_page(endpoint, {**params, 'page': page})
+        if body is None:
+            if total_pages is None:
+                # Without page 1 there's no page count; the next run starts over
+                missing.clear(endpoint)
+                print(f'  No first page for {endpoint} — skipping it this run')
+                break
+            if health.state == 'open':
+                missing.add(endpoint, range(page + 1, total_pages + 1), params)
+                print(f'  {endpoint} paused at page {page}/{total_pages}: '
+                      f'{len(missing.pages(endpoint))} pages recorded as missing')
                 break
-            except Exception as e:
-                print(f'  Error on page {page} (attempt {attempt+1}): {e}')
-                if attempt < 2:
-                    time.sleep(5 * (attempt + 1))
-                else:
-                    return all_data
+            page += 1
+            continue
 
         data = body.get('data', [])
         meta = body.get('meta', {})
@@ -52,17 +102,73 @@ def fetch_paginated(endpoint, params=None, per_page=100):
             break
 
         page += 1
-        time.sleep(DELAY)
+        http_cache.pace(DELAY)
 
     return all_data
 
 
+def batch_start(page):
+    return (page - 1) // DOC_BATCH_PAGES * DOC_BATCH_PAGES + 1
+
+
+def batch_file(page):
+    return f'{DEST}/documents/batch_{(page - 1) // DOC_BATCH_PAGES:04d}.json'
+
+
+def refetch_missing():
+    """
+    Retry the pages in missing_pages.json, one at a time once each
+    endpoint's breaker allows it and with a fresh REFETCH_BUDGET, and
+    insert their records back into the file they're missing from (a
+    document batch, or the endpoint's recorded output) at their page's
+    position. Every page but the last is full, so a page's offset is
+    per_page times the pages before it that the file holds.
+    """
+    for endpoint in list(missing.entries):
+        entry = missing.entries[endpoint]
+        per_page = entry.get('params', {}).get('per_page', DOC_PER_PAGE)
+        health = resilience.endpoint(endpoint)
+        health.refill(resilience.REFETCH_BUDGET)
+        health.wait_until_allowed()
+        pages = missing.pages(endpoint)
+        recovered = {}  # output file -> {page: records}
+        for page in pages:
+            body = get_page(endpoint, {**entry.get('params', {}), 'page': page})
+            if body is None:
+                if health.state == 'open':
+                    break
+                continue
+            output = batch_file(page) if endpoint == 'documents' else entry.get('output')
+            if output:
+                recovered.setdefault(output, {})[page] = body.get('data', [])
+            http_cache.pace(DELAY)
+
+        gaps = set(pages)
+        for output, by_page in recovered.items():
+            records = []
+            if os.path.exists(output):
+                with open(output) as f:
+                    records = json.load(f)
+            for page in sorted(by_page):
+                gaps.discard(page)
+                first = batch_start(page) if endpoint == 'documents' else 1
+                held = page - first - sum(1 for g in gaps if first <= g < page)
+                records[held * per_page:held * per_page] = by_page[page]
+            with open(output, 'w') as f:
+                json.dump(records, f, indent=None if endpoint == 'documents' else 2)
+            for page in by_page:
+                missing.done(endpoint, page)
+        done = sum(len(by_page) for by_page in recovered.values())
+        print(f'  {endpoint}: {done}/{len(pages)} missing pages recovered')
+
+
 # === PERSONS (list) ===
 print('\n=== Fetching persons list ===')
 persons = fetch_paginated('persons')
 os.makedirs(f'{DEST}/persons', exist_ok=True)
 with open(f'{DEST}/persons/_all.json', 'w') as f:
     json.dump(persons, f, indent=2)
+missing.set_output('persons', f'{DEST}/persons/_all.json')
 print(f'Got {len(persons)} persons')
 
 # === PERSON DETAILS (individual profiles with connections) ===
@@ -77,19 +183,19 @@ for i, person in enumerate(persons):
         continue
     for attempt in range(3):
         try:
-            resp = httpx.get(f'{BASE}/persons/{slug}', timeout=30)
+            resp = http.get(f'{BASE}/persons/{slug}', timeout=30)
             resp.raise_for_status()
             with open(detail_path, 'w') as f:
                 json.dump(resp.json(), f, indent=2)
             break
         except Exception as e:
             if attempt < 2:
-                time.sleep(5)
+                http_cache.pace(5)
             else:
                 print(f'  Failed: {slug}: {e}')
     if (i + 1) % 50 == 0:
         print(f'  {i + 1}/{len(persons)} person details fetched')
-    time.sleep(DELAY)
+    http_cache.pace(DELAY)
 print(f'Done: {len(persons)} person details')
 
 # === FLIGHTS ===
@@ -97,6 +203,7 @@ print('\n=== Fetching flights ===')
 flights = fetch_paginated('flights')
 with open(f'{DEST}/flights.json', 'w') as f:
     json.dump(flights, f, indent=2)
+missing.set_output('flights', f'{DEST}/flights.json')
 print(f'Got {len(flights)} flights')
 
 # === DOCUMENTS (1.5M records - fetch in batches) ===
@@ -104,7 +211,7 @@ print('\n=== Fetching document index ===')
 os.makedirs(f'{DEST}/documents', exist_ok=True)
 
 try:
-    resp = httpx.get(f'{BASE}/documents', params={'per_page': 1}, timeout=30)
+    resp = http.get(f'{BASE}/documents', params={'per_page': 1}, timeout=30)
     resp.raise_for_status()
     total_docs = resp.json().get('meta', {}).get('total', 0)
     print(f'Total documents: {total_docs:,}')
@@ -113,53 +220,52 @@ except Exception as e:
     total_docs = 0
 
 if total_docs > 0:
-    per_page = 100
-    total_pages = math.ceil(total_docs / per_page)
-    batch_size = 100  # pages per file (10K records per file)
+    total_pages = math.ceil(total_docs / DOC_PER_PAGE)
+    doc_health = resilience.endpoint('documents')
     all_count = 0
 
-    for batch_start in range(1, total_pages + 1, batch_size):
-        batch_end = min(batch_start + batch_size - 1, total_pages)
-        batch_num = (batch_start - 1) // batch_size
-        batch_file = f'{DEST}/documents/batch_{batch_num:04d}.json'
+    for start in range(1, total_pages + 1, DOC_BATCH_PAGES):
+        batch_end = min(start + DOC_BATCH_PAGES - 1, total_pages)
+        batch_num = (start - 1) // DOC_BATCH_PAGES
+        path = batch_file(start)
 
-        if os.path.exists(batch_file):
-            with open(batch_file) as f:
+        if os.path.exists(path):
+            with open(path) as f:
                 existing = json.load(f)
             all_count += len(existing)
             print(f'  Batch {batch_num}: already exists ({len(existing)} records), total: {all_count:,}')
             continue
 
         batch_data = []
-        for page in range(batch_start, batch_end + 1):
-            for attempt in range(3):
-                try:
-                    resp = httpx.get(f'{BASE}/documents',
-                                     params={'per_page': per_page, 'page': page},
-                                     timeout=30)
-                    resp.raise_for_status()
-                    data = resp.json().get('data', [])
-                    batch_data.extend(data)
-                    break
-                except Exception as e:
-                    if attempt < 2:
-                        time.sleep(5 * (attempt + 1))
-                    else:
-                        print(f'  Failed page {page}: {e}')
-            time.sleep(DELAY)
-
-        with open(batch_file, 'w') as f:
+        for page in range(start, batch_end + 1):
+            body = get_page('documents', {'per_page': DOC_PER_PAGE, 'page': page})
+            if body is None and doc_health.state == 'open':
+                # Keep what this batch has; later batches wait for the next run
+                missing.add('documents', range(page + 1, batch_end + 1))
+                break
+            if body is not None:
+                batch_data.extend(body.get('data', []))
+            http_cache.pace(DELAY)
+
+        with open(path, 'w') as f:
             json.dump(batch_data, f)
         all_count += len(batch_data)
         print(f'  Batch {batch_num}: {len(batch_data)} records (total: {all_count:,})')
+        if doc_health.state == 'open':
+            print(f'  Documents paused after batch {batch_num}; rerun to fetch the rest')
+            break
 
     print(f'Done: {all_count:,} document records')
 
+    # Columnar copy of the whole index for column-selective reads
+    batch_files = sorted(Path(f'{DEST}/documents').glob('batch_*.json'))
+    columnar.to_parquet(batch_files, Path(f'{DEST}/documents.parquet'))
+
 # === SEARCH for emails ===
 print('\n=== Searching for emails ===')
 os.makedirs(f'{DEST}/search', exist_ok=True)
 try:
-    resp = httpx.get(f'{BASE}/search', params={'q': 'email', 'type': 'email', 'limit': 100}, timeout=30)
+    resp = http.get(f'{BASE}/search', params={'q': 'email', 'type': 'email', 'limit': 100}, timeout=30)
     resp.raise_for_status()
     with open(f'{DEST}/search/emails.json', 'w') as f:
         json.dump(resp.json(), f, indent=2)
@@ -167,6 +273,23 @@ try:
 except Exception as e:
     print(f'Email search error: {e}')
 
+# === MISSING PAGES ===
+if missing:
+    print('\n=== Refetching missing pages ===')
+    refetch_missing()
+    if total_docs > 0:
+        batch_files = sorted(Path(f'{DEST}/documents').glob('batch_*.json'))
+        columnar.to_parquet(batch_files, Path(f'{DEST}/documents.parquet'))
+for line in resilience.report():
+    print(f'  {line}')
+for endpoint, entry in missing.entries.items():
+    print(f'  {endpoint}: {len(entry["pages"])} pages still missing (see missing_pages.json)')
+
+print(http_cache.summary())
+if http_cache.cache().replay:
+    print('Replay mode: skipping upload')
+    sys.exit(0)
+
 # === Upload everything to Supabase ===
 print('\n=== Uploading to Supabase ===')
 client = create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_SERVICE_ROLE_KEY'])
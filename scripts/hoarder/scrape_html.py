@@ -8,159 +8,455 @@ Targets data NOT available via their /api/v1/ endpoints:
   3. Names directory (73+ entries, single page)
   4. Emails (4,050 claimed, page 1 only accessible)
 
-Strategy: Parse RSC (React Server Components) flight payloads from
-self.__next_f.push() inline scripts. This is more reliable than
-parsing rendered HTML since the data is structured JSON.
-
-Rate limit: 100 req/min → 0.7s between requests.
+Strategy: Decode the RSC (React Server Components) flight payload from
+the self.__next_f.push() inline scripts once per page (rsc.py) and walk
+the element tree. This is more reliable than parsing rendered HTML since
+the data is structured JSON, and records are found by keys, links and
+text rather than by Tailwind class strings. Listing and detail pages are
+requested with the `RSC: 1` header, so the site sends just that payload
+instead of the full HTML page; the HTML is only fetched as a fallback.
+
+Rate limit: 100 req/min, enforced by a token bucket on one pooled
+client (see scrape_http.py) rather than a fixed sleep after each request.
+
+Listings are written to JSONL a page at a time, with a
+<name>.checkpoint.json beside each file; an interrupted run picks up at
+the page after the last one saved. --incremental writes only new or
+changed records and stops once pages stop changing (see incremental.py).
+--debug-html also saves each target's first page as HTML under debug/.
 """
 
-import httpx
 import json
-import time
+import multiprocessing
 import os
 import re
 import sys
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
+
+import html_backend
+import http_cache
+import incremental
+import rsc
+import scrape_http
+from scrape_http import REQUESTS_PER_MINUTE, ScrapeClient, log
 
 BASE_URL = "https://www.epsteininvestigation.org"
 OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", "scraped_html"))
-RATE_LIMIT_DELAY = 0.7
 HEADERS = {
     "User-Agent": "EpsteinCrowdResearch/1.0 (open-source archive project)",
     "Accept": "text/html,application/xhtml+xml",
 }
+# Ask for the bare RSC flight stream instead of the full HTML page
+# (FETCH_RSC=0 to always fetch HTML)
+FETCH_RSC = os.environ.get("FETCH_RSC", "1") != "0"
+RSC_HEADERS = {"RSC": "1", "Accept": "text/x-component"}
+# Consecutive non-flight answers before giving up on RSC for the run
+RSC_MAX_MISSES = int(os.environ.get("RSC_MAX_MISSES", "5"))
+# Detail pages in flight at once; the client's rate limit sets the pace
+DETAIL_WORKERS = int(os.environ.get("DETAIL_WORKERS", "8"))
+# Processes decoding and extracting fetched pages
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+# Listings whose crawl stopped on failed fetches (resumable next run)
+INCOMPLETE = []
 
+_client = None
+_client_lock = threading.Lock()
 
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def get_client():
+    """The scraper's one pooled, rate-limited client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ScrapeClient(headers=HEADERS, per_minute=REQUESTS_PER_MINUTE)
+    return _client
 
 
 def fetch_page(url, retries=3):
-    """Fetch a page with retries."""
-    for attempt in range(retries):
-        try:
-            with httpx.Client(timeout=30, follow_redirects=True, headers=HEADERS) as client:
-                r = client.get(url)
-                r.raise_for_status()
-                return r.text
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code in (404, 403):
-                log(f"  {e.response.status_code} for {url}")
-                return None
-            log(f"  HTTP {e.response.status_code} on attempt {attempt+1}")
-        except Exception as e:
-            log(f"  Error on attempt {attempt+1}: {e}")
-        time.sleep(2 * (attempt + 1))
-    return None
-
-
-def extract_rsc_chunks(html):
-    """Extract and decode RSC flight payloads from self.__next_f.push() scripts."""
-    raw_chunks = re.findall(r'self\.__next_f\.push\(\[1,"(.*?)"\]\)', html, re.DOTALL)
-    decoded = []
-    for chunk in raw_chunks:
-        try:
-            decoded.append(chunk.encode().decode('unicode_escape'))
-        except Exception:
-            decoded.append(chunk)
-    return decoded
-
-
-def extract_rsc_pagination(chunks):
-    """Extract pagination info (current_page, total_pages) from RSC data."""
-    for chunk in chunks:
-        match = re.search(r'"Page ",(\d+)," of ","(\d+)"', chunk)
-        if match:
-            return int(match.group(1)), int(match.group(2))
-    return None, None
-
-
-def extract_json_ld(html):
+    """Fetch a page with retries, within the site's rate limit."""
+    r = get_client().get(url, retries=retries)
+    return r.text if r is not None else None
+
+
+_rsc_supported = FETCH_RSC
+_rsc_misses = 0
+_rsc_lock = threading.Lock()
+
+
+def _note_rsc(hit: bool):
+    """Count consecutive non-flight answers; RSC_MAX_MISSES of them turn RSC off."""
+    global _rsc_supported, _rsc_misses
+    with _rsc_lock:
+        _rsc_misses = 0 if hit else _rsc_misses + 1
+        if _rsc_supported and _rsc_misses >= RSC_MAX_MISSES:
+            log(f"  {_rsc_misses} pages in a row without flight data — fetching HTML from now on")
+            _rsc_supported = False
+
+
+def fetch_payload(url, retries=3):
+    """
+    Fetch a page's RSC flight stream directly (no HTML shell, a fraction
+    of the bytes), or its HTML if the site doesn't serve flight data for
+    it. Either way the result goes to rsc.decode(). The _rsc parameter
+    keeps flight responses apart from HTML ones in caches.
+    """
+    if not _rsc_supported:
+        return fetch_page(url, retries)
+    rsc_url = f"{url}{'&' if '?' in url else '?'}_rsc=1"
+    r = get_client().get(rsc_url, retries=retries, headers=RSC_HEADERS)
+    if r is None:
+        return None
+    hit = "text/x-component" in r.headers.get("content-type", "")
+    _note_rsc(hit)
+    if hit or not rsc.is_flight(r.text):
+        return r.text  # flight data, or the page's HTML
+    # Neither flight data nor HTML: fetch this one page as plain HTML
+    return fetch_page(url, retries)
+
+
+DATE_RE = re.compile(
+    r"^(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s*\d{4}$"
+)
+ORDER_NO_RE = re.compile(r"AMZ-\d{4}-\d{4}-\d{3}")
+PRICE_RE = re.compile(r"^\$[\d,]+(?:\.\d+)?$")
+PHOTO_URL_RE = re.compile(r"^https://[^\"]*supabase\.co/storage/v1/object/public/photos/")
+LOCATION_RE = re.compile(
+    r"Residence|Property|Office|Room|Island|Mansion|Apartment|Ranch|Palm Beach|"
+    r"New York|Manhattan|Virgin|Little St",
+    re.IGNORECASE,
+)
+STREET_RE = re.compile(r"^\d+\s+.*\b(?:Street|St|Ave|Avenue|Blvd|Road|Rd|Dr|Drive|Way|Lane|Place|Court)\b",
+                       re.IGNORECASE)
+
+
+def strings(texts):
+    return [t.strip() for t in texts if isinstance(t, str) and t.strip()]
+
+
+def extract_json_ld(html, flight=None):
     """Extract JSON-LD from RSC data (it's embedded in RSC, not directly in HTML)."""
     results = []
     # JSON-LD is in RSC as dangerouslySetInnerHTML
-    for match in re.finditer(r'"__html":"(\{[^}]*@context[^}]*\}(?:[^"]*\})*)"', html):
-        try:
-            raw = match.group(1).replace('\\"', '"').replace('\\\\', '\\')
-            results.append(json.loads(raw))
-        except (json.JSONDecodeError, Exception):
-            pass
-    # Also try BeautifulSoup for any actual script tags
-    soup = BeautifulSoup(html, "html.parser")
-    for script in soup.find_all("script", type="application/ld+json"):
-        try:
-            results.append(json.loads(script.string))
-        except (json.JSONDecodeError, TypeError):
-            pass
+    flight = flight or rsc.decode(html)
+    for inner in rsc.find_values(flight, "__html"):
+        if isinstance(inner, str) and "@context" in inner:
+            try:
+                results.append(json.loads(inner))
+            except json.JSONDecodeError:
+                pass
+    # Also any actual script tags (scanned, no DOM built)
+    if not rsc.is_flight(html):
+        results.extend(html_backend.json_ld(html))
     return results
 
 
+# ─── PAGINATED LISTINGS ───────────────────────────────────────────────────────
+
+def load_checkpoint(output_path):
+    """Checkpoint for a listing scrape, or {} when starting fresh."""
+    path = output_path.with_suffix(".checkpoint.json")
+    if not path.exists() or not output_path.exists():
+        return {}
+    state = json.loads(path.read_text())
+    # A finished scrape starts over; only interrupted ones resume
+    return {} if state.get("complete") else state
+
+
+def save_checkpoint(output_path, state):
+    path = output_path.with_suffix(".checkpoint.json")
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(path)
+
+
+def parse_pool():
+    """
+    Process pool for the CPU-bound page parsing. Spawned rather than
+    forked: the fetch threads may hold locks at fork time.
+    """
+    return ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parse_listing_page(extract, body, page):
+    """Decode and extract one listing page (runs in the parse pool)."""
+    flight = rsc.decode(body)
+    _, total_pages = rsc.find_pagination(flight)
+    records = extract(body, flight, page)
+    lines = [json.dumps(r) + "\n" for r in records] if records else []
+    return records, lines, total_pages
+
+
+def _fetch_listing(label, list_path, first_page, bounds, log_every):
+    """Yield (page, body) from first_page on until a fetch fails or bounds['last']."""
+    page = first_page
+    while bounds["last"] is None or page <= bounds["last"]:
+        if page == first_page or page % log_every == 0:
+            last = bounds["last"]
+            log(f"  Fetching {label} page {page}{'/' + str(last) if last else ''}...")
+        body = fetch_payload(f"{BASE_URL}/{list_path}?page={page}")
+        yield page, body
+        if not body:
+            return
+        page += 1
+
+
+def crawl_listing(label, list_path, output_path, extract, short_page, log_every=1,
+                  key_fields=("id",)):
+    """Walk /<list_path>?page=N, appending each page's records to a JSONL file.
+
+    extract(html, flight, page) returns the page's records, or None if the
+    site served an error page (skipped; 3 in a row stops the crawl). It
+    must be a module-level function: pages are fetched by a prefetch
+    thread at the rate limit and parsed in a process pool, and the results
+    are written back in page order. Records are flushed and a checkpoint
+    (last page, byte offset, record count) is written after every page, so
+    an interrupted run resumes at the next page with nothing held in
+    memory. Returns the total record count.
+
+    The checkpoint is only marked complete when the listing ran out (last
+    page, short or empty page, or an --incremental unchanged run) and no
+    skipped error page is left. Skipped pages are kept in the checkpoint's
+    failed_pages and retried once the listing runs out, and again at the
+    start of the next run. A crawl stopped by failed fetches keeps its
+    checkpoint, so the next run resumes where it stopped, and the label is
+    added to INCOMPLETE.
+
+    Each record's id (the first of key_fields it has) and content hash go
+    into the endpoint's seen-index. In --incremental mode only new or
+    changed records are written, to the .delta.jsonl beside output_path,
+    and merged into output_path itself; the crawl stops after a run of
+    pages with no changes.
+    """
+    store = output_path
+    seen = incremental.SeenIndex(store, key_fields)
+    unchanged = incremental.UnchangedRun()
+    if incremental.ENABLED:
+        if not len(seen):
+            log(f"  No index of seen {label} yet — crawling everything")
+        output_path = incremental.delta_path(store)
+
+    state = load_checkpoint(output_path)
+    first_page = state.get("last_page", 0) + 1
+    bounds = {"last": state.get("total_pages")}
+    count = state.get("records", 0)
+    consecutive_failures = 0
+    # The listing itself ran out; failed_pages may still need a retry
+    exhausted = state.get("listing_done", False)
+
+    if state:
+        log(f"  Resuming at page {first_page} ({count} {label} already saved)")
+        f = open(output_path, "r+")
+        # Drop anything written after the last checkpoint
+        f.truncate(state["offset"])
+        f.seek(state["offset"])
+        # The last checkpointed page may not have reached the index/store
+        incremental.replay(output_path, store if incremental.ENABLED else None, seen)
+    else:
+        f = open(output_path, "w")
+        if incremental.ENABLED:
+            # A new delta replaces the last one; keep whatever of its
+            # enrichment the last run got to
+            merge_enriched(output_path, store, key_fields)
+            enriched_path(output_path).unlink(missing_ok=True)
+
+    def rendered(page, body, result):
+        """The parse result, from the rendered HTML if the flight payload had no records."""
+        if result[0] == [] and rsc.is_flight(body):
+            # The HTML fallbacks need the rendered page
+            html = fetch_page(f"{BASE_URL}/{list_path}?page={page}")
+            if html:
+                return parse_listing_page(extract, html, page)
+        return result
+
+    def write(records, lines, **progress):
+        """Append one page's records and checkpoint; returns its new/changed records."""
+        nonlocal count
+        changes = seen.changes(records)
+        if incremental.ENABLED:
+            lines = [json.dumps(r) + "\n" for r in changes]
+        f.writelines(lines)
+        f.flush()
+        count += len(lines)
+        state.update(records=count, offset=f.tell(), **progress)
+        save_checkpoint(output_path, state)
+        # Only after the checkpoint: a crash before it refetches the page,
+        # which must still look new; one after it is caught up by replay()
+        if incremental.ENABLED:
+            incremental.merge_into_store(store, changes, seen)
+        seen.save()
+        return changes
+
+    def retry_failed():
+        """Refetch the error pages skipped so far; the ones that fail again stay listed."""
+        pending = state.get("failed_pages", [])
+        if not pending:
+            return
+        log(f"  Retrying {len(pending)} skipped {label} pages")
+        still = []
+        for page in pending:
+            body = fetch_payload(f"{BASE_URL}/{list_path}?page={page}")
+            records, lines, _ = rendered(page, body, parse_listing_page(extract, body, page)) \
+                if body else (None, [], None)
+            if records is None:
+                still.append(page)
+                continue
+            write(records, lines)
+        state["failed_pages"] = still
+        save_checkpoint(output_path, state)
+        log(f"  {len(pending) - len(still)}/{len(pending)} skipped pages recovered")
+
+    def handle(page, body, result):
+        """Write one parsed page; False once the crawl should stop."""
+        nonlocal consecutive_failures, exhausted
+        records, lines, total_pages = rendered(page, body, result)
+
+        # Get pagination from the first page that has it
+        if bounds["last"] is None and total_pages:
+            bounds["last"] = total_pages
+            log(f"  Total pages: {total_pages}")
+
+        if records is None:
+            consecutive_failures += 1
+            state.setdefault("failed_pages", []).append(page)
+            if consecutive_failures >= 3:
+                log("  3 consecutive failures — stopping")
+                return False
+            return True
+        consecutive_failures = 0
+
+        if not records:
+            log(f"  No {label} found on page {page} — stopping")
+            exhausted = True
+            return False
+
+        changes = write(records, lines, last_page=page, total_pages=bounds["last"])
+
+        if page % log_every == 0 or log_every == 1:
+            log(f"  Found {len(records)} {label}, {len(changes)} new/changed (total: {count})")
+
+        if bounds["last"] and page >= bounds["last"]:
+            exhausted = True
+        elif not bounds["last"] and len(records) < short_page:
+            exhausted = True
+        elif incremental.ENABLED and unchanged.page(len(changes)):
+            log(f"  {unchanged.count} pages with no changes — stopping")
+            exhausted = True
+        return not exhausted
+
+    def crawl(parsers):
+        """Fetch and write pages from first_page on until the listing or the fetches run out."""
+        pages = scrape_http.prefetch(_fetch_listing(label, list_path, first_page, bounds, log_every),
+                                     depth=PARSE_WORKERS * 2)
+        inflight = deque()
+        running = True
+        for page, body in pages:
+            if not body:
+                break
+            # Sequence numbers are the page numbers; results are written in order
+            inflight.append((page, body, parsers.submit(parse_listing_page, extract, body, page)))
+            while running and inflight and (inflight[0][2].done() or len(inflight) >= PARSE_WORKERS):
+                page, body, future = inflight.popleft()
+                running = handle(page, body, future.result())
+            if not running:
+                break
+        while running and inflight:
+            page, body, future = inflight.popleft()
+            running = handle(page, body, future.result())
+        pages.close()
+        for _, _, future in inflight:
+            future.cancel()
+
+    with f, parse_pool() as parsers:
+        if not exhausted:
+            # Pages a previous run skipped come first, so they aren't lost for good
+            retry_failed()
+            crawl(parsers)
+        if exhausted:
+            state["listing_done"] = True
+            retry_failed()
+        else:
+            # Pages past the cursor are fetched again on resume anyway
+            last_page = state.get("last_page", 0)
+            state["failed_pages"] = [p for p in state.get("failed_pages", []) if p <= last_page]
+            if last_page:
+                save_checkpoint(output_path, state)
+
+    complete = exhausted and not state.get("failed_pages")
+    if not complete:
+        INCOMPLETE.append(label)
+        if exhausted:
+            log(f"  FAILED: pages {state['failed_pages']} still failing, "
+                f"{count} {label} saved, rerun to retry them")
+        else:
+            log(f"  FAILED after page {state.get('last_page', first_page - 1)}: "
+                f"{count} {label} saved, rerun to resume")
+        return count
+    state.update(records=count, complete=True)
+    save_checkpoint(output_path, state)
+    log(f"  DONE: {count} {label} → {output_path}")
+    return count
+
+
 # ─── ORDERS ───────────────────────────────────────────────────────────────────
 
-def parse_rsc_orders(chunks):
-    """Parse order records from RSC flight data.
+def parse_rsc_orders(flight):
+    """Parse order records from the decoded RSC tree.
 
-    Order rows are spread across individual RSC chunks. Each chunk with
-    an AMZ- order number contains one table row with:
-    [date, item+order#, category_badge, qty, price, view_link]
+    Each order is a table row keyed by the order's UUID, holding
+    [date, item + order#, category badge, qty, price, view link].
+    The row is found from its AMZ- order number; fields are picked by
+    content and position relative to the order number.
     """
     orders = []
+    seen = set()
 
-    for chunk in chunks:
-        if "AMZ-" not in chunk:
+    for el, ancestors in flight.elements():
+        if not any(isinstance(t, str) and ORDER_NO_RE.search(t) for t in flight.own_texts(el)):
             continue
-
-        # Each chunk with AMZ- contains one order row
-        uuid_match = re.search(
-            r'"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"',
-            chunk
-        )
-        if not uuid_match:
+        row = rsc.record_root(flight, ancestors + (el,), "/orders/")
+        if id(row) in seen:
             continue
-
-        order = {"id": uuid_match.group(1)}
-
-        # Date
-        m = re.search(
-            r'font-mono text-sm","children":"'
-            r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s*\d{4})"',
-            chunk
-        )
-        if m:
-            order["date"] = m.group(1)
-
-        # Item name
-        m = re.search(r'font-medium line-clamp-2","children":"([^"]+)"', chunk)
-        if m:
-            order["item"] = m.group(1)
-
-        # Order number
-        m = re.search(r'(AMZ-\d{4}-\d{4}-\d{3})', chunk)
-        if m:
-            order["order_number"] = m.group(1)
-
-        # Category
-        m = re.search(r'secondary/90 text-xs","children":"([^"]+)"', chunk)
-        if m:
-            order["category"] = m.group(1)
-
-        # Quantity (bare number)
-        m = re.search(r'text-center","children":(\d+)', chunk)
-        if m:
-            order["quantity"] = int(m.group(1))
-
-        # Price (double $$ in RSC encoding)
-        m = re.search(r'text-right font-mono text-sm","children":"\$\$([^"]+)"', chunk)
-        if m:
-            order["price"] = f"${m.group(1)}"
-
-        # Detail URL
-        m = re.search(r'"href":"(/orders/[^"]+)"', chunk)
-        if m:
-            order["detail_url"] = m.group(1)
+        seen.add(id(row))
+
+        texts = flight.texts(row)
+        at = next(i for i, t in enumerate(texts) if isinstance(t, str) and ORDER_NO_RE.search(t))
+        before, after = strings(texts[:at]), texts[at + 1:]
+        hrefs = flight.hrefs(row, "/orders/")
+
+        order_id = row.key if rsc.is_uuid(row.key) else None
+        if not order_id and hrefs and rsc.is_uuid(hrefs[0].rsplit("/", 1)[-1]):
+            order_id = hrefs[0].rsplit("/", 1)[-1]
+        order = {"id": order_id} if order_id else {}
+
+        dates = [t for t in before if DATE_RE.match(t)]
+        if dates:
+            order["date"] = dates[0]
+
+        # Item name sits just above the order number in the same cell
+        items = [t for t in before if not DATE_RE.match(t) and not t.lower().startswith("order")]
+        if items:
+            order["item"] = items[-1]
+
+        order["order_number"] = ORDER_NO_RE.search(texts[at]).group()
+
+        for t in after:
+            if isinstance(t, (int, float)) and not isinstance(t, bool):
+                order.setdefault("quantity", int(t))
+            elif isinstance(t, str) and t.strip():
+                t = t.strip()
+                if PRICE_RE.match(t):
+                    order.setdefault("price", t)
+                elif "quantity" not in order and "price" not in order:
+                    order.setdefault("category", t)
+
+        if hrefs:
+            order["detail_url"] = hrefs[0]
 
         if order.get("item"):
             orders.append(order)
@@ -168,221 +464,125 @@ def parse_rsc_orders(chunks):
     return orders
 
 
+def extract_orders(html, flight, page):
+    # Extract "Showing X-Y of Z" info
+    if page == 1:
+        showing = rsc.find_showing(flight)
+        if showing:
+            log(f"  Showing {showing[0]}-{showing[1]} of {showing[2]} orders")
+    return parse_rsc_orders(flight)
+
+
 def scrape_orders():
     """Scrape Amazon purchase orders from /orders pages."""
     log("=== Scraping Amazon Orders ===")
-    all_orders = []
-    page = 1
-    total_pages = None
-
-    while True:
-        url = f"{BASE_URL}/orders?page={page}"
-        log(f"  Fetching page {page}{'/' + str(total_pages) if total_pages else ''}...")
-        html = fetch_page(url)
-        if not html:
-            break
-
-        chunks = extract_rsc_chunks(html)
-
-        # Get pagination on first page
-        if total_pages is None:
-            _, total_pages = extract_rsc_pagination(chunks)
-            if total_pages:
-                log(f"  Total pages: {total_pages}")
-
-        # Extract "Showing X-Y of Z" info
-        for chunk in chunks:
-            showing = re.search(r'"Showing ",(\d+),"-",(\d+)," of"," ","(\d+)"', chunk)
-            if showing and page == 1:
-                log(f"  Showing {showing.group(1)}-{showing.group(2)} of {showing.group(3)} orders")
-
-        orders = parse_rsc_orders(chunks)
-        if not orders:
-            log(f"  No orders found on page {page} — stopping")
-            break
-
-        all_orders.extend(orders)
-        log(f"  Found {len(orders)} orders (total: {len(all_orders)})")
-
-        if total_pages and page >= total_pages:
-            break
-        if not total_pages and len(orders) < 20:
-            break
-
-        page += 1
-        time.sleep(RATE_LIMIT_DELAY)
-
-    # Save
-    output_path = OUTPUT_DIR / "amazon_orders.jsonl"
-    with open(output_path, "w") as f:
-        for order in all_orders:
-            f.write(json.dumps(order) + "\n")
-    log(f"  DONE: {len(all_orders)} orders → {output_path}")
-    return len(all_orders)
+    return crawl_listing("orders", "orders", OUTPUT_DIR / "amazon_orders.jsonl",
+                         extract_orders, short_page=20,
+                         key_fields=("id", "order_number", "detail_url"))
 
 
 # ─── PHOTOS ───────────────────────────────────────────────────────────────────
 
-def parse_rsc_photos(chunks):
-    """Parse photo metadata from RSC flight data."""
+def parse_rsc_photos(flight):
+    """Parse photo metadata from the decoded RSC tree (one card per photo image)."""
     photos = []
+    seen = set()
 
-    for chunk in chunks:
-        if "supabase.co/storage" not in chunk and "/photos/" not in chunk:
+    for el, ancestors in flight.elements():
+        src = el.props.get("src")
+        if not isinstance(src, str) or not PHOTO_URL_RE.match(src) or src in seen:
             continue
+        seen.add(src)
 
-        # Photos have image URLs and metadata in card components
-        # Find image URLs
-        img_pattern = re.compile(
-            r'"src":"(https://[^"]*supabase\.co/storage/v1/object/public/photos/[^"]+)"'
-        )
-        # Find photo detail links
-        link_pattern = re.compile(r'"href":"(/photos/[^"]+)"')
-        # Find alt text / titles
-        alt_pattern = re.compile(r'"alt":"([^"]+)"')
-
-        # Try to find structured photo cards
-        # Each photo card typically has an image, title, location, source
-        card_splits = re.split(r'(?=\$L\w+","[0-9a-f]{8}-)', chunk)
-
-        for card in card_splits:
-            img_match = img_pattern.search(card)
-            if not img_match:
-                continue
+        chain = ancestors + (el,)
+        card = rsc.record_root(flight, chain, "/photos/")
+        photo = {"image_url": src}
 
-            photo = {"image_url": img_match.group(1)}
+        if isinstance(el.props.get("alt"), str) and el.props["alt"]:
+            photo["title"] = el.props["alt"]
 
-            alt_match = alt_pattern.search(card)
-            if alt_match:
-                photo["title"] = alt_match.group(1)
+        # The card's link may wrap it, so look both inside and above it
+        hrefs = flight.hrefs(card, "/photos/") or [
+            a.props["href"] for a in reversed(chain)
+            if isinstance(a.props.get("href"), str) and a.props["href"].startswith("/photos/")
+        ]
+        if hrefs:
+            photo["detail_url"] = hrefs[0]
 
-            link_match = link_pattern.search(card)
-            if link_match:
-                photo["detail_url"] = link_match.group(1)
+        texts = strings(flight.texts(card))
+        locations = [t for t in texts if LOCATION_RE.search(t)]
+        if locations:
+            photo["location"] = locations[0]
 
-            # Location
-            loc_match = re.search(r'"children":"([^"]*(?:Residence|Property|Office|Room|Island|Mansion|Apartment|Ranch|Palm Beach|New York|Manhattan|Virgin|Little St)[^"]*)"', card, re.IGNORECASE)
-            if loc_match:
-                photo["location"] = loc_match.group(1)
+        # Source is the outline badge on the card
+        for badge, _ in flight.elements(card):
+            if badge.props.get("variant") == "outline" or \
+                    str(badge.props.get("className", "")).endswith("outline"):
+                label = flight.text(badge).strip()
+                if label:
+                    photo["source"] = label
+                    break
 
-            # Source
-            src_match = re.search(r'outline","children":"([^"]+)"', card)
-            if src_match:
-                photo["source"] = src_match.group(1)
+        photos.append(photo)
+
+    return photos
 
-            photos.append(photo)
 
+def extract_photos(html, flight, page):
+    photos = parse_rsc_photos(flight)
+    if not photos and not rsc.is_flight(html):
+        # Fallback: parse the rendered HTML
+        doc = html_backend.parse(html)
+        for img in doc.find_all("img", "src", r"supabase\.co/storage"):
+            photo = {"image_url": img.get("src", ""), "alt": img.get("alt", "")}
+            link = img.find_parent("a", "href")
+            if link:
+                photo["detail_url"] = link.get("href")
+            photos.append(photo)
     return photos
 
 
 def scrape_photos():
     """Scrape photo metadata from /photos pages."""
     log("=== Scraping Photo Metadata ===")
-    all_photos = []
-    page = 1
-    total_pages = None
-
-    while True:
-        url = f"{BASE_URL}/photos?page={page}"
-        if page == 1 or page % 10 == 0:
-            log(f"  Fetching page {page}{'/' + str(total_pages) if total_pages else ''}...")
-        html = fetch_page(url)
-        if not html:
-            break
-
-        chunks = extract_rsc_chunks(html)
-
-        if total_pages is None:
-            _, total_pages = extract_rsc_pagination(chunks)
-            if total_pages:
-                log(f"  Total pages: {total_pages}")
-
-        photos = parse_rsc_photos(chunks)
-
-        if not photos:
-            # Fallback: try BeautifulSoup
-            soup = BeautifulSoup(html, "html.parser")
-            for img in soup.find_all("img", src=re.compile(r"supabase\.co/storage")):
-                photo = {"image_url": img.get("src", ""), "alt": img.get("alt", "")}
-                link = img.find_parent("a", href=True)
-                if link:
-                    photo["detail_url"] = link["href"]
-                photos.append(photo)
-
-        if not photos:
-            log(f"  No photos found on page {page} — stopping")
-            break
-
-        all_photos.extend(photos)
-
-        if page % 10 == 0:
-            log(f"  {len(all_photos)} photos so far...")
-
-        if total_pages and page >= total_pages:
-            break
-        if not total_pages and len(photos) < 10:
-            break
-
-        page += 1
-        time.sleep(RATE_LIMIT_DELAY)
-
-    output_path = OUTPUT_DIR / "photos_metadata.jsonl"
-    with open(output_path, "w") as f:
-        for photo in all_photos:
-            f.write(json.dumps(photo) + "\n")
-    log(f"  DONE: {len(all_photos)} photos → {output_path}")
-    return len(all_photos)
+    return crawl_listing("photos", "photos", OUTPUT_DIR / "photos_metadata.jsonl",
+                         extract_photos, short_page=10, log_every=10, key_fields=("image_url",))
 
 
 # ─── NAMES ────────────────────────────────────────────────────────────────────
 
-def parse_rsc_names(chunks):
-    """Parse name entries from RSC flight data."""
+def parse_rsc_names(flight):
+    """Parse name entries from the decoded RSC tree (one card per /names/ link)."""
     names = []
+    seen = set()
 
-    for chunk in chunks:
-        if "/names/" not in chunk:
+    for el, ancestors in flight.elements():
+        href = el.props.get("href")
+        if not isinstance(href, str) or not href.startswith("/names/") or href in seen:
             continue
+        seen.add(href)
 
-        # Names have profile links and metadata
-        # Pattern: href to /names/slug, with name text, role, counts
-        name_pattern = re.compile(
-            r'"href":"(/names/[^"]+)".*?'
-            r'"children":"([^"]+)"',
-            re.DOTALL
-        )
+        card = rsc.record_root(flight, ancestors + (el,), "/names/")
+        entry = {"profile_url": href}
 
-        # Find all name cards by splitting on card boundaries
-        card_splits = re.split(r'(?=\["\\?\$","\\?\$L)', chunk)
+        link_texts = strings(flight.texts(el))
+        texts = strings(flight.texts(card))
+        name = link_texts[0] if link_texts else (texts[0] if texts else None)
+        if name:
+            entry["name"] = name
 
-        for card in card_splits:
-            href_match = re.search(r'"href":"(/names/[^"]+)"', card)
-            if not href_match:
-                continue
-
-            entry = {"profile_url": href_match.group(1)}
-
-            # Find name (usually in a bold/semibold element right after the link)
-            name_matches = re.findall(r'(?:semibold|font-medium)[^"]*","children":"([^"]+)"', card)
-            if name_matches:
-                entry["name"] = name_matches[0]
-
-            # Find role/description
-            role_match = re.search(r'text-muted-foreground[^"]*","children":"([^"]{10,})"', card)
-            if role_match:
-                entry["role"] = role_match.group(1)
+        roles = [t for t in texts if len(t) >= 10 and t != name]
+        if roles:
+            entry["role"] = roles[0]
 
-            # Find counts (numbers near icons)
-            count_matches = re.findall(r'"children":(\d+)', card)
-            if len(count_matches) >= 1:
-                entry["document_count"] = int(count_matches[0])
-            if len(count_matches) >= 2:
-                entry["flight_count"] = int(count_matches[1])
-            if len(count_matches) >= 3:
-                entry["email_count"] = int(count_matches[2])
+        # Counts next to the document / flight / email icons
+        counts = [int(t) for t in flight.texts(card)
+                  if isinstance(t, (int, float)) and not isinstance(t, bool)]
+        for field, value in zip(("document_count", "flight_count", "email_count"), counts):
+            entry[field] = value
 
-            if entry.get("name"):
-                names.append(entry)
+        if entry.get("name"):
+            names.append(entry)
 
     return names
 
@@ -397,25 +597,25 @@ def scrape_names():
         return 0
 
     # Try RSC parsing first
-    chunks = extract_rsc_chunks(html)
-    names = parse_rsc_names(chunks)
+    flight = rsc.decode_page(html)
+    names = parse_rsc_names(flight)
 
-    # Fallback: BeautifulSoup
+    # Fallback: rendered HTML
     if not names:
         log("  RSC parsing found 0 names, falling back to HTML parsing")
-        soup = BeautifulSoup(html, "html.parser")
-        for link in soup.find_all("a", href=re.compile(r"/names/")):
+        doc = html_backend.parse(html)
+        for link in doc.find_all("a", "href", r"/names/"):
             name_text = link.get_text(strip=True)
             if not name_text or len(name_text) < 2:
                 continue
             entry = {"name": name_text, "profile_url": link.get("href", "")}
-            parent = link.find_parent("div", class_=True) or link.find_parent("li")
+            parent = link.find_parent("div", "class") or link.find_parent("li")
             if parent:
                 entry["raw_text"] = parent.get_text(separator="|", strip=True)
             names.append(entry)
 
     # Also extract from JSON-LD
-    json_ld = extract_json_ld(html)
+    json_ld = extract_json_ld(html, flight)
     for item in json_ld:
         if isinstance(item, dict) and "itemListElement" in item:
             for elem in item["itemListElement"]:
@@ -444,214 +644,219 @@ def scrape_names():
 
 # ─── EMAILS ───────────────────────────────────────────────────────────────────
 
-def parse_rsc_emails(chunks):
-    """Parse email records from RSC flight data."""
+def parse_rsc_emails(flight):
+    """Parse email records from the decoded RSC tree (one card per /emails/ link)."""
     emails = []
+    seen = set()
 
-    for chunk in chunks:
-        if "/emails/" not in chunk and "email" not in chunk.lower():
+    for el, ancestors in flight.elements():
+        href = el.props.get("href")
+        if not isinstance(href, str) or not href.startswith("/emails/") or href in seen:
             continue
+        seen.add(href)
 
-        # Email cards: sender, recipient, subject, date, preview
-        card_splits = re.split(r'(?=\$L\w+","[0-9a-f]{8}-)', chunk)
+        card = rsc.record_root(flight, ancestors + (el,), "/emails/")
+        texts = strings(flight.texts(card))
+        email = {"detail_url": href}
 
-        for card in card_splits:
-            if len(card) < 100:
-                continue
+        dates = [t for t in texts if DATE_RE.match(t)]
+        if dates:
+            email["date"] = dates[0]
 
-            email = {}
+        sender = rsc.label_value(texts, "From") or rsc.label_value(texts, "Sender")
+        if sender:
+            email["from"] = sender
+        recipient = rsc.label_value(texts, "To") or rsc.label_value(texts, "Recipient")
+        if recipient:
+            email["to"] = recipient
 
-            # Detail link
-            href_match = re.search(r'"href":"(/emails/[^"]+)"', card)
-            if href_match:
-                email["detail_url"] = href_match.group(1)
+        labels = {"from", "to", "sender", "recipient", "from:", "to:"}
+        plain = [t for t in texts if t.lower() not in labels and t not in dates
+                 and t not in (sender, recipient)]
+        subjects = [t for t in plain if len(t) >= 5]
+        if subjects:
+            email["subject"] = subjects[0]
 
-            # Date
-            date_match = re.search(
-                r'"children":"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4})"',
-                card
-            )
-            if date_match:
-                email["date"] = date_match.group(1)
+        previews = [t for t in plain if len(t) >= 30]
+        if previews:
+            email["preview"] = max(previews, key=len)
 
-            # From/To — look for name patterns
-            from_match = re.search(r'(?:From|Sender)[^"]*"children":"([^"]+)"', card)
-            if from_match:
-                email["from"] = from_match.group(1)
+        emails.append(email)
 
-            to_match = re.search(r'(?:To|Recipient)[^"]*"children":"([^"]+)"', card)
-            if to_match:
-                email["to"] = to_match.group(1)
+    return emails
 
-            # Subject
-            subject_match = re.search(r'"font-medium[^"]*","children":"([^"]{5,})"', card)
-            if subject_match:
-                email["subject"] = subject_match.group(1)
 
-            # Preview/body text
-            text_matches = re.findall(r'"children":"([^"]{30,})"', card)
-            if text_matches:
-                email["preview"] = max(text_matches, key=len)
+def extract_emails(html, flight, page):
+    # Check for error messages
+    page_text = " ".join(strings(flight.page_texts())).lower()
+    if "unable to load" in page_text or "unavailable" in page_text:
+        log(f"  Database error on page {page}")
+        return None
 
-            if email.get("detail_url") or email.get("subject"):
-                emails.append(email)
+    emails = parse_rsc_emails(flight)
 
+    # Fallback: rendered HTML
+    if not emails and not rsc.is_flight(html):
+        doc = html_backend.parse(html)
+        for link in doc.find_all("a", "href", r"/emails/"):
+            parent = link.find_parent("div", "class")
+            if parent:
+                text = parent.get_text(separator="|", strip=True)
+                if len(text) > 20:
+                    email = {"detail_url": link.get("href", ""), "raw_text": text}
+                    # Extract date
+                    dm = re.search(
+                        r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4}',
+                        text
+                    )
+                    if dm:
+                        email["date"] = dm.group()
+                    emails.append(email)
     return emails
 
 
 def scrape_emails():
     """Scrape email records from /emails pages."""
     log("=== Scraping Emails ===")
-    all_emails = []
-    page = 1
-    total_pages = None
-    consecutive_failures = 0
+    return crawl_listing("emails", "emails", OUTPUT_DIR / "emails.jsonl",
+                         extract_emails, short_page=10, key_fields=("detail_url",))
 
-    while True:
-        url = f"{BASE_URL}/emails?page={page}"
-        log(f"  Fetching page {page}{'/' + str(total_pages) if total_pages else ''}...")
-        html = fetch_page(url)
-        if not html:
-            break
-
-        chunks = extract_rsc_chunks(html)
 
-        if total_pages is None:
-            _, total_pages = extract_rsc_pagination(chunks)
-            if total_pages:
-                log(f"  Total pages: {total_pages}")
+# ─── DETAIL PAGE ENRICHMENT ────────────────────────────────────────────────────
 
-        # Check for error messages
-        has_error = any("unable to load" in c.lower() or "unavailable" in c.lower() for c in chunks)
-        if has_error:
-            log(f"  Database error on page {page}")
-            consecutive_failures += 1
-            if consecutive_failures >= 3:
-                log("  3 consecutive failures — stopping")
-                break
-            page += 1
-            time.sleep(2)
-            continue
+def _record_key(record, url_field):
+    """Identity of a record across the input and the enriched output."""
+    return record.get(url_field) or json.dumps(record, sort_keys=True)
 
-        consecutive_failures = 0
-        emails = parse_rsc_emails(chunks)
-
-        # Fallback: BeautifulSoup
-        if not emails:
-            soup = BeautifulSoup(html, "html.parser")
-            for link in soup.find_all("a", href=re.compile(r"/emails/")):
-                parent = link.find_parent("div", class_=True)
-                if parent:
-                    text = parent.get_text(separator="|", strip=True)
-                    if len(text) > 20:
-                        email = {"detail_url": link.get("href", ""), "raw_text": text}
-                        # Extract date
-                        dm = re.search(
-                            r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4}',
-                            text
-                        )
-                        if dm:
-                            email["date"] = dm.group()
-                        emails.append(email)
-
-        if not emails:
-            log(f"  No emails found on page {page} — stopping")
-            break
-
-        all_emails.extend(emails)
-        log(f"  Found {len(emails)} emails (total: {len(all_emails)})")
-
-        if total_pages and page >= total_pages:
-            break
-        if not total_pages and len(emails) < 10:
-            break
 
-        page += 1
-        time.sleep(RATE_LIMIT_DELAY)
+def enriched_path(jsonl_path):
+    return jsonl_path.with_name(jsonl_path.stem + "_enriched.jsonl")
 
-    output_path = OUTPUT_DIR / "emails.jsonl"
-    with open(output_path, "w") as f:
-        for email in all_emails:
-            f.write(json.dumps(email) + "\n")
-    log(f"  DONE: {len(all_emails)} emails → {output_path}")
-    return len(all_emails)
 
+def merge_enriched(delta_path, store_path, key_fields):
+    """
+    Fold a delta's _enriched.jsonl into the main file's, replacing records
+    by id (so merging the same delta twice is harmless). Used in
+    --incremental mode so enriched changes outlive the delta they came from.
+    """
+    src = enriched_path(delta_path)
+    if not src.exists():
+        return 0
+    seen = incremental.SeenIndex(store_path, key_fields)
+    with open(src) as f:
+        # A torn final line is dropped; its record is enriched again later
+        changes = [{**json.loads(line), "_change": "changed"} for line in f if line.endswith("\n")]
+    incremental.merge_into_store(enriched_path(store_path), changes, seen)
+    return len(changes)
 
-# ─── DETAIL PAGE ENRICHMENT ────────────────────────────────────────────────────
 
-def enrich_from_details(jsonl_path, label, url_field, parse_fn):
-    """Fetch detail pages for each record and merge extra fields."""
+def enrich_from_details(jsonl_path, label, url_field, parse_fn, workers=DETAIL_WORKERS):
+    """
+    Fetch detail pages for each record and merge extra fields.
+
+    Detail pages are fetched by `workers` threads sharing the rate-limited
+    client and parsed in a process pool. Each enriched record (or one
+    with no detail URL) is appended to <name>_enriched.jsonl as soon as it
+    is done, in completion order, and records already in that file are
+    skipped. A record whose detail page couldn't be fetched or parsed is
+    left out, so a rerun retries it. The input is streamed, not loaded whole.
+    """
     log(f"=== Enriching {label} from detail pages ===")
 
-    records = []
-    with open(jsonl_path) as f:
-        for line in f:
-            records.append(json.loads(line))
-
-    urls = [r.get(url_field) for r in records if r.get(url_field)]
-    log(f"  {len(urls)} detail pages to fetch")
-
-    enriched_count = 0
-    for i, record in enumerate(records):
+    out_path = enriched_path(jsonl_path)
+    done = set()
+    if out_path.exists():
+        with open(out_path, "r+") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn final line from an interrupted run
+                done.add(_record_key(json.loads(line), url_field))
+                offset += len(line.encode())
+            f.truncate(offset)
+        if done:
+            log(f"  Resuming: {len(done)} {label} already enriched")
+
+    def fetch_and_parse(record):
+        """(record, 'enriched' | 'no_url' | 'failed')"""
         detail_url = record.get(url_field)
         if not detail_url:
-            continue
-
+            return record, "no_url"
         full_url = f"{BASE_URL}{detail_url}" if detail_url.startswith("/") else detail_url
-        html = fetch_page(full_url)
+        html = fetch_payload(full_url)
         if not html:
-            continue
-
-        extra = parse_fn(html)
-        if extra:
-            record.update(extra)
-            enriched_count += 1
-
-        if (i + 1) % 10 == 0:
-            log(f"  {i + 1}/{len(records)} processed...")
-
-        time.sleep(RATE_LIMIT_DELAY)
-
-    # Save enriched version
-    enriched_path = jsonl_path.with_name(jsonl_path.stem + "_enriched.jsonl")
-    with open(enriched_path, "w") as f:
-        for record in records:
-            f.write(json.dumps(record) + "\n")
-    log(f"  DONE: {enriched_count}/{len(records)} enriched → {enriched_path}")
+            return record, "failed"
+        extra = parsers.submit(parse_fn, html).result()
+        if not extra:
+            return record, "failed"
+        record.update(extra)
+        return record, "enriched"
+
+    enriched_count = processed = failed = 0
+    with open(jsonl_path) as src, open(out_path, "a") as out, \
+            parse_pool() as parsers, ThreadPoolExecutor(workers) as fetchers:
+        pending = set()
+
+        def drain():
+            nonlocal enriched_count, processed, failed
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.discard(future)
+                record, status = future.result()
+                if status == "failed":
+                    failed += 1
+                else:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    enriched_count += status == "enriched"
+                processed += 1
+                if processed % 50 == 0:
+                    log(f"  {processed} processed ({enriched_count} enriched, {failed} failed)...")
+
+        for line in src:
+            record = json.loads(line)
+            if _record_key(record, url_field) in done:
+                continue
+            pending.add(fetchers.submit(fetch_and_parse, record))
+            # Keep a bounded window in flight so memory stays flat
+            if len(pending) >= workers * 4:
+                drain()
+        while pending:
+            drain()
+
+    log(f"  DONE: {enriched_count}/{processed} enriched this run → {out_path}"
+        f"{f' ({failed} failed, retried next run)' if failed else ''}")
     return enriched_count
 
 
 def parse_order_detail(html):
     """Extract extra fields from an order detail page."""
     extra = {}
-    chunks = extract_rsc_chunks(html)
-    all_text = " ".join(chunks)
+    flight = rsc.decode(html)
+    texts = strings(flight.page_texts())
 
     # Shipping address
-    addr_match = re.search(
-        r'"children":"(\d+\s+[^"]*(?:Street|Ave|Blvd|Road|Dr|Way|Lane|Place|Court)[^"]*)"',
-        all_text, re.IGNORECASE
-    )
-    if addr_match:
-        extra["shipping_address"] = addr_match.group(1)
+    addresses = [t for t in texts if STREET_RE.match(t)]
+    if addresses:
+        extra["shipping_address"] = addresses[0]
 
     # Ship To
-    ship_match = re.search(r'"Ship To[^"]*","([^"]+)"', all_text)
-    if not ship_match:
-        ship_match = re.search(r'Ship[^"]*To[^"]*"children":"([^"]+)"', all_text)
-    if ship_match:
-        extra["ship_to"] = ship_match.group(1)
+    ship_to = rsc.label_value(texts, "Ship To")
+    if ship_to:
+        extra["ship_to"] = ship_to
 
     # Product description (longer than list view)
-    desc_match = re.search(r'"description":"([^"]{50,})"', all_text)
-    if desc_match:
-        extra["description"] = desc_match.group(1)
+    descriptions = [d for d in rsc.find_values(flight, "description")
+                    if isinstance(d, str) and len(d) >= 50]
+    if descriptions:
+        extra["description"] = descriptions[0]
 
     # Any additional fields
     for field in ["asin", "tracking", "seller"]:
-        m = re.search(rf'"{field}[^"]*":"([^"]+)"', all_text, re.IGNORECASE)
-        if m:
-            extra[field] = m.group(1)
+        values = [v for v in rsc.find_values(flight, field) if isinstance(v, str) and v]
+        value = values[0] if values else rsc.label_value(texts, field)
+        if value:
+            extra[field] = value
 
     return extra if extra else None
 
@@ -659,55 +864,38 @@ def parse_order_detail(html):
 def parse_email_detail(html):
     """Extract full body text and metadata from an email detail page."""
     extra = {}
-    chunks = extract_rsc_chunks(html)
-    all_text = " ".join(chunks)
+    flight = rsc.decode(html)
+    texts = strings(flight.page_texts())
 
     # Sender with email
-    from_match = re.search(
-        r'"children":"([^"]+@[^"]+)"',
-        all_text
-    )
-    if from_match:
-        extra["sender_email"] = from_match.group(1)
+    addresses = [t for t in texts if "@" in t and " " not in t]
+    if addresses:
+        extra["sender_email"] = addresses[0]
 
     # Sender name
-    from_name = re.search(r'(?:From|Sender)[^"]*"children":"([^"@]+)"', all_text)
-    if from_name:
-        extra["sender_name"] = from_name.group(1).strip()
+    sender = rsc.label_value(texts, "From") or rsc.label_value(texts, "Sender")
+    if sender and "@" not in sender:
+        extra["sender_name"] = sender
 
     # Recipient with email
-    to_match = re.search(
-        r'(?:To|Recipient)[^"]*"children":"([^"]+@[^"]+)"',
-        all_text
-    )
-    if to_match:
-        extra["recipient_email"] = to_match.group(1)
+    recipient = rsc.label_value(texts, "To") or rsc.label_value(texts, "Recipient")
+    if recipient and "@" in recipient:
+        extra["recipient_email"] = recipient
 
     # Subject
-    subject_match = re.search(r'(?:Subject|Re:)[^"]*"children":"([^"]+)"', all_text)
-    if subject_match:
-        extra["subject"] = subject_match.group(1)
-
-    # Full body text — usually the longest text segment
-    text_segments = re.findall(r'"children":"([^"]{40,})"', all_text)
-    if text_segments:
-        # Filter out CSS classes and HTML-like strings
-        body_candidates = [
-            t for t in text_segments
-            if not any(skip in t for skip in ["className", "flex ", "grid ", "rounded", "border"])
-        ]
-        if body_candidates:
-            extra["body"] = max(body_candidates, key=len)
+    subject = rsc.label_value(texts, "Subject")
+    if subject:
+        extra["subject"] = subject
+
+    # Full body text — the longest text leaf (class names never reach here)
+    bodies = [t for t in texts if len(t) >= 40]
+    if bodies:
+        extra["body"] = max(bodies, key=len)
 
     # Date
-    date_match = re.search(
-        r'"children":"((?:January|February|March|April|May|June|July|August|'
-        r'September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|'
-        r'Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4})"',
-        all_text
-    )
-    if date_match:
-        extra["date"] = date_match.group(1)
+    dates = [t for t in texts if DATE_RE.match(t)]
+    if dates:
+        extra["date"] = dates[0]
 
     return extra if extra else None
 
@@ -724,25 +912,33 @@ def save_raw_html(html, name):
 def main():
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     log(f"Output directory: {OUTPUT_DIR}")
-    log(f"Rate limit delay: {RATE_LIMIT_DELAY}s between requests")
-
-    targets = sys.argv[1:] if len(sys.argv) > 1 else ["orders", "names", "emails", "photos"]
+    log(f"Rate limit: {REQUESTS_PER_MINUTE} requests/min")
+
+    # --cache uses the response cache, --replay runs entirely from it; default is live
+    args = http_cache.parse_flags(sys.argv[1:])
+    # --incremental writes only new/changed records (see incremental.py)
+    args = incremental.parse_flags(args)
+    # --debug-html saves each target's first page as HTML, at one extra
+    # request per target (the crawl itself fetches flight payloads)
+    debug_html = "--debug-html" in args
+    args = [a for a in args if a != "--debug-html"]
+    targets = args if args else ["orders", "names", "emails", "photos"]
     log(f"Targets: {targets}")
 
-    # Save first page HTML for debugging
-    log("\n=== Saving debug HTML samples ===")
-    url_map = {
-        "orders": f"{BASE_URL}/orders",
-        "names": f"{BASE_URL}/names",
-        "emails": f"{BASE_URL}/emails",
-        "photos": f"{BASE_URL}/photos",
-    }
-    for target in targets:
-        if target in url_map:
-            html = fetch_page(url_map[target])
-            if html:
-                save_raw_html(html, target)
-                log(f"  Saved debug HTML for {target} ({len(html):,} bytes)")
+    if debug_html:
+        log("\n=== Saving debug HTML samples ===")
+        url_map = {
+            "orders": f"{BASE_URL}/orders?page=1",
+            "names": f"{BASE_URL}/names",
+            "emails": f"{BASE_URL}/emails?page=1",
+            "photos": f"{BASE_URL}/photos?page=1",
+        }
+        for target in targets:
+            if target in url_map:
+                html = fetch_page(url_map[target])
+                if html:
+                    save_raw_html(html, target)
+                    log(f"  Saved debug HTML for {target} ({len(html):,} bytes)")
 
     results = {}
 
@@ -775,29 +971,39 @@ def main():
     log(f"\nTotal: {total_files} files, {total_size / 1024:.1f} KB")
 
     # Phase 2: Enrich from detail pages
-    if "details" in targets or not sys.argv[1:]:
+    if "details" in targets or not args:
         log("")
         log("=" * 60)
         log("PHASE 2: Detail Page Enrichment")
         log("=" * 60)
 
-        # Enrich orders with shipping addresses
+        # Enrich orders with shipping addresses (only the delta if
+        # incremental, merged into amazon_orders_enriched.jsonl after)
         orders_path = OUTPUT_DIR / "amazon_orders.jsonl"
+        if incremental.ENABLED:
+            orders_path = incremental.delta_path(orders_path)
         if orders_path.exists():
             enriched = enrich_from_details(
                 orders_path, "orders", "detail_url",
                 parse_order_detail
             )
             results["orders_enriched"] = enriched
+            if incremental.ENABLED:
+                merge_enriched(orders_path, OUTPUT_DIR / "amazon_orders.jsonl",
+                               ("id", "order_number", "detail_url"))
 
         # Enrich emails with full body text + sender/recipient
         emails_path = OUTPUT_DIR / "emails.jsonl"
+        if incremental.ENABLED:
+            emails_path = incremental.delta_path(emails_path)
         if emails_path.exists():
             enriched = enrich_from_details(
                 emails_path, "emails", "detail_url",
                 parse_email_detail
             )
             results["emails_enriched"] = enriched
+            if incremental.ENABLED:
+                merge_enriched(emails_path, OUTPUT_DIR / "emails.jsonl", ("detail_url",))
 
     # Summary
     log("")
@@ -818,6 +1024,10 @@ def main():
         "results": results,
     }
     (OUTPUT_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    log(http_cache.summary())
+    if INCOMPLETE:
+        log(f"Incomplete (rerun to resume): {', '.join(INCOMPLETE)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
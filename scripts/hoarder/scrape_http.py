@@ -0,0 +1,201 @@
+"""
+Shared HTTP plumbing for the epsteininvestigation.org scrapers.
+
+One long-lived, pooled httpx client per scraper (keep-alive, HTTP/2 when
+the `h2` package is installed) so pages don't each pay for a new TCP+TLS
+handshake, and a token-bucket limiter that hands out request slots at
+exactly the allowed rate. Slots are scheduled from when the previous one
+was due, not from when its response arrived, so request latency no
+longer adds to the rate-limit delay. 429/503 responses push every
+caller's next slot back by the server's Retry-After.
+
+The limiter is a transport under the response cache (http_cache.py), so
+only requests that actually go to the network wait for a slot.
+
+prefetch() runs a fetch loop in its own thread, a bounded number of
+responses ahead of whoever is parsing and writing them, so parse time
+never delays the next request.
+"""
+
+import email.utils
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+import http_cache
+
+# epsteininvestigation.org allows 100 requests/minute
+REQUESTS_PER_MINUTE = 100
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making requests to one host.
+    acquire() blocks until the caller's slot; slots are 60/per_minute
+    apart, with up to `burst` unused slots banked.
+    """
+
+    def __init__(self, per_minute: float = REQUESTS_PER_MINUTE, burst: int = 1):
+        self.interval = 60.0 / per_minute
+        self.burst = burst
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            # Bank at most `burst` slots of idle time
+            slot = max(self._next, now - self.interval * (self.burst - 1))
+            self._next = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (server asked us to slow down)."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Waits for a limiter slot before every request it sends."""
+
+    def __init__(self, inner: httpx.BaseTransport, limiter: RateLimiter):
+        self.inner = inner
+        self.limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.limiter.acquire()
+        return self.inner.handle_request(request)
+
+    def close(self):
+        self.inner.close()
+
+
+def retry_after(resp: httpx.Response, default: float) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    value = resp.headers.get("retry-after")
+    if not value:
+        return default
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class ScrapeClient:
+    """Pooled, rate-limited client. Thread-safe; share one per host."""
+
+    def __init__(self, headers: dict | None = None, per_minute: float = REQUESTS_PER_MINUTE,
+                 timeout: float = 30, max_connections: int = 10):
+        self.limiter = RateLimiter(per_minute)
+        network = httpx.HTTPTransport(
+            http2=HTTP2,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=60),
+        )
+        self.client = httpx.Client(
+            transport=http_cache.transport(RateLimitedTransport(network, self.limiter)),
+            timeout=timeout,
+            follow_redirects=True,
+            headers=headers,
+        )
+
+    def get(self, url: str, retries: int = 3, **kwargs) -> httpx.Response | None:
+        """
+        GET within the rate limit. Returns the response, or None straight
+        away for a client error (other than 408/429) and when retries run
+        out. Retryable statuses back off for the server's Retry-After (or
+        2s, 4s, ...) before the next attempt.
+        """
+        for attempt in range(retries):
+            try:
+                r = self.client.get(url, **kwargs)
+            except httpx.HTTPError as e:
+                log(f"  Error on attempt {attempt+1}: {e}")
+                time.sleep(2 * (attempt + 1))
+                continue
+
+            if r.status_code in RETRY_STATUSES:
+                wait = retry_after(r, 2 * (attempt + 1))
+                log(f"  HTTP {r.status_code} on attempt {attempt+1}, retrying in {wait:.0f}s")
+                self.limiter.pause(wait)
+                continue
+            if r.is_client_error:
+                log(f"  {r.status_code} for {url}")
+                return None
+            if r.is_error:
+                log(f"  HTTP {r.status_code} on attempt {attempt+1}")
+                time.sleep(2 * (attempt + 1))
+                continue
+            return r
+        return None
+
+    def close(self):
+        self.client.close()
+
+
+_ITEM, _END, _ERROR = range(3)
+
+
+def prefetch(items, depth: int = 8):
+    """
+    Iterate `items` in a background thread, at most `depth` items ahead
+    of the consumer. Exceptions are re-raised in the consumer. Closing
+    the returned generator (or breaking out of a loop over it) stops the
+    thread after the item it is on.
+    """
+    q: queue.Queue = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((_ITEM, item)):
+                    break
+            else:
+                put((_END, None))
+        except BaseException as e:
+            put((_ERROR, e))
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+
+    threading.Thread(target=produce, daemon=True, name="prefetch").start()
+    try:
+        while True:
+            kind, value = q.get()
+            if kind == _END:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stop.set()
@@ -24,6 +24,9 @@ SOURCES = {
         "bucket_path": "huggingface/svetfm-fbi",
         "tier": 1,
         "skip_patterns": [],
+        # Parquet columns to leave on the Hub, only with download --prune-columns
+        # (that copy is kept apart, under huggingface/svetfm-fbi-pruned)
+        "drop_columns": ["*embedding*"],
     },
     "svetfm-nov11": {
         "name": "svetfm/epstein-files-nov11-25-house-post-ocr-embeddings",
@@ -33,6 +36,7 @@ SOURCES = {
         "bucket_path": "huggingface/svetfm-nov11",
         "tier": 1,
         "skip_patterns": [],
+        "drop_columns": ["*embedding*"],
     },
     "lmsband": {
         "name": "LMSBAND/epstein-files-db",
@@ -168,6 +172,14 @@ SOURCES = {
         "bucket_path": "doj",
         "tier": 3,
         "skip_patterns": [],
+        # Archive.org mirror of the DOJ zips, streamed member-by-member.
+        # Datasets 9 and 10 are torrent-only (see run_task.sh ds9/ds10).
+        "archives": {
+            f"dataset-{ds}": f"https://archive.org/download/Epstein-Data-Sets-So-Far/Data%20Set%20{ds}.zip"
+            for ds in (1, 2, 3, 4, 5, 6, 7, 8, 11, 12)
+        },
+        # Published per-dataset checksums, verified while streaming
+        "checksums": "https://github.com/yung-megafone/Epstein-Files",
     },
     "yung-megafone": {
         "name": "yung-megafone/Epstein-Files",
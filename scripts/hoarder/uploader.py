@@ -3,25 +3,33 @@ Upload files to Supabase Storage with verification manifests.
 Handles single files and directory trees with concurrent uploads.
 """
 
+import base64
 import hashlib
 import json
 import os
 import mimetypes
+import tempfile
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 
+import httpx
 from supabase import create_client, Client
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, MofNCompleteColumn
 
+import live
+
 console = Console()
 
 BUCKET_NAME = "raw-archive"
 MAX_STANDARD_UPLOAD = 50 * 1024 * 1024
 CONCURRENT_UPLOADS = int(os.environ.get("CONCURRENT_UPLOADS", "20"))
+# Supabase's resumable (TUS) endpoint only accepts 6MB chunks
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
 
 
 def get_client() -> Client:
@@ -83,12 +91,15 @@ def upload_file_worker(url: str, key: str, local_path: str, remote_path: str) ->
                     file=f.read(),
                     file_options={"content-type": mime_type, "upsert": "true"},
                 )
+            live.file_done(remote_path, True, file_size)
             return (remote_path, True, file_size, "")
         except Exception as e:
             last_error = str(e)
             if "already exists" in last_error.lower() or "duplicate" in last_error.lower():
+                live.file_done(remote_path, True, file_size)
                 return (remote_path, True, file_size, "")
             if "InvalidKey" in last_error:
+                live.file_done(remote_path, False)
                 return (remote_path, False, file_size, last_error)
             # Reset client on connection errors so next attempt gets a fresh connection
             _thread_local.client = None
@@ -96,9 +107,232 @@ def upload_file_worker(url: str, key: str, local_path: str, remote_path: str) ->
                 backoff = (2 ** attempt) + (time.monotonic() % 1)  # 1-2s, 2-3s, 4-5s
                 time.sleep(backoff)
 
+    live.file_done(remote_path, False)
     return (remote_path, False, file_size, last_error)
 
 
+def _get_thread_http() -> httpx.Client:
+    """Get or create a per-thread httpx client for the resumable upload endpoint."""
+    if not hasattr(_thread_local, "http") or _thread_local.http is None:
+        _thread_local.http = httpx.Client(timeout=300)
+    return _thread_local.http
+
+
+def _rechunk(chunks, size: int):
+    """Regroup an iterable of arbitrary byte chunks into fixed-size blocks."""
+    buf = bytearray()
+    for chunk in chunks:
+        buf.extend(chunk)
+        while len(buf) >= size:
+            yield bytes(buf[:size])
+            del buf[:size]
+    if buf:
+        yield bytes(buf)
+
+
+def _spool(chunks) -> tuple:
+    """Spool a stream of unknown length so its size can be declared up front."""
+    spool = tempfile.SpooledTemporaryFile(max_size=RESUMABLE_CHUNK_SIZE,
+                                          dir=os.environ.get("HOARDER_TEMP_DIR") or None)
+    size = 0
+    for chunk in chunks:
+        spool.write(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    return spool, size
+
+
+def _resumable_upload(remote_path: str, blocks, size: int, mime_type: str):
+    """
+    Push pre-sized blocks through Supabase's TUS endpoint. On a failed PATCH
+    the server's offset is re-read with HEAD, so a retry only resends the
+    block that didn't land.
+    """
+    url = os.environ["SUPABASE_URL"].rstrip("/")
+    key = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+    b64 = lambda v: base64.b64encode(v.encode()).decode()
+    base_headers = {
+        "Authorization": f"Bearer {key}",
+        "apikey": key,
+        "Tus-Resumable": "1.0.0",
+    }
+
+    http = _get_thread_http()
+    resp = http.post(
+        f"{url}/storage/v1/upload/resumable",
+        headers={
+            **base_headers,
+            "x-upsert": "true",
+            "Upload-Length": str(size),
+            "Upload-Metadata": ",".join([
+                f"bucketName {b64(BUCKET_NAME)}",
+                f"objectName {b64(remote_path)}",
+                f"contentType {b64(mime_type)}",
+            ]),
+        },
+    )
+    resp.raise_for_status()
+    location = resp.headers["Location"]
+
+    offset = 0
+    for block in blocks:
+        for attempt in range(MAX_RETRIES):
+            try:
+                r = http.patch(location, content=block, headers={
+                    **base_headers,
+                    "Upload-Offset": str(offset),
+                    "Content-Type": "application/offset+octet-stream",
+                })
+                r.raise_for_status()
+                break
+            except Exception:
+                _thread_local.http = None
+                http = _get_thread_http()
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep((2 ** attempt) + (time.monotonic() % 1))
+                # The block may have landed before the connection dropped
+                try:
+                    head = http.head(location, headers=base_headers)
+                    landed = int(head.headers.get("Upload-Offset", offset)) == offset + len(block)
+                except (httpx.HTTPError, ValueError):
+                    landed = False  # can't tell; resend the block
+                if landed:
+                    break
+        offset += len(block)
+
+
+def stream_upload(remote_path: str, chunks, size: int | None = None,
+                  content_type: str | None = None, pool: "FairUploadPool | None" = None,
+                  queue_key: str = "", weight: float = 1) -> dict:
+    """
+    Upload a byte stream to Supabase Storage without touching local disk.
+    Hashes on the fly and returns a manifest entry {path, size, sha256}.
+    Streams of unknown length are spooled first (in memory up to 6MB,
+    then to HOARDER_TEMP_DIR) because the resumable endpoint needs the
+    total length up front.
+
+    With a pool, the upload waits for a worker under queue_key's fair
+    share (as upload_directory's files do) and runs there; the caller
+    blocks until it is done.
+    """
+    if pool is not None:
+        return pool.submit(queue_key or remote_path, weight, stream_upload,
+                           remote_path, chunks, size, content_type).result()
+    mime_type = content_type or mimetypes.guess_type(remote_path)[0] or "application/octet-stream"
+    spool = None
+    if size is None:
+        spool, size = _spool(chunks)
+        chunks = iter(lambda: spool.read(RESUMABLE_CHUNK_SIZE), b"")
+
+    h = hashlib.sha256()
+    received = 0
+
+    def hashed():
+        nonlocal received
+        for chunk in chunks:
+            h.update(chunk)
+            received += len(chunk)
+            live.add_bytes(remote_path, len(chunk))
+            yield chunk
+
+    try:
+        if size <= RESUMABLE_CHUNK_SIZE:
+            # Small enough to hold in memory -- one standard upload request
+            data = b"".join(hashed())
+            if received != size:
+                raise IOError(f"Short stream for {remote_path}: got {received} of {size} bytes")
+            url = os.environ["SUPABASE_URL"]
+            key = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+            _get_thread_client(url, key).storage.from_(BUCKET_NAME).upload(
+                path=remote_path,
+                file=data,
+                file_options={"content-type": mime_type, "upsert": "true"},
+            )
+        else:
+            _resumable_upload(remote_path, _rechunk(hashed(), RESUMABLE_CHUNK_SIZE),
+                              size, mime_type)
+        if received != size:
+            raise IOError(f"Short stream for {remote_path}: got {received} of {size} bytes")
+    except Exception:
+        live.file_done(remote_path, False)
+        raise
+    finally:
+        if spool is not None:
+            spool.close()
+
+    live.file_done(remote_path, True)
+
+    return {"path": remote_path, "size": received, "sha256": h.hexdigest()}
+
+
+class FairUploadPool:
+    """
+    One set of upload worker threads shared by several concurrently
+    hoarded sources. Each source gets its own queue, and workers pick the
+    next job by stride scheduling: a source with weight w is served w times
+    as often as a weight-1 source while both have work queued, and a busy
+    source can never starve a quiet one.
+    """
+
+    def __init__(self, workers: int = CONCURRENT_UPLOADS):
+        self.workers = workers
+        self._queues: dict[str, deque] = {}
+        self._weights: dict[str, float] = {}
+        self._pass: dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"upload-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, queue_key: str, weight: float, fn, *args) -> Future:
+        fut = Future()
+        with self._cond:
+            if queue_key not in self._queues:
+                self._queues[queue_key] = deque()
+                # Join at the current virtual time so a newcomer neither
+                # jumps the line nor waits behind everyone's history
+                active = [self._pass[k] for k, q in self._queues.items() if q]
+                self._pass[queue_key] = min(active) if active else 0.0
+            self._weights[queue_key] = max(weight, 0.1)
+            self._queues[queue_key].append((fut, fn, args))
+            self._cond.notify()
+        return fut
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                ready = [k for k, q in self._queues.items() if q]
+                if ready:
+                    k = min(ready, key=lambda k: self._pass[k])
+                    self._pass[k] += 1.0 / self._weights[k]
+                    return self._queues[k].popleft()
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _run(self):
+        while (job := self._next_job()) is not None:
+            fut, fn, args = job
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+
 def build_local_manifest(local_dir: str, skip_dirs: set | None = None,
                          compute_hashes: bool = True) -> list[dict]:
     """
@@ -137,7 +371,7 @@ def upload_manifest(client: Client, source_key: str, manifest: list[dict],
         "source": source_key,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "file_count": len(manifest),
-        "total_bytes": sum(f["size"] for f in manifest),
+        "total_bytes": sum(f.get("size", 0) for f in manifest),
         "upload_stats": stats,
         "files": manifest,
     }
@@ -153,7 +387,7 @@ def upload_manifest(client: Client, source_key: str, manifest: list[dict],
         )
         console.print(f"[green]Manifest saved: {remote_path} "
                        f"({len(manifest)} files, "
-                       f"{sum(f['size'] for f in manifest) / 1024 / 1024:.1f}MB)[/green]")
+                       f"{sum(f.get('size', 0) for f in manifest) / 1024 / 1024:.1f}MB)[/green]")
     except Exception as e:
         console.print(f"[red]Failed to upload manifest: {e}[/red]")
 
@@ -161,10 +395,15 @@ def upload_manifest(client: Client, source_key: str, manifest: list[dict],
 def upload_directory(client: Client, local_dir: str, remote_prefix: str,
                      skip_patterns: list[str] | None = None,
                      progress_tracker=None,
-                     source_key: str | None = None) -> dict:
+                     source_key: str | None = None,
+                     pool: FairUploadPool | None = None,
+                     weight: float = 1) -> dict:
     """
     Upload an entire directory tree to Supabase Storage using concurrent uploads.
     Builds a manifest before uploading, then verifies after.
+    With a shared FairUploadPool, uploads are queued there (at `weight`)
+    instead of on a private thread pool, and the progress bar is replaced
+    by periodic log lines so several sources can run at once.
     Returns stats dict with counts.
     """
     stats = {"uploaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
@@ -220,8 +459,13 @@ def upload_directory(client: Client, local_dir: str, remote_prefix: str,
     else:
         workers = CONCURRENT_UPLOADS
 
-    console.print(f"[cyan]Uploading {len(to_upload)} files with {workers} parallel workers "
-                  f"(avg {avg_file_size/1024:.0f}KB/file)...[/cyan]")
+    if pool:
+        workers = pool.workers
+        console.print(f"[cyan]Queueing {len(to_upload)} files for {remote_prefix} on the shared "
+                      f"upload pool (avg {avg_file_size/1024:.0f}KB/file)...[/cyan]")
+    else:
+        console.print(f"[cyan]Uploading {len(to_upload)} files with {workers} parallel workers "
+                      f"(avg {avg_file_size/1024:.0f}KB/file)...[/cyan]")
 
     # Get credentials for worker threads (each creates its own client)
     url = os.environ["SUPABASE_URL"]
@@ -234,44 +478,53 @@ def upload_directory(client: Client, local_dir: str, remote_prefix: str,
         MofNCompleteColumn(),
         TextColumn("[green]{task.fields[uploaded_mb]:.0f}MB"),
         console=console,
-    ) as progress:
+        disable=pool is not None,  # only one live display may run at a time
+    ) as progress, ThreadPoolExecutor(max_workers=1 if pool else workers) as executor:
         task = progress.add_task("Uploading", total=len(to_upload), uploaded_mb=0)
 
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            # Submit in batches to avoid building a 500K+ futures dict upfront
-            batch_size = workers * 4
-            idx = 0
-            futures = {}
-
-            def refill():
-                nonlocal idx
-                while len(futures) < batch_size and idx < len(to_upload):
-                    lp, rp, sz = to_upload[idx]
-                    fut = executor.submit(upload_file_worker, url, key, lp, rp)
-                    futures[fut] = (lp, rp, sz)
-                    idx += 1
-
-            refill()
-
-            while futures:
-                done = next(as_completed(futures))
-                _lp, _rp, _sz = futures.pop(done)
-                remote_path, success, file_size, error_msg = done.result()
-
-                if success:
-                    stats["uploaded"] += 1
-                    stats["bytes"] += file_size
-                    if progress_tracker:
-                        progress_tracker.mark_uploaded(remote_path)
+        def submit(lp, rp):
+            if pool:
+                return pool.submit(source_key or remote_prefix, weight, upload_file_worker, url, key, lp, rp)
+            return executor.submit(upload_file_worker, url, key, lp, rp)
+
+        # Submit in batches to avoid building a 500K+ futures dict upfront
+        batch_size = workers * 4
+        idx = 0
+        futures = {}
+
+        def refill():
+            nonlocal idx
+            while len(futures) < batch_size and idx < len(to_upload):
+                lp, rp, sz = to_upload[idx]
+                futures[submit(lp, rp)] = (lp, rp, sz)
+                idx += 1
+
+        refill()
+
+        done_count = 0
+        while futures:
+            done = next(as_completed(futures))
+            _lp, _rp, _sz = futures.pop(done)
+            remote_path, success, file_size, error_msg = done.result()
+
+            if success:
+                stats["uploaded"] += 1
+                stats["bytes"] += file_size
+                if progress_tracker:
+                    progress_tracker.mark_uploaded(remote_path)
+            else:
+                stats["failed"] += 1
+                if file_size > MAX_STANDARD_UPLOAD:
+                    console.print(f"[red]Failed (large file {file_size/1024/1024:.1f}MB): {remote_path}: {error_msg}[/red]")
                 else:
-                    stats["failed"] += 1
-                    if file_size > MAX_STANDARD_UPLOAD:
-                        console.print(f"[red]Failed (large file {file_size/1024/1024:.1f}MB): {remote_path}: {error_msg}[/red]")
-                    else:
-                        console.print(f"[red]Failed: {remote_path}: {error_msg}[/red]")
+                    console.print(f"[red]Failed: {remote_path}: {error_msg}[/red]")
 
-                progress.update(task, advance=1, uploaded_mb=stats["bytes"] / 1024 / 1024)
-                refill()
+            progress.update(task, advance=1, uploaded_mb=stats["bytes"] / 1024 / 1024)
+            done_count += 1
+            if pool and done_count % 1000 == 0:
+                console.print(f"[dim]{remote_prefix}: {done_count}/{len(to_upload)} files, "
+                              f"{stats['bytes'] / 1024 / 1024:.0f}MB[/dim]")
+            refill()
 
     # Upload the manifest as our verification receipt
     if source_key:
@@ -280,16 +533,76 @@ def upload_directory(client: Client, local_dir: str, remote_prefix: str,
     return stats
 
 
+def download_manifest(client: Client, source_key: str) -> dict | None:
+    """Fetch a source's previously uploaded manifest, or None if there isn't one."""
+    try:
+        data = client.storage.from_(BUCKET_NAME).download(f"_manifests/{source_key}.json")
+        return json.loads(data)
+    except Exception:
+        return None
+
+
+def copy_object(from_path: str, to_path: str):
+    """Server-side copy within the bucket (no bytes pass through this machine)."""
+    client = _get_thread_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    bucket = client.storage.from_(BUCKET_NAME)
+    try:
+        bucket.copy(from_path, to_path)
+    except Exception as e:
+        # copy() has no upsert option; replace an existing destination
+        if "already exists" not in str(e).lower() and "duplicate" not in str(e).lower():
+            raise
+        bucket.remove([to_path])
+        bucket.copy(from_path, to_path)
+
+
+def move_object(from_path: str, to_path: str):
+    """Server-side move within the bucket, replacing an existing destination."""
+    client = _get_thread_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    bucket = client.storage.from_(BUCKET_NAME)
+    try:
+        bucket.move(from_path, to_path)
+    except Exception as e:
+        if "already exists" not in str(e).lower() and "duplicate" not in str(e).lower():
+            raise
+        bucket.remove([to_path])
+        bucket.move(from_path, to_path)
+
+
+def list_objects(prefix: str, page: int = 1000) -> list[str]:
+    """Every object path under prefix; Storage lists one folder level per request."""
+    client = _get_thread_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    bucket = client.storage.from_(BUCKET_NAME)
+    paths, folders = [], [prefix.rstrip("/")]
+    while folders:
+        folder = folders.pop()
+        offset = 0
+        while True:
+            entries = bucket.list(folder, {"limit": page, "offset": offset})
+            for entry in entries:
+                # Folders come back without an id
+                (paths if entry.get("id") else folders).append(f"{folder}/{entry['name']}")
+            if len(entries) < page:
+                break
+            offset += page
+    return paths
+
+
+def remove_objects(paths: list[str], batch: int = 1000):
+    """Delete objects from the bucket, a batch of paths per request."""
+    client = _get_thread_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    bucket = client.storage.from_(BUCKET_NAME)
+    for i in range(0, len(paths), batch):
+        bucket.remove(paths[i:i + batch])
+
+
 def verify_source(client: Client, source_key: str) -> dict:
     """
     Verify a source's upload by comparing its manifest against
     what's actually in the bucket. Returns verification report.
     """
-    manifest_path = f"_manifests/{source_key}.json"
-    try:
-        data = client.storage.from_(BUCKET_NAME).download(manifest_path)
-        manifest = json.loads(data)
-    except Exception:
+    manifest = download_manifest(client, source_key)
+    if manifest is None:
         return {"status": "no_manifest", "source": source_key}
 
     expected_count = manifest["file_count"]